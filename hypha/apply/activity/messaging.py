@@ -1,18 +1,20 @@
 import json
 import logging
+import threading
 from collections import defaultdict
+from contextlib import contextmanager
 
-import requests
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch
 from django.template.loader import render_to_string
 from django.utils import timezone
 
-from .models import ALL, TEAM
+from .models import ACTION, ALL, TEAM
 from .options import MESSAGES
-from .tasks import send_mail
+from .tasks import send_mail, send_slack_message
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -68,12 +70,29 @@ neat_related = {
     MESSAGES.SKIPPED_REPORT: 'report',
     MESSAGES.REPORT_FREQUENCY_CHANGED: 'config',
     MESSAGES.REPORT_NOTIFY: 'report',
+    MESSAGES.BATCH_REPORT_NOTIFY: 'reports',
     MESSAGES.CREATE_REMINDER: 'reminder',
     MESSAGES.DELETE_REMINDER: 'reminder',
     MESSAGES.REVIEW_REMINDER: 'reminder',
 }
 
 
+def context_key(value):
+    # A hashable stand in for a template context, model instances are compared
+    # by their primary key so the same objects give the same key
+    if isinstance(value, models.Model):
+        return (value._meta.label, value.pk)
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), context_key(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(context_key(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return id(value)
+    return value
+
+
 def is_transition(message_type):
     return message_type in [MESSAGES.TRANSITION, MESSAGES.BATCH_TRANSITION]
 
@@ -86,6 +105,9 @@ class AdapterBase:
     messages = {}
     always_send = False
 
+    def __init__(self):
+        self.local = threading.local()
+
     def message(self, message_type, **kwargs):
         try:
             message = self.messages[message_type]
@@ -141,17 +163,25 @@ class AdapterBase:
             event.source.id: event
             for event in events
         }
-        for recipient in self.batch_recipients(message_type, sources, user=user, **kwargs):
-            recipients = recipient['recipients']
-            sources = recipient['sources']
-            events = [events_by_source[source.id] for source in sources]
-            self.process_send(message_type, recipients, events, request, user, sources=sources, source=None, related=related, **kwargs)
+        batch = []
+        with self.rendered_messages():
+            for recipient in self.batch_recipients(message_type, sources, user=user, **kwargs):
+                recipients = recipient['recipients']
+                sources = recipient['sources']
+                events = [events_by_source[source.id] for source in sources]
+                batch.extend(self.prepare_send(message_type, recipients, events, request, user, sources=sources, source=None, related=related, **kwargs))
+        self.send_batch(batch, request)
 
     def process(self, message_type, event, request, user, source, related=None, **kwargs):
         recipients = self.recipients(message_type, source=source, related=related, user=user, **kwargs)
         self.process_send(message_type, recipients, [event], request, user, source, related=related, **kwargs)
 
     def process_send(self, message_type, recipients, events, request, user, source, sources=list(), related=None, **kwargs):
+        batch = self.prepare_send(message_type, recipients, events, request, user, source, sources=sources, related=related, **kwargs)
+        self.send_batch(batch, request)
+
+    def prepare_send(self, message_type, recipients, events, request, user, source, sources=list(), related=None, **kwargs):
+        # Returns the (message, recipient, events, kwargs) to send for each of the recipients
         try:
             # If this was a batch action we want to pull out the submission
             source = sources[0]
@@ -171,17 +201,28 @@ class AdapterBase:
 
         message = self.message(message_type, **kwargs)
         if not message:
+            return []
+
+        return [
+            (message, recipient, events, kwargs)
+            for recipient in recipients
+        ]
+
+    def send_batch(self, batch, request):
+        from .models import Message
+        if not batch:
             return
 
-        for recipient in recipients:
-            message_logs = self.create_logs(message, recipient, *events)
+        send = settings.SEND_MESSAGES or self.always_send
+        status = '' if send else 'Message not sent as SEND_MESSAGES==FALSE'
+        all_logs = self.create_logs(batch, status)
 
-            if settings.SEND_MESSAGES or self.always_send:
+        statuses = defaultdict(list)
+        for (message, recipient, events, kwargs), message_logs in zip(batch, all_logs):
+            if send:
                 status = self.send_message(message, recipient=recipient, logs=message_logs, **kwargs)
-            else:
-                status = 'Message not sent as SEND_MESSAGES==FALSE'
-
-            message_logs.update_status(status)
+                if status:
+                    statuses[status].extend(log.id for log in message_logs)
 
             if not settings.SEND_MESSAGES:
                 if recipient:
@@ -190,15 +231,41 @@ class AdapterBase:
                     debug_message = '{}: {}'.format(self.adapter_type, message)
                 messages.add_message(request, messages.DEBUG, debug_message)
 
-    def create_logs(self, message, recipient, *events):
+        for status, log_ids in statuses.items():
+            Message.objects.filter(id__in=log_ids).update_status(status)
+
+    def create_logs(self, batch, status=''):
+        # Log every message in the batch with a single query, returns the
+        # logs for each of the entries in the batch
         from .models import Message
-        messages = Message.objects.bulk_create(
-            Message(
-                **self.log_kwargs(message, recipient, event)
-            )
-            for event in events
-        )
-        return Message.objects.filter(id__in=[message.id for message in messages])
+        logs = [
+            [
+                Message(status=status, **self.log_kwargs(message, recipient, event))
+                for event in events
+            ]
+            for message, recipient, events, kwargs in batch
+        ]
+        Message.objects.bulk_create([log for message_logs in logs for log in message_logs])
+        return logs
+
+    @contextmanager
+    def rendered_messages(self):
+        # Reuse the rendered message for identical contexts within a batch
+        self.local.rendered = {}
+        try:
+            yield
+        finally:
+            del self.local.rendered
+
+    def render_to_string(self, template, context, request):
+        rendered = getattr(self.local, 'rendered', None)
+        if rendered is None:
+            return render_to_string(template, context, request)
+
+        key = (template, context_key(context), id(request))
+        if key not in rendered:
+            rendered[key] = render_to_string(template, context, request)
+        return rendered[key]
 
     def log_kwargs(self, message, recipient, event):
         return {
@@ -385,7 +452,8 @@ class ActivityAdapter(AdapterBase):
         else:
             related_object = None
 
-        Activity.actions.create(
+        activity = Activity(
+            type=ACTION,
             user=user,
             source=source,
             timestamp=timezone.now(),
@@ -394,6 +462,31 @@ class ActivityAdapter(AdapterBase):
             related_object=related_object,
         )
 
+        pending = getattr(self.local, 'activities', None)
+        if pending is None:
+            activity.save()
+        else:
+            pending.append(activity)
+
+    def send_batch(self, batch, request):
+        # The activities for a batch are created together once the messages are logged
+        from hypha.apply.funds.models import ApplicationSubmission, SubmissionStats
+
+        from .models import Activity
+        self.local.activities = []
+        try:
+            super().send_batch(batch, request)
+            activities = Activity.objects.bulk_create(self.local.activities)
+        finally:
+            del self.local.activities
+
+        # bulk_create doesn't send the signals which keep the stats up to date
+        SubmissionStats.objects.refresh(*{
+            activity.source_object_id
+            for activity in activities
+            if isinstance(activity.source, ApplicationSubmission)
+        })
+
     def handle_screening_statuses(self, source, old_status, **kwargs):
         new_status = ', '.join([s.title for s in source.screening_statuses.all()])
         return f'Screening status from {old_status} to {new_status}'
@@ -491,11 +584,19 @@ class SlackAdapter(AdapterBase):
 
     def batch_recipients(self, message_type, sources, **kwargs):
         # We group the messages by lead
-        leads = User.objects.filter(id__in=sources.values('lead'))
+        sources_by_lead = defaultdict(list)
+        for source in sources:
+            if source.lead_id:
+                sources_by_lead[source.lead_id].append(source)
+
+        leads = sorted(
+            (lead_sources[0].lead for lead_sources in sources_by_lead.values()),
+            key=lambda lead: (lead.full_name, lead.email),
+        )
         return [
             {
                 'recipients': [self.slack_id(lead)],
-                'sources': sources.filter(lead=lead),
+                'sources': sources_by_lead[lead.id],
             } for lead in leads
         ]
 
@@ -650,7 +751,7 @@ class SlackAdapter(AdapterBase):
 
         return target_rooms
 
-    def send_message(self, message, recipient, source, **kwargs):
+    def send_message(self, message, recipient, source, logs=None, **kwargs):
         target_rooms = self.slack_channels(source, **kwargs)
 
         if not self.destination or not any(target_rooms):
@@ -663,13 +764,8 @@ class SlackAdapter(AdapterBase):
 
         message = ' '.join([recipient, message]).strip()
 
-        data = {
-            "room": target_rooms,
-            "message": message,
-        }
-        response = requests.post(self.destination, json=data)
-
-        return str(response.status_code) + ': ' + response.content.decode()
+        # The status is recorded on the logs once the message has been delivered
+        send_slack_message(self.destination, target_rooms, message, logs=logs)
 
 
 class EmailAdapter(AdapterBase):
@@ -695,6 +791,7 @@ class EmailAdapter(AdapterBase):
         MESSAGES.SKIPPED_REPORT: 'messages/email/report_skipped.html',
         MESSAGES.REPORT_FREQUENCY_CHANGED: 'messages/email/report_frequency.html',
         MESSAGES.REPORT_NOTIFY: 'messages/email/report_notify.html',
+        MESSAGES.BATCH_REPORT_NOTIFY: 'handle_batch_report_notify',
         MESSAGES.REVIEW_REMINDER: 'messages/email/ready_to_review.html',
     }
 
@@ -770,6 +867,15 @@ class EmailAdapter(AdapterBase):
                 **kwargs
             )
 
+    def handle_batch_report_notify(self, reports, source, **kwargs):
+        # Each project is sent its own message, see batch_recipients
+        return self.render_message(
+            'messages/email/report_notify.html',
+            source=source,
+            report=reports[source.id],
+            **kwargs
+        )
+
     def handle_ready_for_review(self, request, source, **kwargs):
         if settings.SEND_READY_FOR_REVIEW:
             return self.render_message(
@@ -831,9 +937,10 @@ class EmailAdapter(AdapterBase):
         if not is_ready_for_review(message_type):
             return super().batch_recipients(message_type, sources, **kwargs)
 
+        missing_reviewers = self.batch_missing_reviewers(sources)
         reviewers_to_message = defaultdict(list)
         for source in sources:
-            reviewers = self.reviewers(source)
+            reviewers = self.reviewers(source, missing_reviewers[source.id])
             for reviewer in reviewers:
                 reviewers_to_message[reviewer].append(source)
 
@@ -844,13 +951,41 @@ class EmailAdapter(AdapterBase):
             } for reviewer, sources in reviewers_to_message.items()
         ]
 
-    def reviewers(self, source):
+    def reviewers(self, source, missing_reviewers=None):
+        if missing_reviewers is None:
+            missing_reviewers = source.missing_reviewers
         return [
             reviewer.email
-            for reviewer in source.missing_reviewers.all()
+            for reviewer in missing_reviewers
             if source.phase.permissions.can_review(reviewer) and not reviewer.is_apply_staff
         ]
 
+    def batch_missing_reviewers(self, sources):
+        # The missing reviewers of all the sources, each reviewer is a single
+        # instance with the roles loaded alongside
+        from hypha.apply.funds.models import AssignedReviewers
+        reviewed = AssignedReviewers.objects.reviewed().filter(
+            submission=OuterRef('submission'),
+            reviewer=OuterRef('reviewer'),
+        )
+        assigned = AssignedReviewers.objects.filter(
+            submission__in=[source.id for source in sources],
+        ).annotate(
+            has_reviewed=Exists(reviewed),
+        ).filter(
+            has_reviewed=False,
+        ).prefetch_related(
+            Prefetch('reviewer', queryset=User.objects.with_roles()),
+        ).order_by('reviewer__full_name', 'reviewer__email')
+
+        reviewers = {}
+        missing_reviewers = defaultdict(list)
+        for assignment in assigned:
+            reviewer = reviewers.setdefault(assignment.reviewer_id, assignment.reviewer)
+            if reviewer not in missing_reviewers[assignment.submission_id]:
+                missing_reviewers[assignment.submission_id].append(reviewer)
+        return missing_reviewers
+
     def partners_updated_applicant(self, added, removed, **kwargs):
         if added:
             return self.render_message(
@@ -864,7 +999,7 @@ class EmailAdapter(AdapterBase):
             return self.render_message('messages/email/partners_update_partner.html', **kwargs)
 
     def render_message(self, template, **kwargs):
-        return render_to_string(template, kwargs, kwargs['request'])
+        return self.render_to_string(template, kwargs, kwargs['request'])
 
     def send_message(self, message, source, subject, recipient, logs, **kwargs):
         try:
@@ -978,6 +1113,7 @@ class MessengerBackend:
                 adapter.process(message_type, event, request=request, user=user, source=source, related=related, **kwargs)
 
         elif sources:
+            sources = self.prepare_sources(sources)
             events = Event.objects.bulk_create(
                 Event(type=message_type.name, by=user, source=source)
                 for source in sources
@@ -985,6 +1121,23 @@ class MessengerBackend:
             for adapter in self.adapters:
                 adapter.process_batch(message_type, events, request=request, user=user, sources=sources, related=related, **kwargs)
 
+    def prepare_sources(self, sources):
+        # Load the sources and everything the adapters need up front, rather
+        # than each adapter querying for them one source at a time
+        if hasattr(sources, 'for_messaging'):
+            sources = sources.for_messaging()
+
+        shared = {}
+        sources = list(sources)
+        for source in sources:
+            for field in source._meta.concrete_fields:
+                if field.is_relation and field.is_cached(source):
+                    related = field.get_cached_value(source)
+                    if related is not None:
+                        key = (related._meta.label, related.pk)
+                        field.set_cached_value(source, shared.setdefault(key, related))
+        return sources
+
 
 adapters = [
     ActivityAdapter(),
@@ -157,14 +157,14 @@ class Event(models.Model):
 
 
 class MessagesQueryset(models.QuerySet):
-    def update_status(self, status):
+    def update_status(self, status, **fields):
         if status:
-            return self.update(
-                status=Case(
-                    When(status='', then=Value(status)),
-                    default=Concat('status', Value('<br />' + status))
-                )
+            fields['status'] = Case(
+                When(status='', then=Value(status)),
+                default=Concat('status', Value('<br />' + status))
             )
+        if fields:
+            return self.update(**fields)
 
     update_status.queryset_only = True
 
@@ -46,6 +46,7 @@ class MESSAGES(Enum):
     SKIPPED_REPORT = 'Skipped Report'
     REPORT_FREQUENCY_CHANGED = 'Report Frequency Changed'
     REPORT_NOTIFY = 'Report Notify'
+    BATCH_REPORT_NOTIFY = 'Batch Report Notify'
     CREATE_REMINDER = 'Reminder Created'
     DELETE_REMINDER = 'Reminder Deleted'
     REVIEW_REMINDER = 'Reminde to Review'
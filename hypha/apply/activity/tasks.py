@@ -1,11 +1,27 @@
+import hashlib
+import json
+import time
+
+import requests
 from celery import Celery
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import EmailMessage
 
+from hypha.apply.utils.cache import get_redis_client
+
 app = Celery('tasks')
 
 app.config_from_object(settings, namespace='CELERY', force=True)
 
+# Shared between the tasks run by a worker so the connection to slack is reused
+slack_session = requests.Session()
+
+SLACK_TIMEOUT = 10
+SLACK_RETRY_DELAY = 2
+# Allow for late writers to the queue of a window before it is sent
+SLACK_QUEUE_GRACE = 1
+
 
 def send_mail(subject, message, from_address, recipients, logs=None):
     # Convenience method to wrap the tasks and handle the callback
@@ -44,5 +60,91 @@ def send_mail_task(**kwargs):
 def update_message_status(response, message_pks):
     from .models import Message
     messages = Message.objects.filter(pk__in=message_pks)
-    messages.update(external_id=response['id'])
-    messages.update_status(response['status'])
+    messages.update_status(response['status'], external_id=response['id'])
+
+
+def send_slack_message(destination, rooms, message, logs=None):
+    # Convenience method to queue the message, messages to the same rooms within
+    # SLACK_MESSAGE_WINDOW seconds of each other are sent as a single post
+    kwargs = {
+        'destination': destination,
+        'rooms': rooms,
+    }
+    message_pks = [log.pk for log in logs or []]
+    window = settings.SLACK_MESSAGE_WINDOW
+
+    # The queue is a redis list so writers and the flush never race, other
+    # caches can't append atomically so the message is sent straight away
+    client = get_redis_client()
+    if not window or client is None or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        # Eager tasks ignore the countdown so there is nothing to wait for
+        send_slack_task.apply_async(kwargs={**kwargs, 'messages': [message], 'message_pks': message_pks})
+        return
+
+    now = time.time()
+    bucket = int(now // window)
+    key = cache.make_key(slack_queue_key(destination, rooms, bucket))
+
+    pipe = client.pipeline()
+    pipe.rpush(key, json.dumps({'message': message, 'message_pks': message_pks}))
+    pipe.expire(key, window * 10 + 60)
+    length, _ = pipe.execute()
+
+    # The first message after the queue was sent starts it again, this is also
+    # how a message written after the end of the window is picked up
+    if length == 1:
+        send_slack_queue.apply_async(
+            kwargs={**kwargs, 'key': key},
+            countdown=(bucket + 1) * window - now + SLACK_QUEUE_GRACE,
+        )
+
+
+def slack_queue_key(destination, rooms, bucket):
+    target = hashlib.sha1('|'.join([destination, *map(str, rooms)]).encode()).hexdigest()
+    return f'slack-queue:{target}:{bucket}'
+
+
+@app.task
+def send_slack_queue(destination, rooms, key):
+    client = get_redis_client()
+    # Read and clear the queue in one transaction
+    pipe = client.pipeline(transaction=True)
+    pipe.lrange(key, 0, -1)
+    pipe.delete(key)
+    queued, _ = pipe.execute()
+
+    entries = [json.loads(entry) for entry in queued]
+    if entries:
+        send_slack_task.apply_async(kwargs={
+            'destination': destination,
+            'rooms': rooms,
+            'messages': [entry['message'] for entry in entries],
+            'message_pks': [pk for entry in entries for pk in entry['message_pks']],
+        })
+
+
+@app.task(bind=True, max_retries=5)
+def send_slack_task(self, destination, rooms, messages, message_pks):
+    from .models import Message
+    logs = Message.objects.filter(pk__in=message_pks)
+
+    data = {
+        'room': rooms,
+        'message': '\n'.join(messages),
+    }
+    try:
+        response = slack_session.post(destination, json=data, timeout=SLACK_TIMEOUT)
+    except requests.RequestException as e:
+        status = 'Error: ' + str(e)
+        retry = True
+    else:
+        status = str(response.status_code) + ': ' + response.content.decode()
+        # Only retry when slack is unavailable, anything else will fail again
+        retry = response.status_code == 429 or response.status_code >= 500
+
+    if retry and self.request.retries < self.max_retries:
+        logs.update_status(f'{status} (retry {self.request.retries + 1} of {self.max_retries})')
+        raise self.retry(countdown=SLACK_RETRY_DELAY * 2 ** self.request.retries)
+
+    logs.update_status(status)
+    return status
@@ -6,8 +6,11 @@ from unittest.mock import Mock, patch
 import responses
 from django.contrib.messages import get_messages
 from django.core import mail
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
+from hypha.apply.funds.models import ApplicationSubmission, SubmissionStats
 from hypha.apply.funds.tests.factories import (
     ApplicationSubmissionFactory,
     AssignedReviewersFactory,
@@ -204,6 +207,77 @@ class TestMessageBackendProject(TestMessageBackendApplication):
     source_factory = ProjectFactory
 
 
+@override_settings(SEND_MESSAGES=True, ROOT_URLCONF='hypha.apply.urls')
+class TestBatchMessages(TestCase):
+    def setUp(self):
+        self.user = StaffFactory()
+        self.request = make_request(self.user)
+
+    def test_activities_and_logs_created_together(self):
+        submissions = ApplicationSubmissionFactory.create_batch(3)
+        messenger = MessengerBackend(ActivityAdapter())
+
+        with CaptureQueriesContext(connection) as queries:
+            messenger(
+                MESSAGES.BATCH_UPDATE_LEAD,
+                request=self.request,
+                user=self.user,
+                sources=ApplicationSubmission.objects.all(),
+                new_lead=self.user,
+            )
+
+        inserts = [query['sql'].split(' (')[0] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(inserts.count('INSERT INTO "activity_activity"'), 1)
+        self.assertEqual(inserts.count('INSERT INTO "activity_message"'), 1)
+        self.assertEqual(Activity.objects.count(), 3)
+        self.assertEqual(Message.objects.count(), 3)
+        submission_ids = [submission.id for submission in submissions]
+        self.assertEqual(list(SubmissionStats.objects.inconsistencies(submission_ids)), [])
+
+    def test_slack_grouped_by_lead(self):
+        lead = StaffFactory()
+        ApplicationSubmissionFactory.create_batch(2, lead=lead)
+        ApplicationSubmissionFactory()
+        sources = list(ApplicationSubmission.objects.select_related('lead'))
+
+        with self.assertNumQueries(0):
+            batch = SlackAdapter().batch_recipients(MESSAGES.BATCH_TRANSITION, sources)
+
+        self.assertEqual(len(batch), 2)
+        lead_batch = next(entry for entry in batch if entry['sources'][0].lead == lead)
+        self.assertEqual(len(lead_batch['sources']), 2)
+
+    def test_batch_missing_reviewers_match_single(self):
+        adapter = EmailAdapter()
+        reviewers = ReviewerFactory.create_batch(3)
+        submission = ApplicationSubmissionFactory(status='external_review', reviewers=reviewers, workflow_stages=2)
+        ReviewFactory(submission=submission, author__reviewer=reviewers[0])
+
+        missing_reviewers = adapter.batch_missing_reviewers([submission])
+
+        self.assertCountEqual(missing_reviewers[submission.id], reviewers[1:])
+        self.assertEqual(
+            adapter.reviewers(submission, missing_reviewers[submission.id]),
+            adapter.reviewers(submission),
+        )
+
+    @patch('hypha.apply.activity.messaging.render_to_string', return_value='message')
+    def test_rendered_message_reused_in_batch(self, render_to_string):
+        adapter = EmailAdapter()
+        submission = ApplicationSubmissionFactory()
+
+        with adapter.rendered_messages():
+            adapter.render_message('template.html', request=self.request, source=submission)
+            adapter.render_message('template.html', request=self.request, source=submission)
+            self.assertEqual(render_to_string.call_count, 1)
+
+            adapter.render_message('template.html', request=self.request, source=ApplicationSubmissionFactory())
+            self.assertEqual(render_to_string.call_count, 2)
+
+        adapter.render_message('template.html', request=self.request, source=submission)
+        self.assertEqual(render_to_string.call_count, 3)
+
+
 @override_settings(SEND_MESSAGES=True)
 class TestActivityAdapter(TestCase):
     def setUp(self):
@@ -1,8 +1,12 @@
+import json
 from unittest.mock import patch
 
-from django.test import TestCase
+import responses
+from django.test import TestCase, override_settings
 
-from ..tasks import send_mail
+from hypha.apply.utils.testing import FakeRedis
+
+from ..tasks import send_mail, send_slack_message, send_slack_queue, send_slack_task
 from .factories import MessageFactory
 
 
@@ -17,3 +21,93 @@ class TestSendEmail(TestCase):
         }
         send_mail(*kwargs, logs=[MessageFactory()])
         email_mock.assert_called_once_with(**kwargs)
+
+
+class TestSendSlack(TestCase):
+    target_url = 'https://my-slack-backend.com/incoming/my-very-secret-key'
+
+    @responses.activate
+    def test_message_sent_and_status_recorded(self):
+        responses.add(responses.POST, self.target_url, status=200, body='OK')
+        log = MessageFactory(status='')
+        send_slack_message(self.target_url, ['#room'], 'my message', logs=[log])
+        self.assertEqual(len(responses.calls), 1)
+        self.assertDictEqual(
+            json.loads(responses.calls[0].request.body),
+            {'room': ['#room'], 'message': 'my message'},
+        )
+        log.refresh_from_db()
+        self.assertEqual(log.status, '200: OK')
+
+    @responses.activate
+    @patch('hypha.apply.activity.tasks.SLACK_RETRY_DELAY', 0)
+    def test_unavailable_retried_and_recorded(self):
+        responses.add(responses.POST, self.target_url, status=503, body='Unavailable')
+        responses.add(responses.POST, self.target_url, status=200, body='OK')
+        log = MessageFactory(status='')
+        send_slack_message(self.target_url, ['#room'], 'my message', logs=[log])
+        self.assertEqual(len(responses.calls), 2)
+        log.refresh_from_db()
+        self.assertEqual(log.status, '503: Unavailable (retry 1 of 5)<br />200: OK')
+
+    @responses.activate
+    def test_client_error_not_retried(self):
+        responses.add(responses.POST, self.target_url, status=400, body='Bad Request')
+        log = MessageFactory(status='')
+        send_slack_message(self.target_url, ['#room'], 'my message', logs=[log])
+        self.assertEqual(len(responses.calls), 1)
+        log.refresh_from_db()
+        self.assertEqual(log.status, '400: Bad Request')
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=False, SLACK_MESSAGE_WINDOW=60)
+@patch.object(send_slack_task, 'apply_async')
+@patch.object(send_slack_queue, 'apply_async')
+class TestSlackQueue(TestCase):
+    target_url = 'https://my-slack-backend.com/incoming/my-very-secret-key'
+
+    def setUp(self):
+        patcher = patch('hypha.apply.activity.tasks.get_redis_client', return_value=FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_messages_to_same_rooms_coalesced(self, queue_mock, send_mock):
+        logs = [MessageFactory(), MessageFactory()]
+        send_slack_message(self.target_url, ['#room'], 'first', logs=logs[:1])
+        send_slack_message(self.target_url, ['#room'], 'second', logs=logs[1:])
+        queue_mock.assert_called_once()
+        send_mock.assert_not_called()
+
+        send_slack_queue(**queue_mock.call_args[1]['kwargs'])
+        send_mock.assert_called_once_with(kwargs={
+            'destination': self.target_url,
+            'rooms': ['#room'],
+            'messages': ['first', 'second'],
+            'message_pks': [log.pk for log in logs],
+        })
+
+    def test_messages_to_different_rooms_not_coalesced(self, queue_mock, send_mock):
+        send_slack_message(self.target_url, ['#room'], 'first')
+        send_slack_message(self.target_url, ['#other'], 'second')
+        self.assertEqual(queue_mock.call_count, 2)
+
+    def test_queue_only_sent_once(self, queue_mock, send_mock):
+        send_slack_message(self.target_url, ['#room'], 'first')
+        kwargs = queue_mock.call_args[1]['kwargs']
+        send_slack_queue(**kwargs)
+        send_slack_queue(**kwargs)
+        send_mock.assert_called_once()
+
+    def test_message_after_queue_sent_starts_new_queue(self, queue_mock, send_mock):
+        send_slack_message(self.target_url, ['#room'], 'first')
+        send_slack_queue(**queue_mock.call_args[1]['kwargs'])
+        send_slack_message(self.target_url, ['#room'], 'late')
+        self.assertEqual(queue_mock.call_count, 2)
+        send_slack_queue(**queue_mock.call_args[1]['kwargs'])
+        self.assertEqual(send_mock.call_args[1]['kwargs']['messages'], ['late'])
+
+    def test_sent_straight_away_without_redis(self, queue_mock, send_mock):
+        with patch('hypha.apply.activity.tasks.get_redis_client', return_value=None):
+            send_slack_message(self.target_url, ['#room'], 'first')
+        queue_mock.assert_not_called()
+        send_mock.assert_called_once()
@@ -33,20 +33,21 @@ class SubmissionsFilter(filters.FilterSet):
     )
     screening_statuses = filters.ModelMultipleChoiceFilter(
         field_name='screening_statuses',
-        queryset=get_screening_statuses(),
+        queryset=get_screening_statuses,
     )
     reviewers = filters.ModelMultipleChoiceFilter(
         field_name='reviewers',
-        queryset=get_reviewers(),
+        queryset=get_reviewers,
     )
     lead = filters.ModelMultipleChoiceFilter(
         field_name='lead',
-        queryset=get_round_leads(),
+        queryset=get_round_leads,
     )
+    query = filters.CharFilter(method='filter_search', label='Search')
 
     class Meta:
         model = ApplicationSubmission
-        fields = ('status', 'round', 'active', 'submit_date', 'fund', 'screening_statuses', 'reviewers', 'lead')
+        fields = ('status', 'round', 'active', 'submit_date', 'fund', 'screening_statuses', 'reviewers', 'lead', 'query')
 
     def filter_active(self, qs, name, value):
         if value is None:
@@ -57,6 +58,9 @@ class SubmissionsFilter(filters.FilterSet):
         else:
             return qs.inactive()
 
+    def filter_search(self, qs, name, value):
+        return qs.search(value)
+
 
 class NewerThanFilter(filters.ModelChoiceFilter):
     def filter(self, qs, value):
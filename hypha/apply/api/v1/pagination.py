@@ -1,6 +1,107 @@
+from collections import OrderedDict
+
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from hypha.apply.utils.pagination import (
+    InvalidCursor,
+    approximate_count,
+    paginate_keyset,
+)
 
 
 class StandardResultsSetPagination(pagination.PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 1000
+
+
+class KeysetResultsSetPagination(StandardResultsSetPagination):
+    """Page numbers by default, passing a cursor switches to keyset pagination
+
+    Keyset pages are fetched by seeking to the cursor on the ordering so deep
+    pages are as fast as the first and no COUNT is needed. Start with an empty
+    cursor (?cursor=) and follow the next and previous links.
+    """
+    cursor_query_param = 'cursor'
+    cursor_template = 'rest_framework/pagination/previous_and_next.html'
+    ordering = ('-id',)
+    # Include the planner's estimate of the total when the results are unfiltered
+    include_approximate_count = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            result = paginate_keyset(
+                queryset,
+                self.ordering,
+                page_size,
+                request.query_params[self.cursor_query_param],
+            )
+        except InvalidCursor as e:
+            raise NotFound(str(e))
+
+        self.next_cursor = result.next_cursor
+        self.previous_cursor = result.previous_cursor
+        self.template = self.cursor_template
+        self.display_page_controls = bool(self.next_cursor or self.previous_cursor)
+        self.count = None
+        if self.include_approximate_count and not self.is_filtered(request):
+            self.count = approximate_count(queryset.model)
+        return result.object_list
+
+    def is_filtered(self, request):
+        pagination_params = {self.cursor_query_param, self.page_size_query_param, 'format'}
+        return any(param not in pagination_params for param in request.query_params)
+
+    def get_cursor_link(self, cursor):
+        if not cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        return self.get_cursor_link(self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        return self.get_cursor_link(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+        if self.count is not None:
+            response['approximate_count'] = self.count
+            response.move_to_end('approximate_count', last=False)
+        return Response(response)
+
+    def get_html_context(self):
+        if not self.keyset:
+            return super().get_html_context()
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link(),
+        }
+
+
+class SubmissionsPagination(KeysetResultsSetPagination):
+    ordering = ('-submit_time', '-id')
+    include_approximate_count = True
+
+
+class CommentsPagination(KeysetResultsSetPagination):
+    ordering = ('-timestamp', '-id')
@@ -84,12 +84,23 @@ class ReviewSerializer(serializers.ModelSerializer):
 class ReviewSummarySerializer(serializers.Serializer):
     reviews = ReviewSerializer(many=True, read_only=True)
     count = serializers.ReadOnlyField(source='reviews.count')
-    score = serializers.ReadOnlyField(source='reviews.score')
+    score = serializers.SerializerMethodField()
     recommendation = serializers.SerializerMethodField()
     assigned = serializers.SerializerMethodField()
 
+    def get_score(self, obj):
+        # Use the annotation from with_review_summary when there is one
+        if hasattr(obj, 'review_score'):
+            return obj.review_score
+        return obj.reviews.score()
+
     def get_recommendation(self, obj):
-        recommendation = obj.reviews.recommendation()
+        if hasattr(obj, 'review_recommendation'):
+            recommendation = obj.review_recommendation
+            if recommendation is None:
+                recommendation = -1
+        else:
+            recommendation = obj.reviews.recommendation()
         return {
             'value': recommendation,
             'display': dict(RECOMMENDATION_CHOICES).get(recommendation),
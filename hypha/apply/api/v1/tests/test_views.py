@@ -1,9 +1,12 @@
+from django.db import connection
 from django.test import TestCase, override_settings
 from django.urls import reverse_lazy
 
 from hypha.apply.activity.models import ALL, APPLICANT, Activity
 from hypha.apply.activity.tests.factories import CommentFactory
-from hypha.apply.users.tests.factories import UserFactory
+from hypha.apply.funds.models import ApplicationSubmission
+from hypha.apply.funds.tests.factories import ApplicationSubmissionFactory
+from hypha.apply.users.tests.factories import StaffFactory, UserFactory
 
 
 @override_settings(ROOT_URLCONF='hypha.apply.urls')
@@ -90,3 +93,66 @@ class TestCommentEdit(TestCase):
         self.assertEqual(response_one.status_code, 200, response_one.json())
         self.assertEqual(response_two.status_code, 404, response_two.json())
         self.assertEqual(Activity.objects.count(), 2)
+
+
+@override_settings(ROOT_URLCONF='hypha.apply.urls')
+class TestSubmissionKeysetPagination(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = StaffFactory()
+        cls.submissions = ApplicationSubmissionFactory.create_batch(5)
+        cls.ordered_ids = [
+            submission.id
+            for submission in sorted(cls.submissions, key=lambda s: (s.submit_time, s.id), reverse=True)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def get(self, url=None, **params):
+        response = self.client.get(url or reverse_lazy('api:v1:submissions-list'), params, secure=True)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def ids(self, data):
+        return [result['id'] for result in data['results']]
+
+    def test_page_numbers_by_default(self):
+        data = self.get(page_size=2)
+        self.assertEqual(data['count'], 5)
+
+    def test_follow_cursors(self):
+        first = self.get(cursor='', page_size=2)
+        self.assertNotIn('count', first)
+        self.assertIsNone(first['previous'])
+
+        second = self.get(first['next'])
+        third = self.get(second['next'])
+        self.assertIsNone(third['next'])
+        self.assertEqual(self.ids(first) + self.ids(second) + self.ids(third), self.ordered_ids)
+
+        self.assertEqual(self.ids(self.get(third['previous'])), self.ids(second))
+        self.assertEqual(self.ids(self.get(second['previous'])), self.ids(first))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse_lazy('api:v1:submissions-list'), {'cursor': 'nonsense'}, secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_approximate_count_only_without_filters(self):
+        with connection.cursor() as cursor:
+            # The estimate is only available once the table has been analysed
+            cursor.execute(f'ANALYZE {ApplicationSubmission._meta.db_table}')
+        self.assertEqual(self.get(cursor='')['approximate_count'], 5)
+        self.assertNotIn('approximate_count', self.get(cursor='', status='in_discussion'))
+
+
+@override_settings(ROOT_URLCONF='hypha.apply.urls')
+class TestSubmissionFilters(TestCase):
+    def test_options_count_submissions(self):
+        submission = ApplicationSubmissionFactory()
+        ApplicationSubmissionFactory(round=submission.round, lead=submission.lead)
+        self.client.force_login(StaffFactory())
+        response = self.client.get(reverse_lazy('api:v1:submissions-filter'), secure=True)
+        options = {item['filterKey']: item['options'] for item in response.json()}
+        self.assertEqual(options['round'], [{'key': submission.round_id, 'label': submission.round.title, 'count': 2}])
+        self.assertIn({'key': submission.lead_id, 'label': submission.lead.full_name, 'count': 2}, options['lead'])
@@ -6,7 +6,8 @@ from django.db.models import Q
 from tinymce.widgets import TinyMCE
 from wagtail.core.models import Page
 
-from hypha.apply.funds.models import ApplicationSubmission, Round, ScreeningStatus
+from hypha.apply.funds.models import Round, ScreeningStatus
+from hypha.apply.funds.models.stats import submission_facets
 from hypha.apply.review.fields import ScoredAnswerField, ScoredAnswerWidget
 from hypha.apply.stream_forms.forms import BlockFieldWrapper
 from hypha.apply.users.groups import STAFF_GROUP_NAME
@@ -88,24 +89,25 @@ def get_field_widget(form_field):
     return widget
 
 
-def get_round_leads():
-    return User.objects.filter(submission_lead__isnull=False).distinct()
+def get_round_leads(request=None):
+    return User.objects.filter(id__in=list(submission_facets.get()['lead']))
 
 
-def get_reviewers():
+def get_reviewers(request=None):
     """ All assigned reviewers, staff or admin """
-    return User.objects.filter(Q(submissions_reviewer__isnull=False) | Q(groups__name=STAFF_GROUP_NAME) | Q(is_superuser=True)).distinct()
+    return User.objects.filter(
+        Q(id__in=list(submission_facets.get()['reviewers'])) | Q(groups__name=STAFF_GROUP_NAME) | Q(is_superuser=True)
+    ).distinct()
 
 
-def get_screening_statuses():
-    return ScreeningStatus.objects.filter(
-        id__in=ApplicationSubmission.objects.all().values('screening_statuses__id').distinct('screening_statuses__id'))
+def get_screening_statuses(request=None):
+    return ScreeningStatus.objects.filter(id__in=list(submission_facets.get()['screening_statuses']))
 
 
-def get_used_rounds():
-    return Round.objects.filter(submissions__isnull=False).distinct()
+def get_used_rounds(request=None):
+    return Round.objects.filter(id__in=list(submission_facets.get()['round']))
 
 
-def get_used_funds():
+def get_used_funds(request=None):
     # Use page to pick up on both Labs and Funds
-    return Page.objects.filter(applicationsubmission__isnull=False).distinct()
+    return Page.objects.filter(id__in=list(submission_facets.get()['fund']))
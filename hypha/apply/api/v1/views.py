@@ -14,12 +14,17 @@ from hypha.apply.activity.messaging import MESSAGES, messenger
 from hypha.apply.activity.models import COMMENT, Activity
 from hypha.apply.determinations.views import DeterminationCreateOrUpdateView
 from hypha.apply.funds.models import ApplicationSubmission, RoundsAndLabs
+from hypha.apply.funds.models.stats import submission_facets
 from hypha.apply.funds.workflow import STATUSES
 from hypha.apply.review.models import Review
 
 from .filters import CommentFilter, SubmissionsFilter
 from .mixin import SubmissionNestedMixin
-from .pagination import StandardResultsSetPagination
+from .pagination import (
+    CommentsPagination,
+    StandardResultsSetPagination,
+    SubmissionsPagination,
+)
 from .permissions import IsApplyStaffUser, IsAuthor
 from .serializers import (
     CommentCreateSerializer,
@@ -47,7 +52,7 @@ class SubmissionViewSet(viewsets.ReadOnlyModelViewSet):
     )
     filter_backends = (filters.DjangoFilterBackend,)
     filter_class = SubmissionsFilter
-    pagination_class = StandardResultsSetPagination
+    pagination_class = SubmissionsPagination
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -57,7 +62,7 @@ class SubmissionViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         if self.action == 'list':
             return ApplicationSubmission.objects.current().with_latest_update()
-        return ApplicationSubmission.objects.all().prefetch_related(
+        return ApplicationSubmission.objects.with_review_summary().prefetch_related(
             Prefetch('reviews', Review.objects.submitted()),
         )
 
@@ -79,13 +84,15 @@ class SubmissionFilters(APIView):
         }
 
     def get(self, request, format=None):
+        # The options come with how many submissions use them
+        facets = submission_facets.get()
         filter_options = [
             self.format("fund", "Funds", [
-                {"key": fund.get("id"), "label": fund.get("title")}
+                {"key": fund.get("id"), "label": fund.get("title"), "count": facets['fund'].get(fund.get("id"), 0)}
                 for fund in get_used_funds().values()
             ]),
             self.format("round", "Rounds", [
-                {"key": round.get("id"), "label": round.get("title")}
+                {"key": round.get("id"), "label": round.get("title"), "count": facets['round'].get(round.get("id"), 0)}
                 for round in get_used_rounds().values()
             ]),
             self.format("status", "Statuses", [
@@ -93,15 +100,27 @@ class SubmissionFilters(APIView):
                 for label in dict(STATUSES)
             ]),
             self.format("screening_statuses", "Screenings", self.filter_unique_options([
-                {"key": screening.get("id"), "label": screening.get("title")}
+                {
+                    "key": screening.get("id"),
+                    "label": screening.get("title"),
+                    "count": facets['screening_statuses'].get(screening.get("id"), 0),
+                }
                 for screening in get_screening_statuses().values()
             ])),
             self.format("lead", "Leads", [
-                {"key": lead.get('id'), "label": lead.get('full_name') or lead.get('email')}
+                {
+                    "key": lead.get('id'),
+                    "label": lead.get('full_name') or lead.get('email'),
+                    "count": facets['lead'].get(lead.get('id'), 0),
+                }
                 for lead in get_round_leads().values()
             ]),
             self.format("reviewers", "Reviewers", self.filter_unique_options([
-                {"key": reviewer.get('id'), "label": reviewer.get('full_name') or reviewer.get('email')}
+                {
+                    "key": reviewer.get('id'),
+                    "label": reviewer.get('full_name') or reviewer.get('email'),
+                    "count": facets['reviewers'].get(reviewer.get('id'), 0),
+                }
                 for reviewer in get_reviewers().values()
             ])),
         ]
@@ -208,7 +227,7 @@ class SubmissionCommentViewSet(
     )
     filter_backends = (filters.DjangoFilterBackend,)
     filter_class = CommentFilter
-    pagination_class = StandardResultsSetPagination
+    pagination_class = CommentsPagination
 
     def get_queryset(self):
         return super().get_queryset().filter(
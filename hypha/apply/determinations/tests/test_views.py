@@ -1,4 +1,5 @@
 import urllib
+from unittest.mock import patch
 
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
@@ -9,6 +10,7 @@ from hypha.apply.activity.models import Activity
 from hypha.apply.determinations.options import ACCEPTED, NEEDS_MORE_INFO, REJECTED
 from hypha.apply.determinations.views import BatchDeterminationCreateView
 from hypha.apply.funds.models import ApplicationSubmission
+from hypha.apply.funds.models.submissions import ApplicationSubmissionQueryset
 from hypha.apply.funds.tests.factories import ApplicationSubmissionFactory
 from hypha.apply.users.tests.factories import StaffFactory, UserFactory
 from hypha.apply.utils.testing import BaseViewTestCase
@@ -435,6 +437,26 @@ class BatchDeterminationTestCase(BaseViewTestCase):
         # plus 1 extra for unable to determine
         self.assertEqual(len(response.context['messages']), 6)
 
+    def test_message_created_if_transition_fails(self):
+        submissions = ApplicationSubmissionFactory.create_batch(2)
+
+        url = self.url(None) + '?submissions=' + ','.join([str(submission.id) for submission in submissions]) + '&action=rejected'
+        data = {
+            'submissions': [submission.id for submission in submissions],
+            'data': 'some data',
+            'outcome': REJECTED,
+            'message': 'Sorry',
+            'author': self.user.id,
+        }
+
+        with patch.object(ApplicationSubmissionQueryset, 'perform_transitions', return_value=({}, submissions[:1])):
+            response = self.client.post(url, data, secure=True, follow=True)
+
+        self.assertIn(
+            f'Failed to update: {submissions[0]}',
+            [str(message) for message in response.context['messages']],
+        )
+
 
 class UserDeterminationFormTestCase(BaseViewTestCase):
     user_factory = UserFactory
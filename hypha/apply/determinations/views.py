@@ -16,8 +16,8 @@ from django.views.generic import CreateView, DetailView, UpdateView
 from wagtail.core.models import Site
 
 from hypha.apply.activity.messaging import MESSAGES, messenger
-from hypha.apply.activity.models import Activity
-from hypha.apply.funds.models import ApplicationSubmission
+from hypha.apply.activity.models import COMMENT, Activity
+from hypha.apply.funds.models import ApplicationSubmission, SubmissionStats
 from hypha.apply.funds.workflow import DETERMINATION_OUTCOMES
 from hypha.apply.projects.models import Project
 from hypha.apply.stream_forms.models import BaseStreamForm
@@ -206,6 +206,7 @@ class BatchDeterminationCreateView(BaseStreamForm, CreateView):
             related=determinations,
         )
 
+        comments = []
         for submission in submissions:
             try:
                 determination = determinations[submission.id]
@@ -219,19 +220,34 @@ class BatchDeterminationCreateView(BaseStreamForm, CreateView):
                     determination.form_fields = self.get_defined_fields()
                     determination.message = form.cleaned_data[determination.message_field.id]
                     determination.save()
-                transition = transition_from_outcome(form.cleaned_data.get('outcome'), submission)
 
                 if determination.outcome == NEEDS_MORE_INFO:
                     # We keep a record of the message sent to the user in the comment
-                    Activity.comments.create(
+                    comments.append(Activity(
+                        type=COMMENT,
                         message=determination.stripped_message,
                         timestamp=timezone.now(),
                         user=self.request.user,
                         source=submission,
                         related_object=determination,
-                    )
+                    ))
+
+        Activity.objects.bulk_create(comments)
+        # bulk_create doesn't send the signals which keep the stats up to date
+        SubmissionStats.objects.refresh(*{comment.source_object_id for comment in comments})
 
-                submission.perform_transition(transition, self.request.user, request=self.request, notify=False)
+        outcome = form.cleaned_data.get('outcome')
+        phase_changes, failed = submissions.filter(id__in=list(determinations)).perform_transitions(
+            [action for action, action_outcome in TRANSITION_DETERMINATION.items() if action_outcome == outcome],
+            self.request.user,
+            request=self.request,
+        )
+        if failed:
+            messages.warning(
+                self.request,
+                _('Failed to update: ') +
+                ', '.join(str(submission) for submission in failed)
+            )
         return response
 
     @classmethod
@@ -1,10 +1,19 @@
 import re
-from difflib import SequenceMatcher
+from bisect import bisect_left
+from collections import Counter
 
 from bleach.sanitizer import Cleaner
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
+# Tags and entities are kept whole so a change never splits them, every other
+# character falls into a word, a run of whitespace or a single punctuation mark
+TOKEN_RE = re.compile(r'<[^>]*>|&#?\w+;|\w+|\s+|[^\w\s]')
+
+# Regions with no unique tokens in common fall back to Myers' algorithm, which
+# gives up and marks the whole region as changed after this many edits
+MAX_EDIT_DISTANCE = 500
+
 
 def wrap_with_span(text, class_name):
     return format_html('<span class="diff diff__{}">{}</span>', class_name, mark_safe(text))
@@ -18,30 +27,191 @@ def wrap_added(text):
     return wrap_with_span(text, 'added')
 
 
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def unique_anchors(a, a0, a1, b, b0, b1):
+    # Pairs of tokens which appear exactly once in both regions, reduced to the
+    # longest sequence that is in order in both (patience sorting)
+    counts_a = Counter(a[a0:a1])
+    counts_b = Counter(b[b0:b1])
+    positions_b = {
+        b[j]: j for j in range(b0, b1)
+        if counts_b[b[j]] == 1 and counts_a[b[j]] == 1
+    }
+    pairs = [(i, positions_b[a[i]]) for i in range(a0, a1) if a[i] in positions_b]
+
+    piles = []
+    pile_tops = []
+    previous = []
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect_left(piles, j)
+        if pile == len(piles):
+            piles.append(j)
+            pile_tops.append(index)
+        else:
+            piles[pile] = j
+            pile_tops[pile] = index
+        previous.append(pile_tops[pile - 1] if pile else None)
+
+    anchors = []
+    index = pile_tops[-1] if pile_tops else None
+    while index is not None:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def myers_matches(a, a0, a1, b, b0, b1):
+    # Matching token positions on the shortest edit script between the regions,
+    # empty if there are more than MAX_EDIT_DISTANCE edits
+    n, m = a1 - a0, b1 - b0
+    v = {1: 0}
+    trace = []
+    for d in range(min(n + m, MAX_EDIT_DISTANCE) + 1):
+        trace.append(v.copy())
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x, y = x + 1, y + 1
+            v[k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            continue
+        break
+    else:
+        return []
+
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1] < v[k + 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = v[previous_k]
+        previous_y = previous_x - previous_k
+        while x > previous_x and y > previous_y:
+            x, y = x - 1, y - 1
+            matches.append((a0 + x, b0 + y))
+        x, y = previous_x, previous_y
+    return matches
+
+
+def matching_tokens(a, b):
+    """Find the positions of the tokens in common between a and b
+
+    Uses patience diff: the common prefix and suffix are trimmed then the
+    tokens which appear once in both are used as anchors to split the rest
+    into smaller regions. This is close to linear on prose, where most words
+    are either unique or next to one that is.
+    """
+    matches = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        a0, a1, b0, b1 = regions.pop()
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            matches.append((a0, b0))
+            a0, b0 = a0 + 1, b0 + 1
+        while a0 < a1 and b0 < b1 and a[a1 - 1] == b[b1 - 1]:
+            a1, b1 = a1 - 1, b1 - 1
+            matches.append((a1, b1))
+        if a0 == a1 or b0 == b1:
+            continue
+
+        anchors = unique_anchors(a, a0, a1, b, b0, b1)
+        if not anchors:
+            matches.extend(myers_matches(a, a0, a1, b, b0, b1))
+            continue
+
+        for i, j in anchors:
+            regions.append((a0, i, b0, j))
+            matches.append((i, j))
+            a0, b0 = i + 1, j + 1
+        regions.append((a0, a1, b0, b1))
+    return sorted(matches)
+
+
+def get_opcodes(a, b):
+    # The same opcodes as difflib.SequenceMatcher.get_opcodes
+    opcodes = []
+    i = j = 0
+    for match_i, match_j in matching_tokens(a, b) + [(len(a), len(b))]:
+        if i < match_i and j < match_j:
+            opcodes.append(['replace', i, match_i, j, match_j])
+        elif i < match_i:
+            opcodes.append(['delete', i, match_i, j, match_j])
+        elif j < match_j:
+            opcodes.append(['insert', i, match_i, j, match_j])
+
+        if match_i == len(a):
+            break
+        if opcodes and opcodes[-1][0] == 'equal':
+            opcodes[-1][2] += 1
+            opcodes[-1][4] += 1
+        else:
+            opcodes.append(['equal', match_i, match_i + 1, match_j, match_j + 1])
+        i, j = match_i + 1, match_j + 1
+    return merge_whitespace(opcodes, a)
+
+
+def merge_whitespace(opcodes, a):
+    # Whitespace left unchanged between two changes is folded into them, so
+    # replacing a few words is shown as one change rather than word by word
+    merged = []
+    for index, opcode in enumerate(opcodes):
+        tag, a0, a1, b0, b1 = opcode
+        is_gap = tag == 'equal' and 0 < index < len(opcodes) - 1 and not ''.join(a[a0:a1]).strip()
+        if is_gap or (tag != 'equal' and merged and merged[-1][0] != 'equal'):
+            previous = merged[-1]
+            previous[2], previous[4] = a1, b1
+            if previous[0] != tag:
+                previous[0] = 'replace'
+        else:
+            merged.append(list(opcode))
+    return [tuple(opcode) for opcode in merged]
+
+
+def clean_whitespace(text):
+    # Some versions of bleach leave a newline where a block tag was stripped,
+    # the list items are put on their own line when displayed anyway
+    return re.sub(r'\s+(?=●)', '', text).strip()
+
+
 def compare(answer_a, answer_b, should_bleach=True):
     if should_bleach:
         cleaner = Cleaner(tags=['h4'], attributes={}, strip=True)
         answer_a = re.sub('(<li[^>]*>)', r'\1● ', answer_a)
         answer_b = re.sub('(<li[^>]*>)', r'\1● ', answer_b)
-        answer_a = cleaner.clean(answer_a)
-        answer_b = cleaner.clean(answer_b)
+        answer_a = clean_whitespace(cleaner.clean(answer_a))
+        answer_b = clean_whitespace(cleaner.clean(answer_b))
 
-    diff = SequenceMatcher(None, answer_a, answer_b)
+    a = tokenize(answer_a)
+    b = tokenize(answer_b)
     from_diff = []
     to_diff = []
-    for opcode, a0, a1, b0, b1 in diff.get_opcodes():
+    for opcode, a0, a1, b0, b1 in get_opcodes(a, b):
+        from_text = ''.join(a[a0:a1])
+        to_text = ''.join(b[b0:b1])
         if opcode == 'equal':
-            from_diff.append(mark_safe(diff.a[a0:a1]))
-            to_diff.append(mark_safe(diff.b[b0:b1]))
+            from_diff.append(mark_safe(from_text))
+            to_diff.append(mark_safe(to_text))
         elif opcode == 'insert':
-            from_diff.append(mark_safe(diff.a[a0:a1]))
-            to_diff.append(wrap_with_span(diff.b[b0:b1], 'added'))
+            to_diff.append(wrap_with_span(to_text, 'added'))
         elif opcode == 'delete':
-            from_diff.append(wrap_with_span(diff.a[a0:a1], 'deleted'))
-            to_diff.append(mark_safe(diff.b[b0:b1]))
+            from_diff.append(wrap_with_span(from_text, 'deleted'))
         elif opcode == 'replace':
-            from_diff.append(wrap_with_span(diff.a[a0:a1], 'deleted'))
-            to_diff.append(wrap_with_span(diff.b[b0:b1], 'added'))
+            from_diff.append(wrap_with_span(from_text, 'deleted'))
+            to_diff.append(wrap_with_span(to_text, 'added'))
 
     from_display = ''.join(from_diff)
     to_display = ''.join(to_diff)
@@ -0,0 +1,173 @@
+import csv
+from collections import OrderedDict, namedtuple
+
+import xlsxwriter
+from django.db.models import Q
+
+from hypha.apply.categories.blocks import CategoryQuestionBlock
+from hypha.apply.categories.models import Option
+from hypha.apply.stream_forms.blocks import MultiInputCharFieldBlock
+
+from .models import ApplicationSubmission
+
+NO_RESPONSE = 'No Response'
+
+Column = namedtuple('Column', ['header', 'value'])
+
+
+def question_column(label):
+    # Maps the label of a question to the column the answer is exported in
+    if label == 'Region':
+        return 'region'
+    elif label == 'Country':
+        return 'country'
+    elif label == 'Focus':
+        return 'focus'
+    elif 'or received funding' in label:
+        return 'reapplied'
+    return None
+
+
+class SubmissionExporter:
+    """Streams the submissions out a chunk at a time for reporting
+
+    Answers are read straight from the form_data using the shared
+    FormFieldsIndex rather than rendering every question of every submission.
+    """
+    columns = OrderedDict([
+        ('id', Column('Submission ID', lambda row: row.submission.id)),
+        ('title', Column('Submission title', lambda row: row.submission.title)),
+        ('author', Column('Submission author', lambda row: row.submission.full_name)),
+        ('email', Column('Submission e-mail', lambda row: row.submission.email)),
+        ('value', Column('Submission value', lambda row: row.submission.value or 0)),
+        ('duration', Column('Submission duration', lambda row: row.submission.duration)),
+        ('reapplied', Column('Submission reapplied', lambda row: row.answers.get('reapplied', ''))),
+        ('stage', Column('Submission stage', lambda row: str(row.submission.stage))),
+        ('phase', Column('Submission phase', lambda row: str(row.submission.phase))),
+        ('screening', Column('Submission screening', lambda row: row.submission.joined_screening_statuses)),
+        ('date', Column('Submission date', lambda row: row.submission.submit_time.strftime('%Y-%m-%d'))),
+        ('region', Column('Submission region', lambda row: row.answers.get('region', ''))),
+        ('country', Column('Submission country', lambda row: row.answers.get('country', ''))),
+        ('focus', Column('Submission focus', lambda row: row.answers.get('focus', ''))),
+        ('fund', Column('Round/Lab/Fellowship', lambda row: str(row.submission.round or row.submission.page))),
+    ])
+
+    Row = namedtuple('Row', ['submission', 'answers'])
+
+    def __init__(self, columns=None, since=None, chunk_size=500):
+        columns = columns or list(self.columns)
+        unknown = [column for column in columns if column not in self.columns]
+        if unknown:
+            raise ValueError(f'Unknown columns: {", ".join(unknown)}')
+        self.selected = [self.columns[column] for column in columns]
+        self.since = since
+        self.chunk_size = chunk_size
+        # Question fields to export for each FormFieldsIndex, the index is
+        # shared by every submission which used the same form
+        self._question_fields = {}
+        self._options = None
+
+    @property
+    def headers(self):
+        return [column.header for column in self.selected]
+
+    def get_queryset(self):
+        submissions = ApplicationSubmission.objects.select_related(
+            'round', 'page'
+        ).prefetch_related('screening_statuses')
+        if self.since:
+            submissions = submissions.filter(
+                Q(submit_time__gte=self.since) | Q(stats__last_update__gte=self.since)
+            )
+        return submissions
+
+    def submissions(self):
+        # Keyset chunking, unlike iterator() this keeps the prefetching
+        submissions = self.get_queryset().order_by('id')
+        last_id = 0
+        while True:
+            chunk = list(submissions.filter(id__gt=last_id)[:self.chunk_size])
+            if not chunk:
+                return
+            yield from chunk
+            last_id = chunk[-1].id
+
+    def options(self):
+        if self._options is None:
+            self._options = {
+                option.id: (option.sort_order or 0, option.value)
+                for option in Option.objects.all()
+            }
+        return self._options
+
+    def question_fields(self, submission):
+        index = submission.form_fields_index
+        try:
+            return self._question_fields[index]
+        except KeyError:
+            pass
+
+        question_fields = []
+        for field_id in index.text_blocks:
+            field = index.fields[field_id]
+            label = field.value.get('field_label')
+            if not label and isinstance(field.block, CategoryQuestionBlock):
+                label = field.value['category'].name
+            column = question_column(label or '')
+            if column:
+                question_fields.append((column, field))
+        self._question_fields[index] = question_fields
+        return question_fields
+
+    def answer(self, submission, field):
+        if isinstance(field.block, MultiInputCharFieldBlock):
+            answers = [
+                submission.data(f'{field.id}_{i}')
+                for i in range(field.value.get('number_of_inputs'))
+            ]
+            return ', '.join(filter(None, answers))
+
+        data = submission.data(field.id)
+        if not data:
+            return None
+        if isinstance(field.block, CategoryQuestionBlock):
+            if not isinstance(data, list):
+                data = [data]
+            options = self.options()
+            selected = sorted(options[int(option)] for option in data if int(option) in options)
+            return [value for _, value in selected]
+        return field.block.prepare_data(field.value, data, serialize=True)
+
+    def answers(self, submission):
+        answers = {}
+        for column, field in self.question_fields(submission):
+            answer = self.answer(submission, field) or NO_RESPONSE
+            if not isinstance(answer, str):
+                answer = ','.join(answer)
+            if answer and answer != 'N':
+                answers[column] = answer
+        return answers
+
+    def rows(self):
+        for submission in self.submissions():
+            row = self.Row(submission, self.answers(submission))
+            yield [column.value(row) for column in self.selected]
+
+    def write_csv(self, output):
+        writer = csv.writer(output, quoting=csv.QUOTE_ALL)
+        writer.writerow(self.headers)
+        count = 0
+        for count, row in enumerate(self.rows(), 1):
+            writer.writerow(row)
+        return count
+
+    def write_xlsx(self, output):
+        # constant_memory flushes each row to disk once it is written
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet('Submissions')
+        worksheet.write_row(0, 0, self.headers)
+        count = 0
+        for count, row in enumerate(self.rows(), 1):
+            worksheet.write_row(count, 0, row)
+        workbook.close()
+        return count
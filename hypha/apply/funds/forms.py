@@ -3,6 +3,7 @@ from itertools import groupby
 from operator import methodcaller
 
 from django import forms
+from django.db import transaction
 from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
@@ -15,9 +16,11 @@ from .models import (
     ApplicationSubmission,
     AssignedReviewers,
     Reminder,
-    ReviewerRole,
     ScreeningStatus,
+    SubmissionStats,
 )
+from .models.reviewer_role import reviewer_role_cache
+from .models.stats import submission_facets
 from .utils import render_icon
 from .widgets import MetaTermSelect2Widget, Select2MultiCheckboxesWidget
 from .workflow import get_action_mapping
@@ -261,39 +264,41 @@ class UpdateReviewersForm(ApplicationSubmissionModelForm):
         return cleaned_data
 
     def save(self, *args, **kwargs):
-        instance = super().save(*args, **kwargs)
         """
         1. Update role reviewers
         2. Update non-role reviewers
             2a. Remove those not on form
             2b. Add in any new non-role reviewers selected
-        """
 
-        # 1. Update role reviewers
-        assigned_roles = {
-            role: self.cleaned_data[field]
-            for field, role in self.role_fields.items()
-        }
-        for role, reviewer in assigned_roles.items():
-            if reviewer:
-                AssignedReviewers.objects.update_role(role, reviewer, instance)
-
-        # 2. Update non-role reviewers
-        # 2a. Remove those not on form
-        if self.can_alter_external_reviewers(self.instance, self.user):
-            reviewers = self.cleaned_data.get('reviewer_reviewers')
-            assigned_reviewers = instance.assigned.without_roles()
-            assigned_reviewers.never_tried_to_review().exclude(
-                reviewer__in=reviewers
-            ).delete()
-
-            remaining_reviewers = assigned_reviewers.values_list('reviewer_id', flat=True)
-
-            # 2b. Add in any new non-role reviewers selected
-            AssignedReviewers.objects.bulk_create_reviewers(
-                [reviewer for reviewer in reviewers if reviewer.id not in remaining_reviewers],
-                instance,
-            )
+        The stats of the submission are refreshed and the filter options
+        invalidated once, after all the changes.
+        """
+        with transaction.atomic(), SubmissionStats.objects.deferred(), submission_facets.deferred():
+            instance = super().save(*args, **kwargs)
+
+            # 1. Update role reviewers
+            assigned_roles = {
+                role: self.cleaned_data[field]
+                for field, role in self.role_fields.items()
+            }
+            AssignedReviewers.objects.update_roles(assigned_roles, [instance])
+
+            # 2. Update non-role reviewers
+            # 2a. Remove those not on form
+            if self.can_alter_external_reviewers(self.instance, self.user):
+                reviewers = self.cleaned_data.get('reviewer_reviewers')
+                assigned_reviewers = instance.assigned.without_roles()
+                assigned_reviewers.never_tried_to_review().exclude(
+                    reviewer__in=reviewers
+                ).delete()
+
+                remaining_reviewers = assigned_reviewers.values_list('reviewer_id', flat=True)
+
+                # 2b. Add in any new non-role reviewers selected
+                AssignedReviewers.objects.bulk_create_reviewers(
+                    [reviewer for reviewer in reviewers if reviewer.id not in remaining_reviewers],
+                    instance,
+                )
 
         return instance
 
@@ -337,9 +342,7 @@ class BatchUpdateReviewersForm(forms.Form):
             role: self.cleaned_data[field]
             for field, role in self.role_fields.items()
         }
-        for role, reviewer in assigned_roles.items():
-            if reviewer:
-                AssignedReviewers.objects.update_role(role, reviewer, *submissions)
+        AssignedReviewers.objects.update_roles(assigned_roles, submissions)
 
         return None
 
@@ -348,7 +351,7 @@ def make_role_reviewer_fields():
     role_fields = []
     staff_reviewers = User.objects.staff().only('full_name', 'pk')
 
-    for role in ReviewerRole.objects.all().order_by('order'):
+    for role in reviewer_role_cache.get():
         field_name = 'role_reviewer_' + slugify(str(role))
         field = forms.ModelChoiceField(
             queryset=staff_reviewers,
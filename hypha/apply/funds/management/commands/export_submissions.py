@@ -0,0 +1,70 @@
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from hypha.apply.funds.export import SubmissionExporter
+
+
+def since_datetime(value):
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            raise argparse.ArgumentTypeError(f'Not a valid date or datetime: {value}')
+        since = parse_datetime(f'{date.isoformat()}T00:00')
+    if is_naive(since):
+        since = make_aware(since)
+    return since
+
+
+class Command(BaseCommand):
+    help = "Export the submissions to a csv or xlsx file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'xlsx'],
+            default='csv',
+            help='Format of the export.',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write the export to, defaults to export_submissions.<format>.',
+        )
+        parser.add_argument(
+            '--columns',
+            help=f'Comma separated columns to export from: {", ".join(SubmissionExporter.columns)}.',
+        )
+        parser.add_argument(
+            '--since',
+            type=since_datetime,
+            help='Only export submissions submitted or updated since this date or datetime.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of submissions to load per query.',
+        )
+
+    def handle(self, *args, **options):
+        columns = options['columns'].split(',') if options['columns'] else None
+        try:
+            exporter = SubmissionExporter(
+                columns=columns,
+                since=options['since'],
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        output = options['output'] or f'export_submissions.{options["format"]}'
+        if options['format'] == 'xlsx':
+            count = exporter.write_xlsx(output)
+        else:
+            with open(output, 'w', newline='') as csvfile:
+                count = exporter.write_csv(csvfile)
+
+        self.stdout.write(self.style.SUCCESS(f'Exported {count} submissions to {output}'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from hypha.apply.funds.models import ReviewerStats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly review counts used by the reviewer leaderboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of reviewers to rebuild per query.',
+        )
+        parser.add_argument(
+            'reviewer_ids',
+            nargs='*',
+            type=int,
+            help='Only rebuild these reviewers.',
+        )
+
+    def handle(self, *args, **options):
+        reviewer_ids = options['reviewer_ids']
+        if reviewer_ids:
+            ReviewerStats.objects.refresh(*reviewer_ids)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(reviewer_ids)} reviewers'))
+            return
+
+        total = 0
+        for total in ReviewerStats.objects.rebuild(batch_size=options['batch_size']):
+            self.stdout.write(f'Rebuilt stats for {total} reviewers')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {total} reviewers'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from hypha.apply.funds.models import ApplicationSubmission
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full text search documents for the submissions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only rebuild the submissions which have no search document.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of submissions to rebuild per query.',
+        )
+
+    def handle(self, *args, **options):
+        submissions = ApplicationSubmission.objects.all()
+        if options['missing']:
+            submissions = submissions.filter(search_document__isnull=True)
+
+        total = 0
+        for total in submissions.rebuild_search(batch_size=options['batch_size']):
+            self.stdout.write(f'Rebuilt search for {total} submissions')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search for {total} submissions'))
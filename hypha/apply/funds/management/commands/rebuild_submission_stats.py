@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hypha.apply.funds.models import SubmissionStats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalised submission stats used by the submission tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare the stored stats to the live values instead of rebuilding them.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of submissions to rebuild per query.',
+        )
+        parser.add_argument(
+            'submission_ids',
+            nargs='*',
+            type=int,
+            help='Only process these submissions.',
+        )
+
+    def handle(self, *args, **options):
+        submission_ids = options['submission_ids'] or None
+
+        if options['check']:
+            differences = 0
+            for submission_id, field, stored, live in SubmissionStats.objects.inconsistencies(submission_ids):
+                differences += 1
+                self.stdout.write(f'Submission {submission_id}: {field} stored {stored!r}, live {live!r}')
+            if differences:
+                raise CommandError(f'Found {differences} inconsistencies in the submission stats')
+            self.stdout.write(self.style.SUCCESS('Submission stats are consistent'))
+            return
+
+        if submission_ids:
+            SubmissionStats.objects.refresh(*submission_ids)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(submission_ids)} submissions'))
+            return
+
+        total = 0
+        for total in SubmissionStats.objects.rebuild(batch_size=options['batch_size']):
+            self.stdout.write(f'Rebuilt stats for {total} submissions')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {total} submissions'))
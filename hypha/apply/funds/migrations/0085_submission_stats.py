@@ -0,0 +1,35 @@
+# Generated by Django 2.2.18 on 2026-10-18 01:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funds', '0084_add_all_except_dismissed_outcome_reviewersettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionStats',
+            fields=[
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='funds.ApplicationSubmission')),
+                ('last_update', models.DateTimeField(null=True)),
+                ('last_user_update', models.CharField(max_length=255, null=True)),
+                ('comment_count_applicant', models.IntegerField(default=0)),
+                ('comment_count_team', models.IntegerField(default=0)),
+                ('comment_count_reviewers', models.IntegerField(default=0)),
+                ('comment_count_partners', models.IntegerField(default=0)),
+                ('comment_count_all', models.IntegerField(default=0)),
+                ('opinion_disagree', models.IntegerField(null=True)),
+                ('review_staff_count', models.IntegerField(null=True)),
+                ('review_count', models.IntegerField(null=True)),
+                ('review_submitted_count', models.IntegerField(null=True)),
+                ('review_recommendation', models.IntegerField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'submission stats',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.18 on 2026-10-18 05:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('wagtailcore', '0045_assign_unlock_grouppagepermission'),
+        ('funds', '0086_submission_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewerStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('review_count', models.IntegerField(default=0)),
+                ('score_count', models.IntegerField(default=0)),
+                ('score_total', models.DecimalField(decimal_places=1, max_digits=12, null=True)),
+                ('fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+                ('reviewer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_stats', to=settings.AUTH_USER_MODEL)),
+                ('round', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+            ],
+            options={
+                'verbose_name_plural': 'reviewer stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reviewerstats',
+            index=models.Index(fields=['reviewer', 'month'], name='funds_revie_reviewe_bf585a_idx'),
+        ),
+    ]
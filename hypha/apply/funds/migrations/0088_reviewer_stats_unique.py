@@ -0,0 +1,34 @@
+# Generated by Django 2.2.18 on 2026-10-18 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funds', '0087_reviewer_stats'),
+    ]
+
+    operations = [
+        # Rows inserted twice by refreshes which ran at the same time hold the
+        # same values, keep one of each
+        migrations.RunSQL(
+            """
+            DELETE FROM funds_reviewerstats stats USING funds_reviewerstats other
+            WHERE stats.id < other.id
+                AND stats.reviewer_id = other.reviewer_id
+                AND stats.fund_id = other.fund_id
+                AND stats.round_id IS NOT DISTINCT FROM other.round_id
+                AND stats.month = other.month
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='reviewerstats',
+            constraint=models.UniqueConstraint(condition=models.Q(round__isnull=False), fields=('reviewer', 'fund', 'round', 'month'), name='unique_reviewer_stats_round'),
+        ),
+        migrations.AddConstraint(
+            model_name='reviewerstats',
+            constraint=models.UniqueConstraint(condition=models.Q(round__isnull=True), fields=('reviewer', 'fund', 'month'), name='unique_reviewer_stats_fund'),
+        ),
+    ]
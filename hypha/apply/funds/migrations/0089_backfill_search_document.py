@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funds', '0088_reviewer_stats_unique'),
+    ]
+
+    operations = [
+        # Built from the text already stored for the old search, so the existing
+        # submissions can be found straight away. Everything is weighted as an
+        # answer until rebuild_submission_search weights the title and applicant.
+        migrations.RunSQL(
+            """
+            UPDATE funds_applicationsubmission
+            SET search_document = setweight(to_tsvector(COALESCE(search_data, '')), 'D')
+            WHERE search_document IS NULL
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -5,9 +5,10 @@ from .forms import ApplicationForm
 from .reminders import Reminder
 from .reviewer_role import ReviewerRole, ReviewerSettings
 from .screening import ScreeningStatus
+from .stats import ReviewerStats, SubmissionStats
 from .submissions import ApplicationRevision, ApplicationSubmission, AssignedReviewers
 
-__all__ = ['ApplicationSubmission', 'AssignedReviewers', 'ApplicationRevision', 'ApplicationForm', 'ScreeningStatus', 'ReviewerRole', 'Reminder', 'ReviewerSettings']
+__all__ = ['ApplicationSubmission', 'AssignedReviewers', 'ApplicationRevision', 'ApplicationForm', 'ScreeningStatus', 'ReviewerRole', 'Reminder', 'ReviewerSettings', 'SubmissionStats', 'ReviewerStats']
 
 
 class FundType(ApplicationBase):
@@ -1,4 +1,13 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import get_urlconf, set_urlconf
 from django.utils.safestring import mark_safe
 from django_file_form.models import PlaceholderUploadedFile
 
@@ -23,6 +32,121 @@ class UnusedFieldException(Exception):
     pass
 
 
+class FormFieldsIndex:
+    """Lookups derived from a form_fields streamfield
+
+    Walking the streamfield is expensive so everything AccessFormData needs to
+    know about the structure of the form is calculated once and shared between
+    all the instances which use identical form_fields, see FormFieldsIndexCache.
+    """
+    def __init__(self, form_fields):
+        self.raw_fields = {
+            field.id: field
+            for field in form_fields
+        }
+        self.named_blocks = {
+            field.block.name: field.id
+            for field in form_fields
+            if isinstance(field.block, SingleIncludeMixin)
+        }
+        self.named_ids = {
+            field_id: field_name
+            for field_name, field_id in self.named_blocks.items()
+        }
+
+        self.fields = self.raw_fields.copy()
+        for field_name, field_id in self.named_blocks.items():
+            self.fields[field_name] = self.fields.pop(field_id)
+
+        self.question_field_ids = [
+            field_id
+            for field_id, field in self.fields.items()
+            if isinstance(field.block, FormFieldBlock)
+        ]
+        self.file_field_ids = [
+            field_id
+            for field_id, field in self.fields.items()
+            if isinstance(field.block, (FileFieldBlock, ImageFieldBlock, MultiFileFieldBlock))
+        ]
+        self.question_text_field_ids = [
+            field_id
+            for field_id in self.question_field_ids
+            if field_id not in self.file_field_ids
+        ]
+
+        self.first_group_question_text_field_ids = []
+        for field_id, field in self.fields.items():
+            if field_id in self.file_field_ids:
+                continue
+            elif isinstance(field.block, GroupToggleBlock):
+                break
+            elif isinstance(field.block, FormFieldBlock):
+                self.first_group_question_text_field_ids.append(field_id)
+
+        self.group_toggle_blocks = [
+            (field_id, field)
+            for field_id, field in self.fields.items()
+            if isinstance(field.block, GroupToggleBlock)
+        ]
+        self.normal_blocks = [
+            field_id
+            for field_id in self.question_field_ids
+            if field_id not in self.named_blocks
+        ]
+        self.text_blocks = [
+            field_id
+            for field_id in self.question_text_field_ids
+            if field_id not in self.named_blocks
+        ]
+        self.first_group_normal_text_blocks = [
+            field_id
+            for field_id in self.first_group_question_text_field_ids
+            if field_id not in self.named_blocks
+        ]
+
+
+class FormFieldsIndexCache:
+    """LRU of FormFieldsIndex keyed by a hash of the raw streamfield data"""
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, form_fields):
+        if not getattr(form_fields, 'is_lazy', False):
+            # Only the raw data loaded from the database can be hashed reliably
+            return None
+        raw = json.dumps(form_fields.stream_data, sort_keys=True, cls=DjangoJSONEncoder)
+        # The same data means different fields for different stream blocks
+        return id(form_fields.stream_block), hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, form_fields):
+        key = self.key(form_fields)
+        if key is None:
+            return FormFieldsIndex(form_fields)
+
+        with self._lock:
+            try:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+            except KeyError:
+                pass
+
+        index = FormFieldsIndex(form_fields)
+        with self._lock:
+            self._indexes[key] = index
+            if len(self._indexes) > self.maxsize:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+form_fields_indexes = FormFieldsIndexCache()
+
+
 class AccessFormData:
     """Mixin for interacting with form data from streamfields
 
@@ -38,7 +162,7 @@ class AccessFormData:
         # Returns the data mapped by field id instead of the data stored using the must include
         # values
         data = self.form_data.copy()
-        for field_name, field_id in self.named_blocks.items():
+        for field_name, field_id in self.form_fields_index.named_blocks.items():
             if field_id not in data:
                 try:
                     response = data.pop(field_name)
@@ -119,104 +243,84 @@ class AccessFormData:
                     data[field_id] = cls.process_file(instance, field, file)
         return data
 
+    @property
+    def form_fields_index(self):
+        # Memoised on the instance for as long as form_fields isn't reassigned
+        form_fields = self.form_fields
+        try:
+            indexed_fields, index = self._form_fields_index
+        except AttributeError:
+            indexed_fields = index = None
+        if indexed_fields is not form_fields:
+            index = form_fields_indexes.get(form_fields)
+            self._form_fields_index = (form_fields, index)
+        return index
+
     def get_definitive_id(self, id):
-        if id in self.named_blocks:
-            return self.named_blocks[id]
-        return id
+        return self.form_fields_index.named_blocks.get(id, id)
 
     def field(self, id):
         definitive_id = self.get_definitive_id(id)
         try:
-            return self.raw_fields[definitive_id]
+            return self.form_fields_index.raw_fields[definitive_id]
         except KeyError:
             raise UnusedFieldException(id) from None
 
     def data(self, id):
+        # Equivalent to self.raw_data[id] without copying the whole of form_data
         definitive_id = self.get_definitive_id(id)
         try:
-            return self.raw_data[definitive_id]
+            return self.form_data[definitive_id]
+        except KeyError:
+            pass
+        try:
+            # Named fields may be stored using their name rather than the id
+            return self.form_data[self.form_fields_index.named_ids[definitive_id]]
         except KeyError:
             # We have most likely progressed application forms so the data isnt in form_data
             return None
 
     @property
     def question_field_ids(self):
-        for field_id, field in self.fields.items():
-            if isinstance(field.block, FormFieldBlock):
-                yield field_id
+        yield from self.form_fields_index.question_field_ids
 
     @property
     def file_field_ids(self):
-        for field_id, field in self.fields.items():
-            if isinstance(field.block, (FileFieldBlock, ImageFieldBlock, MultiFileFieldBlock)):
-                yield field_id
+        yield from self.form_fields_index.file_field_ids
 
     @property
     def question_text_field_ids(self):
-        file_fields = list(self.file_field_ids)
-        for field_id, field in self.fields.items():
-            if field_id in file_fields:
-                pass
-            elif isinstance(field.block, FormFieldBlock):
-                yield field_id
+        yield from self.form_fields_index.question_text_field_ids
 
     @property
     def first_group_question_text_field_ids(self):
-        file_fields = list(self.file_field_ids)
-        for field_id, field in self.fields.items():
-            if field_id in file_fields:
-                continue
-            elif isinstance(field.block, GroupToggleBlock):
-                break
-            elif isinstance(field.block, FormFieldBlock):
-                yield field_id
+        yield from self.form_fields_index.first_group_question_text_field_ids
 
     @property
     def raw_fields(self):
         # Field ids to field class mapping - similar to raw_data
-        return {
-            field.id: field
-            for field in self.form_fields
-        }
+        return self.form_fields_index.raw_fields.copy()
 
     @property
     def fields(self):
         # ALl fields on the application
-        fields = self.raw_fields.copy()
-        for field_name, field_id in self.named_blocks.items():
-            response = fields.pop(field_id)
-            fields[field_name] = response
-        return fields
+        return self.form_fields_index.fields.copy()
 
     @property
     def named_blocks(self):
-        return {
-            field.block.name: field.id
-            for field in self.form_fields
-            if isinstance(field.block, SingleIncludeMixin)
-        }
+        return self.form_fields_index.named_blocks.copy()
 
     @property
     def normal_blocks(self):
-        return [
-            field_id
-            for field_id in self.question_field_ids
-            if field_id not in self.named_blocks
-        ]
+        return list(self.form_fields_index.normal_blocks)
 
     @property
     def group_toggle_blocks(self):
-        for field_id, field in self.fields.items():
-            if isinstance(field.block, GroupToggleBlock):
-                yield field_id, field
+        yield from self.form_fields_index.group_toggle_blocks
 
     @property
     def first_group_normal_text_blocks(self):
-        return [
-            field_id
-            for field_id in self.first_group_question_text_field_ids
-            if field_id not in self.named_blocks
-        ]
+        return list(self.form_fields_index.first_group_normal_text_blocks)
 
     def get_serialize_multi_inputs_answer(self, field):
         number_of_inputs = field.value.get('number_of_inputs')
@@ -270,46 +374,86 @@ class AccessFormData:
             return '-'
         return field.render(context={'data': data, 'include_question': include_question})
 
-    def render_answers(self):
+    def render_answers(self, include_question=True):
         # Returns a list of the rendered answers
         return [
-            self.render_answer(field_id, include_question=True)
-            for field_id in self.normal_blocks
+            self.render_answer(field_id, include_question=include_question)
+            for field_id in self.form_fields_index.normal_blocks
         ]
 
-    def render_first_group_text_answers(self):
+    def render_first_group_text_answers(self, include_question=True):
         return [
-            self.render_answer(field_id, include_question=True)
-            for field_id in self.first_group_normal_text_blocks
+            self.render_answer(field_id, include_question=include_question)
+            for field_id in self.form_fields_index.first_group_normal_text_blocks
         ]
 
-    def render_text_blocks_answers(self):
+    def render_text_blocks_answers(self, include_question=True):
         # Returns a list of the rendered answers of type text
         return [
-            self.render_answer(field_id, include_question=True)
-            for field_id in self.question_text_field_ids
-            if field_id not in self.named_blocks
+            self.render_answer(field_id, include_question=include_question)
+            for field_id in self.form_fields_index.text_blocks
         ]
 
+    # The variants of output_answers and the method rendering each of them
+    ANSWER_OUTPUTS = {
+        'all': 'render_answers',
+        'text': 'render_text_blocks_answers',
+        'first_group_text': 'render_first_group_text_answers',
+    }
+
+    def rendered_answers_cache_key(self, variant, include_question):
+        # Only data which can't change without changing the key can be cached
+        return None
+
+    def output_rendered_answers(self, variant, include_question=True, refresh=False):
+        """
+        The joined answers of the variant, from the cache when the data has a
+        cache key, see rendered_answers_cache_key.
+        """
+        key = None
+        if settings.RENDERED_ANSWERS_CACHE_TIMEOUT:
+            key = self.rendered_answers_cache_key(variant, include_question)
+        if key and not refresh:
+            output = cache.get(key)
+            if output is not None:
+                return mark_safe(output)
+
+        render = getattr(self, self.ANSWER_OUTPUTS[variant])
+        output = ''.join(render(include_question=include_question))
+        # Very long answers are rendered each time rather than filling the cache
+        if key and len(output) <= settings.RENDERED_ANSWERS_CACHE_MAX_SIZE:
+            cache.set(key, output, settings.RENDERED_ANSWERS_CACHE_TIMEOUT)
+        return mark_safe(output)
+
+    def prerender_answers(self):
+        # Fill the cache for every variant, so the next view doesn't render them.
+        # The answers link to the files on the apply site, wherever this is run
+        urlconf = get_urlconf()
+        set_urlconf('hypha.apply.urls')
+        try:
+            for variant in self.ANSWER_OUTPUTS:
+                self.output_rendered_answers(variant, refresh=True)
+        finally:
+            set_urlconf(urlconf)
+
     def output_answers(self):
         # Returns a safe string of the rendered answers
-        return mark_safe(''.join(self.render_answers()))
+        return self.output_rendered_answers('all')
 
     def output_text_answers(self):
-        return mark_safe(''.join(self.render_text_blocks_answers()))
+        return self.output_rendered_answers('text')
 
     def output_first_group_text_answers(self):
-        return mark_safe(''.join(self.render_first_group_text_answers()))
+        return self.output_rendered_answers('first_group_text')
 
     def get_answer_from_label(self, label):
-        for field_id in self.question_text_field_ids:
-            if field_id not in self.named_blocks:
-                question_field = self.serialize(field_id)
-                if label.lower() in question_field['question'].lower():
-                    if isinstance(question_field['answer'], str):
-                        answer = question_field['answer']
-                    else:
-                        answer = ','.join(question_field['answer'])
-                    if answer and not answer == 'N':
-                        return answer
+        for field_id in self.form_fields_index.text_blocks:
+            question_field = self.serialize(field_id)
+            if label.lower() in question_field['question'].lower():
+                if isinstance(question_field['answer'], str):
+                    answer = question_field['answer']
+                else:
+                    answer = ','.join(question_field['answer'])
+                if answer and not answer == 'N':
+                    return answer
         return None
@@ -3,6 +3,7 @@ from wagtail.admin.edit_handlers import FieldPanel
 from wagtail.contrib.settings.models import BaseSetting, register_setting
 from wagtail.images.edit_handlers import ImageChooserPanel
 
+from hypha.apply.utils.cache import ReferenceCache
 from hypha.apply.utils.image import generate_image_url
 
 
@@ -34,6 +35,13 @@ class ReviewerRole(models.Model):
         return self.name
 
 
+reviewer_role_cache = ReferenceCache(
+    'reviewer-roles',
+    lambda: list(ReviewerRole.objects.select_related('icon').order_by('order')),
+    ReviewerRole,
+)
+
+
 @register_setting
 class ReviewerSettings(BaseSetting):
     SUBMISSIONS = [
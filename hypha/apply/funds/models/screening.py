@@ -1,5 +1,7 @@
 from django.db import models
 
+from hypha.apply.utils.cache import ReferenceCache
+
 from ..admin_forms import ScreeningStatusAdminForm
 
 
@@ -21,3 +23,10 @@ class ScreeningStatus(models.Model):
 
     def __str__(self):
         return self.title
+
+
+screening_status_cache = ReferenceCache(
+    'screening-statuses',
+    lambda: list(ScreeningStatus.objects.order_by('id')),
+    ScreeningStatus,
+)
@@ -0,0 +1,348 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, models, transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from hypha.apply.activity.models import VISIBILITY, Activity
+from hypha.apply.review.models import Review, ReviewOpinion
+from hypha.apply.review.options import NA
+from hypha.apply.users.models import deleting_users
+from hypha.apply.utils.cache import ReferenceCache
+
+from .submissions import ApplicationSubmission, AssignedReviewers, deleting_submissions
+
+__all__ = ['SubmissionStats', 'ReviewerStats']
+
+
+COMMENT_COUNT_FIELDS = [f'comment_count_{visibility}' for visibility in VISIBILITY]
+
+STATS_FIELDS = [
+    'last_update',
+    'last_user_update',
+    *COMMENT_COUNT_FIELDS,
+    'opinion_disagree',
+    'review_staff_count',
+    'review_count',
+    'review_submitted_count',
+    'review_recommendation',
+]
+
+# Submissions collected by SubmissionStatsQuerySet.deferred to be refreshed
+# together, per thread as each has its own transaction
+_deferred_refreshes = threading.local()
+
+
+class SubmissionStatsQuerySet(models.QuerySet):
+    def live_values(self, submission_ids=None):
+        submissions = ApplicationSubmission.objects.exclude(id__in=deleting_submissions.ids)
+        if submission_ids is not None:
+            submissions = submissions.filter(id__in=submission_ids)
+        return submissions.order_by('id').with_live_stats().values('id', *STATS_FIELDS)
+
+    def refresh(self, *submission_ids):
+        # Upsert the live values in a single query, this is run from the signals
+        # so should stay cheap
+        deferred = getattr(_deferred_refreshes, 'stack', None)
+        if deferred:
+            deferred[-1].update(submission_ids)
+            return
+        if not submission_ids:
+            return
+        live_values = self.live_values(submission_ids)
+        sql, params = live_values.query.sql_with_params()
+        # The values query returns the fields followed by the annotations
+        columns = ['submission_id', *live_values.query.annotation_select]
+        updates = [f'{column} = EXCLUDED.{column}' for column in columns[1:]]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.model._meta.db_table} ({", ".join(columns)}) {sql} '
+                f'ON CONFLICT (submission_id) DO UPDATE SET {", ".join(updates)}',
+                params,
+            )
+
+    @contextmanager
+    def deferred(self):
+        # Holds back the refreshes made while changing many related objects and
+        # refreshes each of the submissions once at the end
+        if not hasattr(_deferred_refreshes, 'stack'):
+            _deferred_refreshes.stack = []
+        submission_ids = set()
+        _deferred_refreshes.stack.append(submission_ids)
+        try:
+            yield
+        finally:
+            _deferred_refreshes.stack.pop()
+        self.refresh(*submission_ids)
+
+    def rebuild(self, batch_size=500):
+        submission_ids = list(ApplicationSubmission.objects.order_by('id').values_list('id', flat=True))
+        for i in range(0, len(submission_ids), batch_size):
+            self.refresh(*submission_ids[i:i + batch_size])
+            yield min(i + batch_size, len(submission_ids))
+
+    def inconsistencies(self, submission_ids=None):
+        # Compares the stored stats to the values calculated from the source tables
+        # yields (submission id, field, stored value, live value) for every difference
+        stored = self.all()
+        if submission_ids is not None:
+            stored = stored.filter(submission_id__in=submission_ids)
+        stored = {
+            values.pop('submission_id'): values
+            for values in stored.values('submission_id', *STATS_FIELDS)
+        }
+        for live in self.live_values(submission_ids).iterator():
+            submission_id = live.pop('id')
+            # No stats are equivalent to an empty row
+            current = stored.get(submission_id, {})
+            for field, value in live.items():
+                stored_value = current.get(field, 0 if field in COMMENT_COUNT_FIELDS else None)
+                if stored_value != value:
+                    yield submission_id, field, stored_value, value
+
+
+class SubmissionStats(models.Model):
+    """Denormalised review and comment counts used when listing submissions.
+
+    Kept up to date by signals on the related models and can be rebuilt with
+    the rebuild_submission_stats management command.
+    """
+    submission = models.OneToOneField(
+        ApplicationSubmission,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    last_update = models.DateTimeField(null=True)
+    last_user_update = models.CharField(max_length=255, null=True)
+
+    comment_count_applicant = models.IntegerField(default=0)
+    comment_count_team = models.IntegerField(default=0)
+    comment_count_reviewers = models.IntegerField(default=0)
+    comment_count_partners = models.IntegerField(default=0)
+    comment_count_all = models.IntegerField(default=0)
+
+    opinion_disagree = models.IntegerField(null=True)
+    review_staff_count = models.IntegerField(null=True)
+    review_count = models.IntegerField(null=True)
+    review_submitted_count = models.IntegerField(null=True)
+    review_recommendation = models.IntegerField(null=True)
+
+    objects = SubmissionStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = 'submission stats'
+
+    def __str__(self):
+        return f'Stats for {self.submission_id}'
+
+
+class ReviewerStatsQuerySet(models.QuerySet):
+    def live_values(self, reviewer_ids=None):
+        reviews = Review.objects.submitted().exclude(author__reviewer__in=deleting_users.ids)
+        if reviewer_ids is not None:
+            reviews = reviews.filter(author__reviewer__in=reviewer_ids)
+        scored = ~Q(score=NA)
+        return reviews.annotate(
+            month=TruncMonth('created_at', output_field=DateField()),
+        ).order_by().values(
+            'author__reviewer',
+            'submission__page',
+            'submission__round',
+            'month',
+        ).annotate(
+            review_count=Count('id'),
+            score_count=Count('id', filter=scored),
+            score_total=Sum('score', filter=scored),
+        )
+
+    def refresh(self, *reviewer_ids):
+        # Replace the rows of the reviewers with the live values, this is run
+        # from the signals and only touches the reviews of those reviewers
+        if not reviewer_ids:
+            return
+        live_values = self.live_values(reviewer_ids)
+        sql, params = live_values.query.sql_with_params()
+        columns = ['reviewer_id', 'fund_id', 'round_id', *live_values.query.annotation_select]
+        with transaction.atomic():
+            # Refreshes of the same reviewers wait for each other, otherwise
+            # both could delete the rows and insert them twice
+            list(
+                get_user_model().objects.select_for_update().filter(id__in=reviewer_ids)
+                .order_by('id').values_list('id', flat=True)
+            )
+            self.filter(reviewer_id__in=reviewer_ids).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {self.model._meta.db_table} ({", ".join(columns)}) {sql}',
+                    params,
+                )
+
+    def rebuild(self, batch_size=100):
+        reviewer_ids = list(
+            AssignedReviewers.objects.order_by('reviewer_id').values_list('reviewer_id', flat=True).distinct()
+        )
+        with transaction.atomic():
+            # Also clears out any reviewers who no longer have reviews
+            self.all().delete()
+            for i in range(0, len(reviewer_ids), batch_size):
+                self.refresh(*reviewer_ids[i:i + batch_size])
+                yield min(i + batch_size, len(reviewer_ids))
+
+
+class ReviewerStats(models.Model):
+    """Submitted reviews per reviewer, fund, round and month.
+
+    Used by the reviewer leaderboard in place of counting the reviews, kept up
+    to date by signals on the reviews and can be rebuilt with the
+    rebuild_reviewer_stats management command.
+    """
+    reviewer = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='review_stats', on_delete=models.CASCADE)
+    fund = models.ForeignKey('wagtailcore.Page', related_name='+', on_delete=models.CASCADE)
+    round = models.ForeignKey('wagtailcore.Page', related_name='+', null=True, on_delete=models.CASCADE)
+    # The first day of the month
+    month = models.DateField()
+
+    review_count = models.IntegerField(default=0)
+    # Reviews which were scored, the others answered n/a
+    score_count = models.IntegerField(default=0)
+    score_total = models.DecimalField(max_digits=12, decimal_places=1, null=True)
+
+    objects = ReviewerStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = 'reviewer stats'
+        indexes = [
+            models.Index(fields=['reviewer', 'month']),
+        ]
+        constraints = [
+            # Without a round the fund takes its place, NULLs are never equal
+            models.UniqueConstraint(
+                fields=['reviewer', 'fund', 'round', 'month'],
+                condition=Q(round__isnull=False),
+                name='unique_reviewer_stats_round',
+            ),
+            models.UniqueConstraint(
+                fields=['reviewer', 'fund', 'month'],
+                condition=Q(round__isnull=True),
+                name='unique_reviewer_stats_fund',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Stats for {self.reviewer_id} in {self.month:%Y-%m}'
+
+
+def count_submissions_by(queryset, field):
+    return dict(
+        queryset.order_by().filter(**{f'{field}__isnull': False}).values_list(field).annotate(Count('pk'))
+    )
+
+
+def load_submission_facets():
+    """
+    The options of the submission filters which are in use, as how many
+    submissions there are for each id.
+    """
+    submissions = ApplicationSubmission.objects.all()
+    return {
+        'fund': count_submissions_by(submissions, 'page'),
+        'round': count_submissions_by(submissions, 'round'),
+        'lead': count_submissions_by(submissions, 'lead'),
+        'reviewers': count_submissions_by(AssignedReviewers.objects.all(), 'reviewer'),
+        'screening_statuses': count_submissions_by(
+            ApplicationSubmission.screening_statuses.through.objects.all(), 'screeningstatus',
+        ),
+        'meta_terms': count_submissions_by(ApplicationSubmission.meta_terms.through.objects.all(), 'metaterm'),
+    }
+
+
+submission_facets = ReferenceCache(
+    'submission-facets',
+    load_submission_facets,
+    timeout_setting='FACET_CACHE_TIMEOUT',
+)
+
+
+@receiver(m2m_changed, sender=ApplicationSubmission.screening_statuses.through)
+@receiver(m2m_changed, sender=ApplicationSubmission.meta_terms.through)
+def update_facets_for_terms(sender, action, **kwargs):
+    if action.startswith('post_'):
+        submission_facets.invalidate()
+
+
+@receiver(post_save, sender=AssignedReviewers)
+def update_facets_for_reviewer(sender, instance, created, **kwargs):
+    # Changing the role or type of a reviewer doesn't change the options
+    if created:
+        submission_facets.invalidate()
+
+
+@receiver(post_delete, sender=ApplicationSubmission)
+@receiver(post_delete, sender=AssignedReviewers)
+def update_facets_for_delete(sender, instance, **kwargs):
+    submission_facets.invalidate()
+
+
+pre_delete.connect(deleting_submissions.mark, sender=ApplicationSubmission)
+post_delete.connect(deleting_submissions.unmark, sender=ApplicationSubmission)
+pre_delete.connect(deleting_users.mark, sender=get_user_model())
+post_delete.connect(deleting_users.unmark, sender=get_user_model())
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+def update_stats_for_activity(sender, instance, **kwargs):
+    submission_type = ContentType.objects.get_for_model(ApplicationSubmission)
+    if instance.source_content_type_id == submission_type.id:
+        SubmissionStats.objects.refresh(instance.source_object_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=AssignedReviewers)
+@receiver(post_delete, sender=AssignedReviewers)
+def update_stats_for_submission_relation(sender, instance, **kwargs):
+    SubmissionStats.objects.refresh(instance.submission_id)
+
+
+@receiver(post_save, sender=ReviewOpinion)
+@receiver(post_delete, sender=ReviewOpinion)
+def update_stats_for_opinion(sender, instance, **kwargs):
+    submission_ids = Review.objects.filter(id=instance.review_id).values_list('submission_id', flat=True)
+    SubmissionStats.objects.refresh(*submission_ids)
+
+
+@receiver(post_save, sender=ApplicationSubmission)
+def update_for_grouping(sender, instance, created, **kwargs):
+    # Most saves only change the status or the answers, which leave the filter
+    # options and the reviewer stats as they are
+    loaded = getattr(instance, '_loaded_grouping', None)
+    instance._loaded_grouping = instance.grouping
+    if not created and loaded == instance.grouping:
+        return
+    submission_facets.invalidate()
+    if created or (loaded and loaded[:2] == instance.grouping[:2]):
+        return
+    # The reviews are counted against the fund and round of the submission
+    reviewer_ids = Review.objects.filter(submission=instance).order_by().values_list(
+        'author__reviewer_id', flat=True,
+    ).distinct()
+    ReviewerStats.objects.refresh(*reviewer_ids)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_reviewer_stats(sender, instance, **kwargs):
+    try:
+        reviewer_id = instance.author.reviewer_id
+    except ObjectDoesNotExist:
+        return
+    ReviewerStats.objects.refresh(reviewer_id)
@@ -1,27 +1,41 @@
 import json
-from functools import partialmethod
+import operator
+import re
+from collections import defaultdict
+from functools import partialmethod, reduce
 
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Group
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.postgres.fields import JSONField
 from django.contrib.postgres.fields.jsonb import KeyTextTransform
-from django.core.exceptions import PermissionDenied
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.db import models, transaction
 from django.db.models import (
     Avg,
     Case,
+    CharField,
     Count,
+    Exists,
     F,
     FloatField,
+    Func,
     IntegerField,
     OuterRef,
     Prefetch,
     Q,
     Subquery,
     Sum,
+    TextField,
+    Value,
     When,
 )
 from django.db.models.expressions import OrderBy, RawSQL
@@ -29,19 +43,22 @@ from django.db.models.functions import Cast, Coalesce
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.text import slugify
-from django_fsm import RETURN_VALUE, FSMField, can_proceed, transition
+from django_fsm import RETURN_VALUE, FSMField, transition
 from django_fsm.signals import post_transition
 from wagtail.contrib.forms.models import AbstractFormSubmission
 from wagtail.core.fields import StreamField
 
 from hypha.apply.activity.messaging import MESSAGES, messenger
+from hypha.apply.activity.models import VISIBILITY
 from hypha.apply.categories.models import MetaTerm
 from hypha.apply.determinations.models import Determination
 from hypha.apply.flags.models import Flag
-from hypha.apply.review.models import ReviewOpinion
-from hypha.apply.review.options import AGREE, DISAGREE, MAYBE
+from hypha.apply.review.models import Review, ReviewOpinion
+from hypha.apply.review.options import AGREE, DISAGREE
 from hypha.apply.stream_forms.files import StreamFieldDataEncoder
 from hypha.apply.stream_forms.models import BaseStreamForm
+from hypha.apply.users.models import get_group
+from hypha.apply.utils.models import DeletionMarks
 
 from ..blocks import NAMED_BLOCKS, ApplicationCustomFormFieldsBlock
 from ..workflow import (
@@ -52,6 +69,7 @@ from ..workflow import (
     PHASES,
     PHASES_MAPPING,
     STAGE_CHANGE_ACTIONS,
+    TRANSITIONS,
     WORKFLOWS,
     UserPermissions,
     accepted_statuses,
@@ -62,7 +80,7 @@ from ..workflow import (
     review_statuses,
 )
 from .mixins import AccessFormData
-from .reviewer_role import ReviewerRole
+from .reviewer_role import reviewer_role_cache
 from .utils import (
     COMMUNITY_REVIEWER_GROUP_NAME,
     LIMIT_TO_PARTNERS,
@@ -103,9 +121,36 @@ class JSONOrderable(models.QuerySet):
         return super().order_by(*field_ordering)
 
 
+def submission_search_query(query):
+    # Build a prefix query for each of the words, removing the tsquery operators
+    terms = [
+        re.sub(r"[&|!():*<>'\\]", ' ', term).strip()
+        for term in query.split()
+    ]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f"'{term}':*" for term in terms), search_type='raw')
+
+
+class NumNode(Func):
+    # The number of terms and operators in a tsquery, 0 once the stop words are removed
+    function = 'numnode'
+    output_field = IntegerField()
+
+
+# The submissions being deleted, the signals of the cascade mustn't recreate
+# their stats, see SubmissionStats
+deleting_submissions = DeletionMarks()
+
+
 class ApplicationSubmissionQueryset(JSONOrderable):
     json_field = 'form_data'
 
+    def delete(self):
+        with deleting_submissions.deleting(self.values_list('id', flat=True)):
+            return super().delete()
+
     def active(self):
         return self.filter(status__in=active_statuses)
 
@@ -163,6 +208,33 @@ class ApplicationSubmissionQueryset(JSONOrderable):
         determined_submissions = Determination.objects.filter(submission__in=self).final().values('submission')
         return self.exclude(pk__in=determined_submissions)
 
+    def search(self, query):
+        # Matches every word of the query as a prefix, ordered by the weighted rank
+        search_query = submission_search_query(query)
+        if not search_query:
+            return self
+        matches = self.model.objects.filter(search_document=search_query).values('id')
+        # Stop words are left out of the document, so a query made only of them
+        # searches the text. Postgres checks the query once and skips this
+        # subquery for any other search.
+        text_matches = self.model.objects.annotate(
+            search_nodes=NumNode(search_query),
+        ).filter(search_nodes=0, search_data__icontains=query.strip()).values('id')
+        return self.filter(Q(id__in=matches) | Q(id__in=text_matches)).annotate(
+            search_rank=SearchRank(F('search_document'), search_query),
+        ).order_by('-search_rank', '-submit_time')
+
+    def rebuild_search(self, batch_size=500):
+        # Rebuilds the search documents a batch at a time, yields the number processed
+        submission_ids = list(self.order_by('id').values_list('id', flat=True))
+        for i in range(0, len(submission_ids), batch_size):
+            submissions = list(self.model.objects.filter(id__in=submission_ids[i:i + batch_size]))
+            for submission in submissions:
+                submission.search_data = ' '.join(submission.prepare_search_values())
+                submission.search_document = submission.search_vector()
+            self.model.objects.bulk_update(submissions, ['search_data', 'search_document'])
+            yield min(i + batch_size, len(submission_ids))
+
     def current(self):
         # Applications which have the current stage active (have not been progressed)
         return self.exclude(next__isnull=False)
@@ -191,25 +263,32 @@ class ApplicationSubmissionQueryset(JSONOrderable):
             last_update=Subquery(latest_activity.values('timestamp')[:1]),
         )
 
-    def for_table(self, user):
+    def with_live_stats(self):
+        # Calculates the review and comment counts directly from the source tables.
+        # This is expensive on large querysets, use for_table which reads the
+        # values stored in SubmissionStats
         activities = self.model.activities.rel.model
-        comments = activities.comments.filter(submission=OuterRef('id')).visible_to(user)
-        roles_for_review = self.model.assigned.field.model.objects.with_roles().filter(
-            submission=OuterRef('id'), reviewer=user)
+        comments = activities.comments.filter(submission=OuterRef('id'))
 
         review_model = self.model.reviews.field.model
-        reviews = review_model.objects.filter(submission=OuterRef('id'))
         opinions = review_model.opinions.field.model.objects.filter(review__submission=OuterRef('id'))
         reviewers = self.model.assigned.field.model.objects.filter(submission=OuterRef('id'))
 
-        return self.with_latest_update().annotate(
-            comment_count=Coalesce(
+        comment_counts = {
+            f'comment_count_{visibility}': Coalesce(
                 Subquery(
-                    comments.values('submission').order_by().annotate(count=Count('pk')).values('count'),
+                    comments.filter(visibility=visibility).values('submission').order_by().annotate(
+                        count=Count('pk')
+                    ).values('count'),
                     output_field=IntegerField(),
                 ),
                 0,
-            ),
+            )
+            for visibility in VISIBILITY
+        }
+
+        return self.with_latest_update().with_review_summary().annotate(
+            **comment_counts,
             opinion_disagree=Subquery(
                 opinions.filter(opinion=DISAGREE).values(
                     'review__submission'
@@ -230,15 +309,117 @@ class ApplicationSubmissionQueryset(JSONOrderable):
                 ).values('count'),
                 output_field=IntegerField(),
             ),
-            review_recommendation=Case(
-                When(opinion_disagree__gt=0, then=MAYBE),
-                default=Subquery(
-                    reviews.submitted().values('submission').annotate(
-                        calc_recommendation=Sum('recommendation') / Count('recommendation'),
-                    ).values('calc_recommendation'),
-                    output_field=IntegerField(),
-                )
+        )
+
+    def with_review_summary(self):
+        # The score and recommendation of the submitted reviews
+        reviews = self.model.reviews.field.model.objects.submitted()
+        return self.annotate(
+            review_score=reviews.submission_score(),
+            review_recommendation=reviews.submission_recommendation(),
+        )
+
+    def for_messaging(self):
+        # The related objects used by the messaging adapters for a batch of submissions
+        return self.select_related('page', 'round', 'lead', 'user')
+
+    def with_all_reviewer_roles_assigned(self):
+        # The same as has_all_reviewer_roles_assigned for the whole queryset
+        return self.annotate(
+            assigned_role_count=Count('assigned', filter=Q(assigned__role__isnull=False)),
+        ).filter(assigned_role_count=len(reviewer_role_cache.get()))
+
+    def perform_transitions(self, actions, user, request=None):
+        """
+        Perform the first of the actions which the user is allowed to on each
+        of the submissions.
+
+        The actions are checked against the compiled workflow. Those which only
+        change the status are saved together in a single update, without the
+        post_transition signal, the rest go through perform_transition. Returns
+        the phase each submission moved from, keyed by id, and the submissions
+        which couldn't be moved.
+        """
+        phase_changes = {}
+        failed = []
+        targets = defaultdict(list)
+        with transaction.atomic():
+            for submission in self:
+                available = submission.available_transitions
+                action = next((
+                    action for action in actions
+                    if action in available and submission.can_perform_transition(available[action], user)
+                ), None)
+                if action is None:
+                    failed.append(submission)
+                    continue
+
+                phase_changes[submission.id] = submission.phase
+                next_actions = TRANSITIONS.get((submission.workflow_name, action), {})
+                if available[action].method or STAGE_CHANGE_ACTIONS & {action, *next_actions}:
+                    # Creates a revision or moves to the next stage
+                    submission.perform_transition(action, user, request=request, notify=False)
+                else:
+                    targets[action].append(submission)
+
+            if targets:
+                self.model.objects.filter(
+                    id__in=[submission.id for submissions in targets.values() for submission in submissions],
+                ).update(status=Case(
+                    *[
+                        When(id__in=[submission.id for submission in submissions], then=Value(target))
+                        for target, submissions in targets.items()
+                    ],
+                    output_field=CharField(),
+                ))
+
+        status = self.model._meta.get_field('status')
+        for target, submissions in targets.items():
+            for submission in submissions:
+                status.set_state(submission, target)
+        return phase_changes, failed
+
+    def for_detail(self):
+        # Loads the screening statuses, flags and the reviewers with their
+        # reviews and opinions once, the helpers on the submission which are
+        # used by the detail pages then answer from these
+        return self.prefetch_related(
+            'screening_statuses',
+            'flags',
+            Prefetch(
+                'assigned',
+                queryset=AssignedReviewers.objects.select_related(
+                    'reviewer',
+                    'type',
+                    'role',
+                    'review',
+                ).prefetch_related(
+                    'opinions',
+                    'reviewer__groups',
+                ),
             ),
+        )
+
+    def for_table(self, user):
+        # The counts are read from the denormalised SubmissionStats, see with_live_stats
+        # for how they are calculated. Submissions without stats have had no activity.
+        roles_for_review = self.model.assigned.field.model.objects.with_roles().filter(
+            submission=OuterRef('id'), reviewer=user)
+
+        visible_comments = [
+            F(f'stats__comment_count_{visibility}')
+            for visibility in self.model.activities.rel.model.visibility_for(user)
+        ]
+
+        return self.annotate(
+            last_user_update=F('stats__last_user_update'),
+            last_update=F('stats__last_update'),
+            comment_count=Coalesce(reduce(operator.add, visible_comments), 0),
+            opinion_disagree=F('stats__opinion_disagree'),
+            review_staff_count=F('stats__review_staff_count'),
+            review_count=F('stats__review_count'),
+            review_submitted_count=F('stats__review_submitted_count'),
+            review_recommendation=F('stats__review_recommendation'),
             role_icon=Subquery(roles_for_review[:1].values('role__icon')),
         ).prefetch_related(
             Prefetch(
@@ -268,17 +449,23 @@ class ApplicationSubmissionQueryset(JSONOrderable):
         )
 
 
+def has_transition_permission(instance, user, users):
+    if not user.is_authenticated:
+        return False
+    if UserPermissions.STAFF in users and user.is_apply_staff:
+        return True
+    if UserPermissions.ADMIN in users and user.is_superuser:
+        return True
+    if UserPermissions.LEAD in users and instance.lead_id == user.pk:
+        return True
+    if UserPermissions.APPLICANT in users and instance.user_id == user.pk:
+        return True
+    return False
+
+
 def make_permission_check(users):
     def can_transition(instance, user):
-        if UserPermissions.STAFF in users and user.is_apply_staff:
-            return True
-        if UserPermissions.ADMIN in users and user.is_superuser:
-            return True
-        if UserPermissions.LEAD in users and instance.lead == user:
-            return True
-        if UserPermissions.APPLICANT in users and instance.user == user:
-            return True
-        return False
+        return has_transition_permission(instance, user, users)
 
     return can_transition
 
@@ -337,25 +524,39 @@ class AddTransitions(models.base.ModelBase):
 
         attrs['get_transition'] = get_transition
 
+        @property
+        def available_transitions(self):
+            return TRANSITIONS.get((self.workflow_name, self.status), {})
+
+        attrs['available_transitions'] = available_transitions
+
+        def transition_conditions_met(self, available):
+            return all(getattr(self, condition)() for condition in available.conditions)
+
+        attrs['transition_conditions_met'] = transition_conditions_met
+
+        def can_perform_transition(self, available, user):
+            if not has_transition_permission(self, user, available.permissions):
+                return False
+            return self.transition_conditions_met(available)
+
+        attrs['can_perform_transition'] = can_perform_transition
+
         def get_actions_for_user(self, user):
-            transitions = self.get_available_user_status_transitions(user)
-            actions = [
-                (transition.target, self.phase.transitions[transition.target]['display'])
-                for transition in transitions if self.get_transition(transition.target)
-            ]
-            yield from actions
+            for available in self.available_transitions.values():
+                if self.can_perform_transition(available, user):
+                    yield available.target, available.display
 
         attrs['get_actions_for_user'] = get_actions_for_user
 
         def perform_transition(self, action, user, request=None, **kwargs):
-            transition = self.get_transition(action)
-            if not transition:
+            available = self.available_transitions.get(action)
+            if not available:
                 raise PermissionDenied(f'Invalid "{ action }" transition')
-            if not can_proceed(transition):
-                action = self.phase.transitions[action]
-                raise PermissionDenied(f'You do not have permission to "{ action }"')
+            if not self.transition_conditions_met(available):
+                raise PermissionDenied(f'You do not have permission to "{ available.display }"')
 
-            transition(by=user, request=request, **kwargs)
+            self.get_transition(action)(by=user, request=request, **kwargs)
             self.save(update_fields=['status'])
 
             self.progress_stage_when_possible(user, request, **kwargs)
@@ -364,11 +565,11 @@ class AddTransitions(models.base.ModelBase):
 
         def progress_stage_when_possible(self, user, request, notify=None, **kwargs):
             # Check to see if we can progress to a new stage from the current status
-            for stage_transition in STAGE_CHANGE_ACTIONS:
-                try:
-                    self.perform_transition(stage_transition, user, request=request, notify=False, **kwargs)
-                except PermissionDenied:
-                    pass
+            for available in self.available_transitions.values():
+                if available.target in STAGE_CHANGE_ACTIONS and self.transition_conditions_met(available):
+                    # Performing the transition progresses any further stages
+                    self.perform_transition(available.target, user, request=request, notify=False, **kwargs)
+                    return
 
         attrs['progress_stage_when_possible'] = progress_stage_when_possible
 
@@ -456,6 +657,7 @@ class ApplicationSubmission(
     )
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     search_data = models.TextField()
+    search_document = SearchVectorField(null=True, editable=False)
 
     # Workflow inherited from WorkflowHelpers
     status = FSMField(default=INITIAL_STATE, protected=True)
@@ -488,6 +690,24 @@ class ApplicationSubmission(
 
     objects = ApplicationSubmissionQueryset.as_manager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_document']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'page_id', 'round_id', 'lead_id'} <= set(field_names):
+            # Kept to tell which saves change them, see the stats signals
+            instance._loaded_grouping = instance.grouping
+        return instance
+
+    @property
+    def grouping(self):
+        # The fields the stats and the filter options group submissions by
+        return (self.page_id, self.round_id, self.lead_id)
+
     def not_progressed(self):
         return not self.next
 
@@ -569,12 +789,11 @@ class ApplicationSubmission(
 
     def progress_application(self, **kwargs):
         target = None
-        for phase in STAGE_CHANGE_ACTIONS:
-            transition = self.get_transition(phase)
-            if can_proceed(transition):
+        for available in self.available_transitions.values():
+            if available.target in STAGE_CHANGE_ACTIONS and self.transition_conditions_met(available):
                 # We convert to dict as not concerned about transitions from the first phase
                 # See note in workflow.py
-                target = dict(PHASES)[phase].stage
+                target = dict(PHASES)[available.target].stage
         if not target:
             raise ValueError('Incorrect State for transition')
 
@@ -622,13 +841,21 @@ class ApplicationSubmission(
                 self.form_data = current_submission.form_data
             else:
                 self.live_revision = revision
-                self.search_data = ' '.join(self.prepare_search_values())
+                self.update_search_data()
 
             self.draft_revision = revision
             self.save(skip_custom=True)
+            if not draft:
+                self.prerender_answers()
             return revision
         return None
 
+    def rendered_answers_cache_key(self, variant, include_question):
+        # The form data only changes with a new live revision
+        if self.is_draft or not self.live_revision_id:
+            return None
+        return f'rendered-answers:{self.id}:{self.live_revision_id}:{int(include_question)}:{variant}'
+
     def clean_submission(self):
         self.process_form_data()
         self.ensure_user_has_account()
@@ -645,7 +872,9 @@ class ApplicationSubmission(
             # We don't want to use this approach if the user is sending data
             return super().save(*args, update_fields=update_fields, **kwargs)
         elif skip_custom:
-            return super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+            self.clear_search_expression()
+            return
 
         if self.is_draft:
             raise ValueError('Cannot save with draft data')
@@ -664,10 +893,12 @@ class ApplicationSubmission(
         self.clean_submission()
 
         # add a denormed version of the answer for searching
-        self.search_data = ' '.join(self.prepare_search_values())
+        self.update_search_data()
 
         super().save(*args, **kwargs)
 
+        self.clear_search_expression()
+
         if creating:
             self.process_file_data(files)
             for reviewer in self.get_from_parent('reviewers').all():
@@ -684,9 +915,19 @@ class ApplicationSubmission(
             self.draft_revision = first_revision
             self.save()
 
+    @property
+    def prefetched_assigned(self):
+        # The assigned reviewers when loaded with for_detail, otherwise None
+        return getattr(self, '_prefetched_objects_cache', {}).get('assigned')
+
     @property
     def has_all_reviewer_roles_assigned(self):
-        return self.assigned.with_roles().count() == ReviewerRole.objects.count()
+        assigned = self.prefetched_assigned
+        if assigned is not None:
+            assigned_with_roles = len([assignment for assignment in assigned if assignment.role_id])
+        else:
+            assigned_with_roles = self.assigned.with_roles().count()
+        return assigned_with_roles == len(reviewer_role_cache.get())
 
     @property
     def community_review(self):
@@ -694,27 +935,43 @@ class ApplicationSubmission(
 
     @property
     def missing_reviewers(self):
-        reviewers_submitted = self.assigned.reviewed().values('reviewer')
-        reviewers = self.reviewers.exclude(id__in=reviewers_submitted)
-        return reviewers
+        # The assigned reviewers who haven't reviewed, each one once
+        assigned = self.prefetched_assigned
+        if assigned is None:
+            reviewers_submitted = self.assigned.reviewed().values('reviewer')
+            return list(self.reviewers.exclude(id__in=reviewers_submitted).distinct().with_roles())
+
+        reviewed = {assignment.reviewer_id for assignment in assigned if assignment.is_reviewed}
+        missing = {}
+        for assignment in assigned:
+            if assignment.reviewer_id not in reviewed:
+                missing.setdefault(assignment.reviewer_id, assignment.reviewer)
+        return list(missing.values())
 
     @property
     def staff_not_reviewed(self):
-        return self.missing_reviewers.staff()
+        # The same users as UserQuerySet.staff, superusers included
+        return [reviewer for reviewer in self.missing_reviewers if reviewer.is_apply_staff]
 
     @property
     def reviewers_not_reviewed(self):
-        return self.missing_reviewers.reviewers().exclude(id__in=self.staff_not_reviewed)
+        return [
+            reviewer for reviewer in self.missing_reviewers
+            if reviewer.is_reviewer and not reviewer.is_apply_staff
+        ]
 
     def reviewed_by(self, user):
+        assigned = self.prefetched_assigned
+        if assigned is not None:
+            return any(assignment.reviewer_id == user.pk and assignment.is_reviewed for assignment in assigned)
         return self.assigned.reviewed().filter(reviewer=user).exists()
 
     def flagged_by(self, user):
-        return self.flags.filter(user=user, type=Flag.USER).exists()
+        return any(flag.user_id == user.pk and flag.type == Flag.USER for flag in self.flags.all())
 
     @property
     def flagged_staff(self):
-        return self.flags.filter(type=Flag.STAFF).exists()
+        return any(flag.type == Flag.STAFF for flag in self.flags.all())
 
     def has_permission_to_review(self, user):
         if user.is_apply_staff:
@@ -734,7 +991,7 @@ class ApplicationSubmission(
 
         return self.has_permission_to_review(user)
 
-    def prepare_search_values(self):
+    def prepare_search_answers(self):
         for field_id in self.question_field_ids:
             field = self.field(field_id)
             data = self.data(field_id)
@@ -745,13 +1002,45 @@ class ApplicationSubmission(
                 else:
                     yield value
 
+    def prepare_search_values(self):
+        yield from self.prepare_search_answers()
+
         # Add named fields into the search index
         for field in ['full_name', 'email', 'title']:
             yield getattr(self, field)
 
+    def search_vector(self):
+        # The title is weighted above the applicant, which is above the answers
+        def text(value):
+            return Value(value or '', output_field=TextField())
+
+        return (
+            SearchVector(text(self.title), weight='A') +
+            SearchVector(text(self.full_name), text(self.email), weight='B') +
+            SearchVector(text(' '.join(self.prepare_search_answers())), weight='D')
+        )
+
+    def update_search_data(self):
+        # The search document is only rebuilt when the searchable content
+        # changes, or the row has none yet
+        search_data = ' '.join(self.prepare_search_values())
+        missing = 'search_document' in self.__dict__ and self.search_document is None
+        if search_data != self.search_data or not self.id or missing:
+            self.search_data = search_data
+            self.search_document = self.search_vector()
+
+    def clear_search_expression(self):
+        # Once saved the expression is treated as deferred and loaded if needed
+        if hasattr(self.__dict__.get('search_document'), 'resolve_expression'):
+            del self.search_document
+
     def get_absolute_url(self):
         return reverse('funds:submissions:detail', args=(self.id,))
 
+    def delete(self, *args, **kwargs):
+        with deleting_submissions.deleting([self.id]):
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f'{self.title} from {self.full_name} for {self.page.title}'
 
@@ -810,21 +1099,23 @@ class ApplicationSubmission(
     def _get_REQUIRED_value(self, name):
         return self.data(name)
 
+    # The screening helpers read screening_statuses.all() so they share the
+    # statuses when they have been prefetched, see for_detail
     @property
     def has_default_screening_status_set(self):
-        return self.screening_statuses.filter(default=True).exists()
+        return any(status.default for status in self.screening_statuses.all())
 
     @property
     def has_yes_default_screening_status_set(self):
-        return self.screening_statuses.filter(default=True, yes=True).exists()
+        return any(status.default and status.yes for status in self.screening_statuses.all())
 
     @property
     def has_no_default_screening_status_set(self):
-        return self.screening_statuses.filter(default=True, yes=False).exists()
+        return any(status.default and not status.yes for status in self.screening_statuses.all())
 
     @property
     def can_not_edit_default(self):
-        return self.screening_statuses.all().count() > 1
+        return len(self.screening_statuses.all()) > 1
 
     @property
     def joined_screening_statuses(self):
@@ -832,22 +1123,22 @@ class ApplicationSubmission(
 
     @property
     def yes_screening_statuses(self):
-        ScreeningStatus = apps.get_model('funds', 'ScreeningStatus')
+        from .screening import screening_status_cache
         return json.dumps(
-            {status.title: status.id for status in ScreeningStatus.objects.filter(yes=True)}
+            {status.title: status.id for status in screening_status_cache.get() if status.yes}
         )
 
     @property
     def no_screening_statuses(self):
-        ScreeningStatus = apps.get_model('funds', 'ScreeningStatus')
+        from .screening import screening_status_cache
         return json.dumps(
-            {status.title: status.id for status in ScreeningStatus.objects.filter(yes=False)}
+            {status.title: status.id for status in screening_status_cache.get() if not status.yes}
         )
 
     @property
     def supports_default_screening(self):
-        if self.screening_statuses.exists():
-            return self.screening_statuses.filter(default=True).exists()
+        if self.screening_statuses.all():
+            return self.has_default_screening_status_set
         return True
 
 
@@ -1012,7 +1303,7 @@ class AssignedReviewersQuerySet(models.QuerySet):
             else:
                 groups = {REVIEWER_GROUP_NAME}
 
-        group = Group.objects.get(name=groups.pop())
+        group = get_group(groups.pop())
 
         return self.get_or_create(
             submission=submission,
@@ -1024,11 +1315,11 @@ class AssignedReviewersQuerySet(models.QuerySet):
         return self.get_or_create(
             submission=submission,
             reviewer=reviewer,
-            type=Group.objects.get(name=STAFF_GROUP_NAME),
+            type=get_group(STAFF_GROUP_NAME),
         )
 
     def bulk_create_reviewers(self, reviewers, submission):
-        group = Group.objects.get(name=REVIEWER_GROUP_NAME)
+        group = get_group(REVIEWER_GROUP_NAME)
         self.bulk_create(
             [
                 self.model(
@@ -1040,20 +1331,75 @@ class AssignedReviewersQuerySet(models.QuerySet):
             ],
             ignore_conflicts=True
         )
+        # bulk_create doesn't send the signals which keep the stats up to date
+        from .stats import submission_facets
+        SubmissionStats = apps.get_model('funds', 'SubmissionStats')
+        SubmissionStats.objects.refresh(submission.id)
+        submission_facets.invalidate()
 
     def update_role(self, role, reviewer, *submissions):
-        # Remove role who didn't review
-        self.filter(submission__in=submissions, role=role).never_tried_to_review().delete()
-        # Anyone else we remove their role
-        self.filter(submission__in=submissions, role=role).update(role=None)
-        # Create/update the new role reviewers
-        group = Group.objects.get(name=STAFF_GROUP_NAME)
-        for submission in submissions:
-            self.update_or_create(
-                submission=submission,
-                reviewer=reviewer,
-                defaults={'role': role, 'type': group},
-            )
+        self.update_roles({role: reviewer}, submissions)
+
+    def update_roles(self, assigned_roles, submissions):
+        """
+        Give each role to its reviewer on all of the submissions.
+
+        Whoever held the role before loses it and is removed if they never
+        tried to review. The changes for all the submissions are worked out in
+        memory then written in bulk, in one transaction.
+        """
+        assigned_roles = {role: reviewer for role, reviewer in assigned_roles.items() if reviewer}
+        submission_ids = [submission.id for submission in submissions]
+        if not assigned_roles or not submission_ids:
+            return
+
+        existing = self.filter(submission__in=submission_ids).annotate(
+            has_review=Exists(Review.objects.filter(author=OuterRef('pk'))),
+            has_opinion=Exists(ReviewOpinion.objects.filter(author=OuterRef('pk'))),
+        )
+        assigned = defaultdict(dict)
+        for assignment in existing:
+            assigned[assignment.submission_id][assignment.reviewer_id] = assignment
+
+        group = get_group(STAFF_GROUP_NAME)
+        deleted = []
+        updated = {}
+        created = []
+        for submission_id in submission_ids:
+            current = assigned[submission_id]
+            for role, reviewer in assigned_roles.items():
+                for assignment in list(current.values()):
+                    if assignment.role_id != role.id or assignment.reviewer_id == reviewer.id:
+                        continue
+                    if assignment.has_review or assignment.has_opinion:
+                        assignment.role = None
+                        updated[assignment.pk] = assignment
+                    else:
+                        del current[assignment.reviewer_id]
+                        updated.pop(assignment.pk, None)
+                        deleted.append(assignment.pk)
+
+                assignment = current.get(reviewer.id)
+                if assignment is None:
+                    assignment = current[reviewer.id] = self.model(submission_id=submission_id, reviewer=reviewer)
+                    created.append(assignment)
+                else:
+                    updated[assignment.pk] = assignment
+                assignment.role = role
+                assignment.type = group
+
+        from .stats import submission_facets
+        SubmissionStats = apps.get_model('funds', 'SubmissionStats')
+        with transaction.atomic(), SubmissionStats.objects.deferred():
+            self.filter(pk__in=deleted).delete()
+            # Each role can only be held once per submission, so the roles are
+            # cleared before being handed out again
+            self.filter(pk__in=updated).update(role=None)
+            self.bulk_update(updated.values(), ['role', 'type'])
+            self.bulk_create(created)
+            # The bulk queries don't send the signals which keep the stats up to date
+            SubmissionStats.objects.refresh(*submission_ids)
+            submission_facets.invalidate()
 
 
 class AssignedReviewers(models.Model):
@@ -1089,6 +1435,17 @@ class AssignedReviewers(models.Model):
     def __str__(self):
         return f'{self.reviewer}'
 
+    @property
+    def is_reviewed(self):
+        # The same as AssignedReviewersQuerySet.reviewed, from the prefetched
+        # review and opinions
+        if any(opinion.opinion == AGREE for opinion in self.opinions.all()):
+            return True
+        try:
+            return not self.review.is_draft
+        except ObjectDoesNotExist:
+            return False
+
     def __eq__(self, other):
         if not isinstance(other, models.Model):
             return False
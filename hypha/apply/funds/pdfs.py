@@ -0,0 +1,29 @@
+from hypha.apply.utils.pdf_cache import CachedPDF
+from hypha.apply.utils.pdfs import draw_submission_content
+
+from .models import ApplicationSubmission
+
+
+class SubmissionPDF(CachedPDF):
+    model = ApplicationSubmission
+
+    def get_meta(self):
+        return [
+            str(self.object.stage),
+            str(self.object.page),
+            str(self.object.round),
+            f"Lead: { self.object.lead }",
+        ]
+
+    def get_fingerprint(self):
+        # The answers only change with a new live revision
+        return [self.object.live_revision_id, self.object.title, self.get_meta()]
+
+    def get_sections(self):
+        return [
+            {
+                'content': draw_submission_content(self.object.output_text_answers()),
+                'title': 'Submission',
+                'meta': self.get_meta(),
+            },
+        ]
@@ -20,7 +20,8 @@ from hypha.apply.users.groups import STAFF_GROUP_NAME
 from hypha.apply.utils.image import generate_image_tag
 from hypha.images.models import CustomImage
 
-from .models import ApplicationSubmission, Round, ScreeningStatus
+from .models import ApplicationSubmission, ReviewerStats, Round, ScreeningStatus
+from .models.stats import submission_facets
 from .widgets import Select2MultiCheckboxesWidget
 from .workflow import STATUSES, get_review_active_statuses
 
@@ -182,32 +183,33 @@ class SummarySubmissionsTableWithRole(BaseAdminSubmissionsTable):
 
 
 def get_used_rounds(request):
-    return Round.objects.filter(submissions__isnull=False).distinct()
+    return Round.objects.filter(id__in=list(submission_facets.get()['round']))
 
 
 def get_used_funds(request):
     # Use page to pick up on both Labs and Funds
-    return Page.objects.filter(applicationsubmission__isnull=False).distinct()
+    return Page.objects.filter(id__in=list(submission_facets.get()['fund']))
 
 
 def get_round_leads(request):
-    return User.objects.filter(submission_lead__isnull=False).distinct()
+    return User.objects.filter(id__in=list(submission_facets.get()['lead']))
 
 
 def get_reviewers(request):
     """ All assigned reviewers, staff or admin """
-    return User.objects.filter(Q(submissions_reviewer__isnull=False) | Q(groups__name=STAFF_GROUP_NAME) | Q(is_superuser=True)).distinct()
+    return User.objects.filter(
+        Q(id__in=list(submission_facets.get()['reviewers'])) | Q(groups__name=STAFF_GROUP_NAME) | Q(is_superuser=True)
+    ).distinct()
 
 
 def get_screening_statuses(request):
-    return ScreeningStatus.objects.filter(
-        id__in=ApplicationSubmission.objects.all().values('screening_statuses__id').distinct('screening_statuses__id'))
+    return ScreeningStatus.objects.filter(id__in=list(submission_facets.get()['screening_statuses']))
 
 
 def get_meta_terms(request):
     return MetaTerm.objects.filter(
         filter_on_dashboard=True,
-        id__in=ApplicationSubmission.objects.all().values('meta_terms__id').distinct('meta_terms__id'))
+        id__in=list(submission_facets.get()['meta_terms']))
 
 
 class Select2CheckboxWidgetMixin(filters.Filter):
@@ -285,8 +287,15 @@ class SubmissionFilter(filters.FilterSet):
         return queryset
 
 
-class SubmissionFilterAndSearch(SubmissionFilter):
-    query = filters.CharFilter(field_name='search_data', lookup_expr="icontains", widget=forms.HiddenInput)
+class SubmissionSearchMixin(filters.FilterSet):
+    query = filters.CharFilter(method='search_filter', widget=forms.HiddenInput)
+
+    def search_filter(self, queryset, name, value):
+        return queryset.search(value)
+
+
+class SubmissionFilterAndSearch(SubmissionSearchMixin, SubmissionFilter):
+    pass
 
 
 class SubmissionDashboardFilter(filters.FilterSet):
@@ -307,8 +316,8 @@ class SubmissionDashboardFilter(filters.FilterSet):
         }
 
 
-class SubmissionReviewerFilterAndSearch(SubmissionDashboardFilter):
-    query = filters.CharFilter(field_name='search_data', lookup_expr="icontains", widget=forms.HiddenInput)
+class SubmissionReviewerFilterAndSearch(SubmissionSearchMixin, SubmissionDashboardFilter):
+    pass
 
 
 class RoundsTable(tables.Table):
@@ -416,14 +425,16 @@ class ReviewerLeaderboardFilter(filters.FilterSet):
         queryset=get_reviewers,
     )
     funds = Select2ModelMultipleChoiceFilter(
-        field_name='submission__page',
+        field_name='fund',
         label='Funds',
         queryset=get_used_funds,
+        method='filter_reviewed_in',
     )
     rounds = Select2ModelMultipleChoiceFilter(
-        field_name='submission__round',
+        field_name='round',
         label='Rounds',
         queryset=get_used_rounds,
+        method='filter_reviewed_in',
     )
 
     class Meta:
@@ -435,6 +446,13 @@ class ReviewerLeaderboardFilter(filters.FilterSet):
         form = ReviewerLeaderboardFilterForm
         model = User
 
+    def filter_reviewed_in(self, queryset, name, value):
+        # The reviewers with reviews in the funds or rounds, the leaderboard
+        # only counts those reviews
+        if not value:
+            return queryset
+        return queryset.filter(pk__in=ReviewerStats.objects.filter(**{f'{name}__in': value}).values('reviewer'))
+
 
 class ReviewerLeaderboardTable(tables.Table):
     full_name = tables.LinkColumn('funds:submissions:reviewer_leaderboard_detail', args=[A('pk')], orderable=True, verbose_name="Reviewer", attrs={'td': {'class': 'title'}})
@@ -0,0 +1,312 @@
+"""Benchmarks for the funds app.
+
+These are not collected by the normal test run, run them explicitly with:
+
+    python manage.py test hypha.apply.funds.tests.benchmarks
+
+StaffPagesBenchmark reports as JSON so runs can be diffed between commits.
+Set BENCHMARK_OUTPUT to write the report to a file and BENCHMARK_SCALE to
+seed a fraction (or a multiple) of the default volumes.
+"""
+import io
+import json
+import os
+import random
+import time
+from datetime import timedelta
+
+import responses
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+
+from hypha.apply.activity.messaging import MESSAGES, messenger
+from hypha.apply.activity.models import ACTION, ALL, COMMENT, TEAM, Activity
+from hypha.apply.funds.differ import compare
+from hypha.apply.funds.export import SubmissionExporter
+from hypha.apply.funds.forms import BatchUpdateReviewersForm
+from hypha.apply.funds.models import (
+    ApplicationSubmission,
+    AssignedReviewers,
+    ReviewerStats,
+    SubmissionStats,
+)
+from hypha.apply.funds.models.mixins import form_fields_indexes
+from hypha.apply.projects.tests.factories import ProjectFactory
+from hypha.apply.review.models import Review
+from hypha.apply.review.options import MAYBE, NO, YES
+from hypha.apply.review.tests.factories import ReviewFactory
+from hypha.apply.users.groups import REVIEWER_GROUP_NAME, STAFF_GROUP_NAME
+from hypha.apply.users.models import get_group
+from hypha.apply.users.tests.factories import ReviewerFactory, StaffFactory
+from hypha.apply.utils.testing import make_request
+
+from .factories import ApplicationSubmissionFactory, ReviewerRoleFactory
+
+SLACK_URL = 'https://my-slack-backend.com/incoming/my-very-secret-key'
+
+
+@override_settings(ROOT_URLCONF='hypha.apply.urls')
+class StaffPagesBenchmark(TestCase):
+    """
+    Query count, SQL time and the time spent outside of SQL for the pages the
+    staff use most, and the slow operations behind them, against a database
+    the size of a busy instance.
+    """
+    submission_count = 10000
+    round_count = 50
+    reviewer_count = 200
+    activity_count = 100000
+    staff_count = 20
+    project_count = 20
+    # The sizes of the operations measured after the pages
+    render_count = 1000
+    batch_count = 300
+    transition_count = 500
+    compare_word_count = 5000
+    compare_edit_count = 100
+    statuses = [
+        'in_discussion', 'more_info', 'internal_review', 'post_review_discussion',
+        'determination', 'accepted', 'rejected',
+    ]
+
+    @classmethod
+    def scaled(cls, count):
+        return max(int(count * float(os.environ.get('BENCHMARK_SCALE', 1))), 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        cls.staff = StaffFactory.create_batch(cls.staff_count)
+        cls.user = cls.staff[0]
+        reviewers = ReviewerFactory.create_batch(cls.scaled(cls.reviewer_count))
+
+        # One submission in each round is made by the factories, the rest are copies
+        rounds = [
+            ApplicationSubmissionFactory(lead=rng.choice(cls.staff))
+            for _ in range(min(cls.scaled(cls.round_count), cls.round_count))
+        ]
+        cls.submission = rounds[0]
+        fields = ['form_fields', 'form_data', 'page', 'round', 'user', 'search_data']
+        ApplicationSubmission.objects.bulk_create(
+            (
+                ApplicationSubmission(
+                    lead=rng.choice(cls.staff),
+                    status=rng.choice(cls.statuses),
+                    **{field: getattr(submission, field) for field in fields},
+                )
+                for submission in (
+                    rng.choice(rounds)
+                    for _ in range(cls.scaled(cls.submission_count) - len(rounds))
+                )
+            ),
+            batch_size=1000,
+        )
+        submission_ids = list(ApplicationSubmission.objects.values_list('id', flat=True))
+
+        # Two reviewers and a member of staff on each submission, one of them has reviewed
+        reviewer_group = get_group(REVIEWER_GROUP_NAME)
+        staff_group = get_group(STAFF_GROUP_NAME)
+        AssignedReviewers.objects.bulk_create(
+            (
+                assigned
+                for submission_id in submission_ids
+                for assigned in [
+                    *(
+                        AssignedReviewers(submission_id=submission_id, reviewer=reviewer, type=reviewer_group)
+                        for reviewer in rng.sample(reviewers, min(2, len(reviewers)))
+                    ),
+                    AssignedReviewers(submission_id=submission_id, reviewer=rng.choice(cls.staff), type=staff_group),
+                ]
+            ),
+            batch_size=5000,
+        )
+        review = ReviewFactory(submission=cls.submission)
+        authors = {}
+        for assigned in AssignedReviewers.objects.filter(type=reviewer_group).exclude(submission=cls.submission):
+            authors.setdefault(assigned.submission_id, assigned)
+        Review.objects.bulk_create(
+            (
+                Review(
+                    submission_id=author.submission_id,
+                    author=author,
+                    form_fields=review.form_fields,
+                    form_data=review.form_data,
+                    recommendation=rng.choice([NO, MAYBE, YES]),
+                    score=rng.randint(0, 20),
+                )
+                for author in authors.values()
+            ),
+            batch_size=1000,
+        )
+
+        submission_type = ContentType.objects.get_for_model(ApplicationSubmission)
+        now = timezone.now()
+        Activity.objects.bulk_create(
+            (
+                Activity(
+                    type=rng.choice([COMMENT, ACTION]),
+                    user=rng.choice(cls.staff),
+                    source_content_type=submission_type,
+                    source_object_id=rng.choice(submission_ids),
+                    timestamp=now - timedelta(minutes=i),
+                    message='An update on the submission',
+                    visibility=rng.choice([ALL, TEAM]),
+                )
+                for i in range(cls.scaled(cls.activity_count))
+            ),
+            batch_size=5000,
+        )
+        SubmissionStats.objects.refresh(*submission_ids)
+        list(ReviewerStats.objects.rebuild())
+
+        for submission in rounds[:cls.project_count]:
+            ProjectFactory(submission=submission, lead=rng.choice(cls.staff))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_pages(self):
+        submission = self.submission
+        return {
+            'dashboard': reverse('dashboard:dashboard'),
+            'submission_overview': reverse('funds:submissions:overview'),
+            'submission_list': reverse('funds:submissions:list'),
+            'submission_detail': reverse('funds:submissions:detail', kwargs={'pk': submission.id}),
+            'review_list': reverse('funds:submissions:reviews:list', kwargs={'submission_pk': submission.id}),
+            'round_list': reverse('funds:rounds:list'),
+            'reviewer_leaderboard': reverse('funds:submissions:reviewer_leaderboard'),
+            'api_submission_list': reverse('api:v1:submissions-list'),
+            'api_submission_detail': reverse('api:v1:submissions-detail', kwargs={'pk': submission.id}),
+        }
+
+    def measure(self, url):
+        def get_page():
+            response = self.client.get(url, secure=True)
+            # Streamed and lazily rendered content is part of the page
+            if response.streaming:
+                b''.join(response.streaming_content)
+            self.assertEqual(response.status_code, 200, url)
+
+        return self.measure_operation(get_page)
+
+    def measure_operation(self, operation):
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            operation()
+        total_time = time.perf_counter() - start
+
+        sql_time = sum(float(query['time']) for query in queries.captured_queries)
+        return {
+            'queries': len(queries),
+            'sql_time': round(sql_time, 4),
+            'render_time': round(total_time - sql_time, 4),
+            'total_time': round(total_time, 4),
+        }
+
+    def render_answers(self):
+        # Without the shared form fields indexes or cached answers
+        form_fields_indexes.clear()
+        submissions = ApplicationSubmission.objects.order_by('id')[:self.scaled(self.render_count)]
+        return lambda: [submission.render_answers() for submission in submissions]
+
+    def export_csv(self):
+        return lambda: SubmissionExporter().write_csv(io.StringIO())
+
+    def compare_revisions(self):
+        # A long answer split into paragraphs and a copy with words changed,
+        # added and removed throughout
+        rng = random.Random(0)
+        vocabulary = [f'word{i}' for i in range(2000)] + ['the', 'and', 'of', 'to', 'a'] * 200
+        words = [rng.choice(vocabulary) for _ in range(self.compare_word_count)]
+        edited = list(words)
+        for _ in range(self.compare_edit_count):
+            position = rng.randrange(len(edited))
+            action = rng.choice(['change', 'add', 'remove'])
+            if action == 'change':
+                edited[position] = rng.choice(vocabulary)
+            elif action == 'add':
+                edited.insert(position, rng.choice(vocabulary))
+            else:
+                del edited[position]
+
+        def to_html(words):
+            paragraphs = [' '.join(words[i:i + 100]) + '.' for i in range(0, len(words), 100)]
+            return ''.join(f'<p>{paragraph}</p>\n' for paragraph in paragraphs)
+
+        answers = to_html(words), to_html(edited)
+        return lambda: compare(*answers)
+
+    def batch_update_reviewers(self):
+        submissions = ApplicationSubmission.objects.order_by('id').values_list('id', flat=True)
+        roles = ReviewerRoleFactory.create_batch(2)
+        form = BatchUpdateReviewersForm(data={
+            'submissions': ','.join(str(submission) for submission in submissions[:self.scaled(self.batch_count)]),
+            **{
+                f'role_reviewer_{slugify(str(role))}': reviewer.id
+                for role, reviewer in zip(roles, self.staff)
+            },
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.save
+
+    def batch_transition(self):
+        submissions = ApplicationSubmission.objects.order_by('id')[:self.scaled(self.transition_count)]
+        old_phase = self.submission.workflow['in_discussion']
+        transitions = {submission.id: old_phase for submission in submissions}
+        return lambda: messenger(
+            MESSAGES.BATCH_TRANSITION,
+            request=make_request(self.user),
+            user=self.user,
+            sources=ApplicationSubmission.objects.filter(id__in=transitions),
+            related=transitions,
+        )
+
+    def get_operations(self):
+        # Each is set up outside of the measurement and returns what to measure
+        return {
+            'render_answers': self.render_answers,
+            'export_csv': self.export_csv,
+            'compare_revisions': self.compare_revisions,
+            'batch_update_reviewers': self.batch_update_reviewers,
+            'batch_transition': self.batch_transition,
+        }
+
+    @responses.activate
+    @override_settings(SEND_MESSAGES=True, SLACK_DESTINATION_URL=SLACK_URL, SLACK_DESTINATION_ROOM='#submissions')
+    def test_pages(self):
+        responses.add(responses.POST, SLACK_URL, status=200, body='OK')
+        pages = {}
+        for name, url in self.get_pages().items():
+            cache.clear()
+            pages[name] = {
+                'cold': self.measure(url),
+                # With whatever the first request cached
+                'warm': self.measure(url),
+            }
+
+        operations = {}
+        for name, prepare in self.get_operations().items():
+            cache.clear()
+            operations[name] = self.measure_operation(prepare())
+
+        report = json.dumps({
+            'volumes': {
+                'submissions': ApplicationSubmission.objects.count(),
+                'rounds': ApplicationSubmission.objects.values('round').distinct().count(),
+                'reviewers': self.scaled(self.reviewer_count),
+                'activities': Activity.objects.count(),
+            },
+            'pages': pages,
+            'operations': operations,
+        }, indent=2)
+        output = os.environ.get('BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as report_file:
+                report_file.write(report)
+        print(f'\n{report}')
@@ -0,0 +1,82 @@
+import csv
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from hypha.apply.funds.export import SubmissionExporter
+from hypha.apply.funds.models import ApplicationSubmission
+
+from .factories import ApplicationSubmissionFactory, ScreeningStatusFactory
+
+
+@override_settings(ROOT_URLCONF='hypha.apply.urls')
+class TestExportSubmissions(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def export(self, *args, extension='csv'):
+        output = os.path.join(self.directory.name, f'export.{extension}')
+        out = StringIO()
+        call_command('export_submissions', '--output', output, *args, stdout=out)
+        return output, out.getvalue()
+
+    def read_csv(self, *args):
+        output, _ = self.export(*args)
+        with open(output, newline='') as csvfile:
+            return list(csv.reader(csvfile))
+
+    def test_export_all_columns(self):
+        submission = ApplicationSubmissionFactory(
+            form_fields__char__field_label='Region',
+            form_data__char='Europe',
+        )
+        submission.screening_statuses.add(ScreeningStatusFactory(title='Screened'))
+
+        header, row = self.read_csv()
+        self.assertEqual(header, [column.header for column in SubmissionExporter.columns.values()])
+        values = dict(zip(SubmissionExporter.columns, row))
+        self.assertEqual(values['id'], str(submission.id))
+        self.assertEqual(values['title'], submission.title)
+        self.assertEqual(values['email'], submission.email)
+        self.assertEqual(values['phase'], str(submission.phase))
+        self.assertEqual(values['screening'], 'Screened')
+        self.assertEqual(values['region'], 'Europe')
+        self.assertEqual(values['country'], '')
+        self.assertEqual(values['fund'], str(submission.round))
+
+    def test_export_selected_columns(self):
+        submission = ApplicationSubmissionFactory()
+        rows = self.read_csv('--columns', 'id,title')
+        self.assertEqual(rows, [
+            ['Submission ID', 'Submission title'],
+            [str(submission.id), submission.title],
+        ])
+
+    def test_unknown_column(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown columns: colour'):
+            self.export('--columns', 'id,colour')
+
+    def test_export_since(self):
+        old = ApplicationSubmissionFactory()
+        ApplicationSubmission.objects.filter(id=old.id).update(submit_time=timezone.now() - timedelta(days=5))
+        recent = ApplicationSubmissionFactory()
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        rows = self.read_csv('--columns', 'id', '--since', since)
+        self.assertEqual(rows, [['Submission ID'], [str(recent.id)]])
+
+    def test_export_in_chunks(self):
+        submissions = ApplicationSubmissionFactory.create_batch(3)
+        rows = self.read_csv('--columns', 'id', '--chunk-size', '2')
+        self.assertEqual(rows[1:], [[str(submission.id)] for submission in submissions])
+
+    def test_export_xlsx(self):
+        ApplicationSubmissionFactory.create_batch(2)
+        output, out = self.export('--format', 'xlsx', extension='xlsx')
+        self.assertIn('Exported 2 submissions', out)
+        self.assertTrue(os.path.getsize(output))
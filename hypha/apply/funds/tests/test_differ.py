@@ -0,0 +1,67 @@
+from django.test import SimpleTestCase
+
+from hypha.apply.funds.differ import compare, get_opcodes, tokenize
+
+
+class TestTokenize(SimpleTestCase):
+    def test_keeps_tags_and_entities_whole(self):
+        self.assertEqual(
+            tokenize('<h4>Fish &amp; chips</h4>'),
+            ['<h4>', 'Fish', ' ', '&amp;', ' ', 'chips', '</h4>'],
+        )
+
+    def test_tokens_join_to_text(self):
+        text = 'Budget: 1,000 USD <br>\n● x < y'
+        self.assertEqual(''.join(tokenize(text)), text)
+
+
+class TestGetOpcodes(SimpleTestCase):
+    def opcodes(self, a, b):
+        a, b = tokenize(a), tokenize(b)
+        return [
+            (tag, ''.join(a[a0:a1]), ''.join(b[b0:b1]))
+            for tag, a0, a1, b0, b1 in get_opcodes(a, b)
+        ]
+
+    def test_identical(self):
+        self.assertEqual(self.opcodes('one two', 'one two'), [('equal', 'one two', 'one two')])
+
+    def test_insert(self):
+        self.assertEqual(self.opcodes('one three', 'one two three'), [
+            ('equal', 'one ', 'one '),
+            ('insert', '', 'two '),
+            ('equal', 'three', 'three'),
+        ])
+
+    def test_changed_words_are_grouped(self):
+        self.assertEqual(self.opcodes('we will build a tool', 'we will write the docs'), [
+            ('equal', 'we will ', 'we will '),
+            ('replace', 'build a tool', 'write the docs'),
+        ])
+
+    def test_moved_paragraph(self):
+        a = 'First part. Second part. Third part.'
+        b = 'Second part. First part. Third part.'
+        opcodes = self.opcodes(a, b)
+        self.assertEqual(''.join(old for _, old, _ in opcodes), a)
+        self.assertEqual(''.join(new for _, _, new in opcodes), b)
+        tag, old, _ = opcodes[-1]
+        self.assertEqual(tag, 'equal')
+        self.assertTrue(old.endswith(' Third part.'))
+
+
+class TestCompare(SimpleTestCase):
+    def test_marks_changes(self):
+        from_display, to_display = compare('<p>Hello big world</p>', '<p>Hello small world</p>')
+        self.assertEqual(from_display, 'Hello <span class="diff diff__deleted">big</span> world')
+        self.assertEqual(to_display, 'Hello <span class="diff diff__added">small</span> world')
+
+    def test_list_items(self):
+        from_display, to_display = compare('<ul><li>One</li></ul>', '<ul><li>One</li><li>Two</li></ul>')
+        self.assertEqual(from_display, '<br>● One')
+        self.assertEqual(to_display, '<br>● One<span class="diff diff__added"><br>● Two</span>')
+
+    def test_whitespace_around_list_items_ignored(self):
+        from_display, to_display = compare('<ul>\n<li>One</li>\n</ul>', '<ul><li>One</li></ul>')
+        self.assertEqual(from_display, '<br>● One')
+        self.assertEqual(to_display, '<br>● One')
@@ -61,18 +61,16 @@ class TestReviewerFormQueries(TestCase):
 
         self.assertTrue(form.is_valid())
 
+        # 2 - savepoint
         # 1 - Submission
-        # 24 - 12 per role =
-        #    1 - delete role no review
-        #    1 - select review
-        #    2 - cascades
-        #    1 - update role with review
-        #    1 - auth group
-        #    2 - savepoint
-        #    1 - get
-        #    1 - update
-        #    2 - release savepoint
-        with self.assertNumQueries(25):
+        # 1 - Assigned reviewers
+        # 1 - auth group
+        # 2 - savepoint
+        # 1 - clear roles
+        # 1 - update roles
+        # 1 - invalidate submission facets
+        # 1 - update stats
+        with self.assertNumQueries(11):
             form.save()
 
     def test_queries_reviewers_swap(self):
@@ -90,6 +88,7 @@ class TestReviewerFormQueries(TestCase):
 
         self.assertTrue(form.is_valid())
 
+        # 2 - savepoint
         # 1 - Submission
         # 1 - Select Review
         # 2 - Cascase
@@ -97,7 +96,9 @@ class TestReviewerFormQueries(TestCase):
         # 1 - Cache existing
         # 1 - auth group
         # 1 - Add new
-        with self.assertNumQueries(8):
+        # 1 - Invalidate submission facets
+        # 1 - Update stats
+        with self.assertNumQueries(12):
             form.save()
 
     def test_queries_existing_reviews(self):
@@ -115,9 +116,13 @@ class TestReviewerFormQueries(TestCase):
 
         self.assertTrue(form.is_valid())
 
+        # 2 - savepoint
         # 1 - Submission
         # 1 - Delete old
         # 1 - Cache existing
+        # 1 - auth group
         # 1 - Add new
-        with self.assertNumQueries(5):
+        # 1 - Invalidate submission facets
+        # 1 - Update stats
+        with self.assertNumQueries(9):
             form.save()
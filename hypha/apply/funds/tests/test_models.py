@@ -1,21 +1,46 @@
 import itertools
 import os
 from datetime import date, timedelta
+from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.models import AnonymousUser, Group
 from django.core import mail
-from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import IntegrityError, transaction
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
+from hypha.apply.activity.tests.factories import CommentFactory
+from hypha.apply.flags.models import Flag
 from hypha.apply.funds.blocks import EmailBlock, FullNameBlock
-from hypha.apply.funds.models import ApplicationSubmission, Reminder
-from hypha.apply.funds.workflow import Request
-from hypha.apply.review.options import MAYBE, NO
+from hypha.apply.funds.models import (
+    ApplicationSubmission,
+    AssignedReviewers,
+    Reminder,
+    ReviewerStats,
+    SubmissionStats,
+)
+from hypha.apply.funds.models.reviewer_role import reviewer_role_cache
+from hypha.apply.funds.models.screening import screening_status_cache
+from hypha.apply.funds.models.stats import submission_facets
+from hypha.apply.funds.models.submissions import deleting_submissions
+from hypha.apply.funds.workflow import Request, UserPermissions
+from hypha.apply.review.models import Review
+from hypha.apply.review.options import MAYBE, NA, NO
 from hypha.apply.review.tests.factories import ReviewFactory, ReviewOpinionFactory
-from hypha.apply.users.tests.factories import StaffFactory
+from hypha.apply.users.groups import REVIEWER_GROUP_NAME
+from hypha.apply.users.models import get_group
+from hypha.apply.users.tests.factories import (
+    ApplicantFactory,
+    GroupFactory,
+    ReviewerFactory,
+    StaffFactory,
+    SuperUserFactory,
+)
 from hypha.apply.utils.testing import make_request
 
 from .factories import (
@@ -27,7 +52,9 @@ from .factories import (
     LabFactory,
     ReminderFactory,
     RequestForPartnersFactory,
+    ReviewerRoleFactory,
     RoundFactory,
+    ScreeningStatusFactory,
     TodayRoundFactory,
 )
 
@@ -405,6 +432,58 @@ class TestApplicationSubmission(TestCase):
         submission = self.make_submission(form_data__number=value)
         self.assertNotIn(str(value), submission.search_data)
 
+    def test_search_matches_word_prefixes(self):
+        submission = self.make_submission(form_data__char='Decentralised technology')
+        self.make_submission(form_data__char='Something else')
+        self.assertEqual(list(ApplicationSubmission.objects.search('decentral tech')), [submission])
+
+    def test_search_ranks_title_above_answers(self):
+        in_answer = self.make_submission(form_data__char='bicycles')
+        in_title = self.make_submission(form_data__title='bicycles')
+        self.assertEqual(list(ApplicationSubmission.objects.search('bicycles')), [in_title, in_answer])
+
+    def test_search_ignores_query_operators(self):
+        submission = self.make_submission(form_data__title="It's a wonderful life")
+        self.assertEqual(list(ApplicationSubmission.objects.search("wonderful & !(life) :*")), [submission])
+        self.assertEqual(list(ApplicationSubmission.objects.search('& |')), [submission])
+
+    def test_search_of_stop_words_matches_text(self):
+        submission = self.make_submission(form_data__title='To be or not to be')
+        self.make_submission(form_data__title='Something else')
+        self.assertEqual(list(ApplicationSubmission.objects.search('to be')), [submission])
+
+    def test_search_is_one_query(self):
+        self.make_submission(form_data__title='To be or not to be')
+        for query in ['to be', 'not bicycles']:
+            with self.assertNumQueries(1):
+                list(ApplicationSubmission.objects.search(query))
+
+    def test_search_document_built_when_missing(self):
+        submission = self.make_submission(form_data__title='bicycles')
+        ApplicationSubmission.objects.update(search_document=None)
+        self.refresh(submission).save()
+        self.assertEqual(list(ApplicationSubmission.objects.search('bicycles')), [submission])
+
+    def test_search_document_not_rebuilt_if_unchanged(self):
+        submission = self.make_submission()
+        submission = self.refresh(submission)
+        with patch.object(ApplicationSubmission, 'search_vector') as search_vector:
+            submission.save()
+        search_vector.assert_not_called()
+
+    def test_search_document_rebuilt_on_new_revision(self):
+        submission = self.make_submission()
+        submission.form_data['title'] = 'A brand new title'
+        submission.create_revision()
+        self.assertEqual(list(ApplicationSubmission.objects.search('brand new')), [submission])
+
+    def test_rebuild_search(self):
+        submission = self.make_submission(form_data__title='bicycles')
+        ApplicationSubmission.objects.update(search_document=None)
+        self.assertEqual(list(ApplicationSubmission.objects.search('bicycles')), [])
+        list(ApplicationSubmission.objects.rebuild_search())
+        self.assertEqual(list(ApplicationSubmission.objects.search('bicycles')), [submission])
+
     def test_file_gets_uploaded(self):
         filename = 'file_name.png'
         submission = self.make_submission(form_data__image__filename=filename)
@@ -498,6 +577,127 @@ class TestApplicationSubmission(TestCase):
         self.assertTrue(submission.in_final_stage)
 
 
+class TestFormFieldsIndex(TestCase):
+    def test_index_shared_for_identical_form_fields(self):
+        submission = ApplicationSubmissionFactory()
+        ApplicationSubmissionFactory(round=submission.round, form_fields=submission.form_fields)
+        submission_a, submission_b = ApplicationSubmission.objects.all()
+
+        self.assertIsNot(submission_a.form_fields, submission_b.form_fields)
+        self.assertIs(submission_a.form_fields_index, submission_b.form_fields_index)
+
+    def test_index_not_shared_for_different_form_fields(self):
+        ApplicationSubmissionFactory.create_batch(2)
+        submission_a, submission_b = ApplicationSubmission.objects.all()
+
+        self.assertIsNot(submission_a.form_fields_index, submission_b.form_fields_index)
+
+    def test_index_updated_when_form_fields_reassigned(self):
+        submission = ApplicationSubmissionFactory()
+        other = ApplicationSubmissionFactory()
+        submission = ApplicationSubmission.objects.get(id=submission.id)
+        self.assertNotEqual(set(submission.question_field_ids), set(other.question_field_ids))
+
+        submission.form_fields = other.form_fields
+        self.assertEqual(list(submission.question_field_ids), list(other.question_field_ids))
+
+    def test_data_follows_reassigned_form_data(self):
+        submission = ApplicationSubmissionFactory()
+        field_id = submission.get_definitive_id('title')
+        submission.form_data = {field_id: 'New title'}
+        self.assertEqual(submission.data('title'), 'New title')
+
+        submission.form_data = {'title': 'Named title'}
+        self.assertEqual(submission.data('title'), 'Named title')
+        self.assertEqual(submission.data(field_id), 'Named title')
+
+
+class TestSubmissionTransitions(TestCase):
+    def test_staff_actions_from_workflow(self):
+        staff = StaffFactory()
+        for status, phase in Request.items():
+            submission = ApplicationSubmissionFactory(status=status)
+            self.assertEqual(
+                list(submission.get_actions_for_user(staff)),
+                [
+                    (target, action['display'])
+                    for target, action in phase.transitions.items()
+                    if UserPermissions.STAFF in action['permissions']
+                ],
+            )
+
+    def test_applicant_actions(self):
+        submission = ApplicationSubmissionFactory()
+        self.assertEqual(list(submission.get_actions_for_user(submission.user)), [])
+        submission = ApplicationSubmissionFactory(status='more_info')
+        self.assertEqual(list(submission.get_actions_for_user(submission.user)), [('in_discussion', 'Submit')])
+
+    def test_lead_has_actions(self):
+        submission = ApplicationSubmissionFactory()
+        lead = ApplicantFactory()
+        submission.lead = lead
+        self.assertEqual(
+            list(submission.get_actions_for_user(lead)),
+            list(submission.get_actions_for_user(StaffFactory())),
+        )
+
+    def test_actions_dont_query(self):
+        staff = StaffFactory()
+        # Loads the roles of the user, which are kept on it, before counting
+        self.assertTrue(staff.is_apply_staff)
+        submissions = ApplicationSubmissionFactory.create_batch(3)
+        with self.assertNumQueries(0):
+            for submission in submissions:
+                list(submission.get_actions_for_user(staff))
+
+    def test_invalid_transition(self):
+        submission = ApplicationSubmissionFactory()
+        with self.assertRaisesMessage(PermissionDenied, 'Invalid "proposal_accepted" transition'):
+            submission.perform_transition('proposal_accepted', StaffFactory())
+
+
+@override_settings(ROOT_URLCONF='hypha.apply.urls')
+class TestPerformTransitions(TestCase):
+    def test_perform_transitions(self):
+        staff = StaffFactory()
+        # Loads the roles of the user, which are kept on it, before counting
+        self.assertTrue(staff.is_apply_staff)
+        submissions = ApplicationSubmissionFactory.create_batch(3)
+        determined = ApplicationSubmissionFactory(status='rejected')
+        queryset = ApplicationSubmission.objects.filter(id__in=[s.id for s in [*submissions, determined]])
+
+        # Loading the submissions and a single update, in a savepoint
+        with self.assertNumQueries(4):
+            phase_changes, failed = queryset.order_by('id').perform_transitions(['internal_review'], staff)
+
+        self.assertEqual(failed, [determined])
+        self.assertEqual(set(phase_changes), {submission.id for submission in submissions})
+        self.assertEqual(str(phase_changes[submissions[0].id]), str(submissions[0].phase))
+        self.assertEqual(
+            list(queryset.order_by('id').values_list('status', flat=True)),
+            ['internal_review'] * 3 + ['rejected'],
+        )
+
+    def test_checks_user(self):
+        submission = ApplicationSubmissionFactory()
+        phase_changes, failed = ApplicationSubmission.objects.filter(id=submission.id).perform_transitions(
+            ['internal_review'], submission.user,
+        )
+        self.assertEqual(phase_changes, {})
+        self.assertEqual(failed, [submission])
+        self.assertEqual(ApplicationSubmission.objects.get(id=submission.id).status, 'in_discussion')
+
+    def test_progresses_stage(self):
+        submission = ApplicationSubmissionFactory(workflow_stages=2, status='concept_review_discussion')
+        staff = StaffFactory()
+        ApplicationSubmission.objects.filter(id=submission.id).perform_transitions(
+            ['invited_to_proposal'], staff, request=make_request(staff),
+        )
+        submission = ApplicationSubmission.objects.get(id=submission.id)
+        self.assertEqual(submission.status, 'invited_to_proposal')
+        self.assertEqual(submission.next.status, 'draft_proposal')
+
+
 @override_settings(ROOT_URLCONF='hypha.apply.urls')
 class TestSubmissionRenderMethods(TestCase):
     def test_named_blocks_not_included_in_answers(self):
@@ -561,6 +761,32 @@ class TestSubmissionRenderMethods(TestCase):
             else:
                 file_url_in_answers(file_response)
 
+    def test_answers_cached_for_live_revision(self):
+        submission = ApplicationSubmissionFactory()
+        answers = submission.output_answers()
+        with patch.object(ApplicationSubmission, 'render_answers') as render_answers:
+            self.assertEqual(submission.output_answers(), answers)
+        render_answers.assert_not_called()
+
+    def test_new_revision_prerenders_answers(self):
+        submission = ApplicationSubmissionFactory()
+        old_key = submission.rendered_answers_cache_key('all', True)
+        submission.create_revision(force=True)
+        key = submission.rendered_answers_cache_key('all', True)
+        self.assertNotEqual(key, old_key)
+        self.assertEqual(cache.get(key), ''.join(submission.render_answers()))
+
+    def test_draft_answers_not_cached(self):
+        submission = ApplicationSubmissionFactory()
+        submission.create_revision(draft=True, force=True)
+        self.assertIsNone(submission.from_draft().rendered_answers_cache_key('all', True))
+
+    @override_settings(RENDERED_ANSWERS_CACHE_MAX_SIZE=0)
+    def test_long_answers_not_cached(self):
+        submission = ApplicationSubmissionFactory()
+        submission.output_answers()
+        self.assertIsNone(cache.get(submission.rendered_answers_cache_key('all', True)))
+
 
 class TestRequestForPartners(TestCase):
     def test_message_when_no_round(self):
@@ -675,6 +901,312 @@ class TestForTableQueryset(TestCase):
         self.assertEqual(submission.review_recommendation, NO)
 
 
+class TestForDetailQueryset(TestCase):
+    def setUp(self):
+        self.staff = StaffFactory()
+        self.reviewer = ReviewerFactory()
+        self.submission = ApplicationSubmissionFactory()
+        review = ReviewFactory(submission=self.submission, author__reviewer=self.staff, author__staff=True)
+        ReviewOpinionFactory(review=review, opinion_agree=True)
+        ReviewFactory(submission=self.submission, is_draft=True)
+        AssignedReviewersFactory(submission=self.submission, reviewer=self.reviewer)
+        AssignedReviewersFactory(submission=self.submission, staff=True)
+        self.submission.screening_statuses.add(ScreeningStatusFactory(default=True, yes=True))
+        Flag.objects.create(target=self.submission, user=self.staff, type=Flag.STAFF)
+
+    def get_helpers(self, submission):
+        return {
+            'has_default_screening_status_set': submission.has_default_screening_status_set,
+            'has_yes_default_screening_status_set': submission.has_yes_default_screening_status_set,
+            'has_no_default_screening_status_set': submission.has_no_default_screening_status_set,
+            'can_not_edit_default': submission.can_not_edit_default,
+            'supports_default_screening': submission.supports_default_screening,
+            'missing_reviewers': set(submission.missing_reviewers),
+            'staff_not_reviewed': set(submission.staff_not_reviewed),
+            'reviewers_not_reviewed': set(submission.reviewers_not_reviewed),
+            'flagged_staff': submission.flagged_staff,
+            'flagged_by': submission.flagged_by(self.staff),
+            'reviewed_by_staff': submission.reviewed_by(self.staff),
+            'reviewed_by_reviewer': submission.reviewed_by(self.reviewer),
+        }
+
+    def test_matches_queries(self):
+        submission = ApplicationSubmission.objects.for_detail().get(id=self.submission.id)
+        self.assertEqual(self.get_helpers(submission), self.get_helpers(self.submission))
+
+    def test_missing_reviewers_once_and_superusers_as_staff(self):
+        missing = len(self.submission.missing_reviewers)
+        superuser = SuperUserFactory()
+        AssignedReviewersFactory(submission=self.submission, reviewer=superuser)
+        AssignedReviewersFactory(submission=self.submission, reviewer=self.reviewer, staff=True)
+        submission = ApplicationSubmission.objects.for_detail().get(id=self.submission.id)
+        for submission in [submission, self.submission]:
+            self.assertEqual(len(submission.missing_reviewers), missing + 1)
+            self.assertIn(superuser, submission.staff_not_reviewed)
+
+    def test_helpers_dont_query(self):
+        submission = ApplicationSubmission.objects.for_detail().get(id=self.submission.id)
+        with self.assertNumQueries(0):
+            helpers = self.get_helpers(submission)
+        self.assertIn(self.reviewer, helpers['reviewers_not_reviewed'])
+        self.assertTrue(helpers['reviewed_by_staff'])
+        self.assertTrue(helpers['flagged_staff'])
+
+    def test_roles_assigned_only_counts_roles(self):
+        expected = self.submission.has_all_reviewer_roles_assigned
+        submission = ApplicationSubmission.objects.for_detail().get(id=self.submission.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(submission.has_all_reviewer_roles_assigned, expected)
+
+
+@override_settings(
+    REFERENCE_CACHE_TIMEOUT=60,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class TestReferenceCaches(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_screening_statuses_cached(self):
+        status = ScreeningStatusFactory(yes=True)
+        self.assertIn(status, screening_status_cache.get())
+        submission = ApplicationSubmissionFactory()
+        with self.assertNumQueries(0):
+            self.assertIn(status.title, submission.yes_screening_statuses)
+
+    def test_screening_statuses_invalidated(self):
+        status = ScreeningStatusFactory(yes=True)
+        screening_status_cache.get()
+        status.title = 'Changed'
+        status.save()
+        self.assertIn('Changed', ApplicationSubmissionFactory().yes_screening_statuses)
+        status.delete()
+        self.assertNotIn(status, screening_status_cache.get())
+
+    def test_changes_to_cached_rows_not_shared(self):
+        ScreeningStatusFactory(yes=True)
+        screening_status_cache.get()[0].title = 'Changed'
+        self.assertNotEqual(screening_status_cache.get()[0].title, 'Changed')
+
+    def test_reviewer_roles_cached(self):
+        ReviewerRoleFactory()
+        submission = ApplicationSubmissionFactory()
+        self.assertFalse(submission.has_all_reviewer_roles_assigned)
+        AssignedReviewersFactory(submission=submission, role=reviewer_role_cache.get()[0])
+        with self.assertNumQueries(1):
+            self.assertTrue(submission.has_all_reviewer_roles_assigned)
+        ReviewerRoleFactory()
+        self.assertFalse(submission.has_all_reviewer_roles_assigned)
+
+    def test_groups_cached(self):
+        group = GroupFactory(name=REVIEWER_GROUP_NAME)
+        self.assertEqual(get_group(REVIEWER_GROUP_NAME), group)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group(REVIEWER_GROUP_NAME), group)
+        group.delete()
+        with self.assertRaises(Group.DoesNotExist):
+            get_group(REVIEWER_GROUP_NAME)
+
+
+@override_settings(
+    FACET_CACHE_TIMEOUT=60,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class TestSubmissionFacets(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_submissions_for_each_option(self):
+        first = ApplicationSubmissionFactory()
+        second = ApplicationSubmissionFactory(round=first.round, lead=first.lead)
+        status = ScreeningStatusFactory()
+        first.screening_statuses.add(status)
+        assigned = AssignedReviewersFactory(submission=second)
+
+        facets = submission_facets.get()
+        self.assertEqual(facets['round'], {first.round_id: 2})
+        self.assertEqual(facets['fund'], {first.page_id: 2})
+        self.assertEqual(facets['lead'], {first.lead_id: 2})
+        self.assertEqual(facets['screening_statuses'], {status.id: 1})
+        self.assertEqual(facets['reviewers'], {assigned.reviewer_id: 1})
+
+    def test_facets_cached(self):
+        ApplicationSubmissionFactory()
+        submission_facets.get()
+        with self.assertNumQueries(0):
+            submission_facets.get()
+
+    def test_facets_invalidated_by_submissions(self):
+        submission = ApplicationSubmissionFactory()
+        submission_facets.get()
+        other = ApplicationSubmissionFactory()
+        self.assertIn(other.round_id, submission_facets.get()['round'])
+        other.delete()
+        self.assertNotIn(other.round_id, submission_facets.get()['round'])
+
+        status = ScreeningStatusFactory()
+        submission.screening_statuses.add(status)
+        self.assertIn(status.id, submission_facets.get()['screening_statuses'])
+
+    def test_facets_only_invalidated_when_grouping_changes(self):
+        submission = ApplicationSubmission.objects.get(id=ApplicationSubmissionFactory().id)
+        version = submission_facets.version.get()
+        submission.search_data = 'Changed answers'
+        submission.save()
+        self.assertEqual(submission_facets.version.get(), version)
+
+        submission.lead = StaffFactory()
+        submission.save()
+        self.assertNotEqual(submission_facets.version.get(), version)
+
+    def test_facets_invalidated_by_bulk_assignment(self):
+        submission = ApplicationSubmissionFactory()
+        submission_facets.get()
+        reviewer = ReviewerFactory()
+        AssignedReviewers.objects.bulk_create_reviewers([reviewer], submission)
+        self.assertIn(reviewer.id, submission_facets.get()['reviewers'])
+
+    def test_deferred_invalidates_once_at_the_end(self):
+        submission = ApplicationSubmissionFactory()
+        version = submission_facets.version.get()
+        with submission_facets.deferred():
+            AssignedReviewersFactory(submission=submission)
+            AssignedReviewersFactory(submission=submission)
+            self.assertEqual(submission_facets.version.get(), version)
+        self.assertNotEqual(submission_facets.version.get(), version)
+
+
+class TestSubmissionStats(TestCase):
+    def test_stats_match_live_values(self):
+        staff = StaffFactory()
+        submission = ApplicationSubmissionFactory()
+        review = ReviewFactory(submission=submission)
+        ReviewOpinionFactory(opinion_disagree=True, review=review, author__reviewer=staff)
+        CommentFactory(source=submission)
+        CommentFactory(source=submission, internal=True)
+
+        self.assertEqual(list(SubmissionStats.objects.inconsistencies()), [])
+
+    def test_comment_count_respects_visibility(self):
+        staff = StaffFactory()
+        submission = ApplicationSubmissionFactory()
+        applicant = submission.user
+        CommentFactory(source=submission)
+        CommentFactory(source=submission, internal=True)
+
+        self.assertEqual(ApplicationSubmission.objects.for_table(staff)[0].comment_count, 2)
+        self.assertEqual(ApplicationSubmission.objects.for_table(applicant)[0].comment_count, 1)
+
+    def test_last_update_from_activity(self):
+        staff = StaffFactory()
+        submission = ApplicationSubmissionFactory()
+        comment = CommentFactory(source=submission)
+
+        submission = ApplicationSubmission.objects.for_table(staff)[0]
+        self.assertEqual(submission.last_update, comment.timestamp)
+        self.assertEqual(submission.last_user_update, comment.user.full_name)
+
+    def test_removing_review_updates_stats(self):
+        staff = StaffFactory()
+        review = ReviewFactory()
+        review.delete()
+
+        submission = ApplicationSubmission.objects.for_table(staff)[0]
+        self.assertEqual(submission.review_count, 1)
+        self.assertEqual(submission.review_submitted_count, None)
+
+    def test_rebuild_restores_stats(self):
+        ReviewFactory()
+        SubmissionStats.objects.all().delete()
+        self.assertNotEqual(list(SubmissionStats.objects.inconsistencies()), [])
+
+        list(SubmissionStats.objects.rebuild())
+        self.assertEqual(list(SubmissionStats.objects.inconsistencies()), [])
+
+    def test_can_delete_submission_with_reviews(self):
+        review = ReviewFactory()
+        CommentFactory(source=review.submission)
+        review.submission.delete()
+
+        self.assertFalse(SubmissionStats.objects.exists())
+
+    def test_failed_delete_doesnt_stop_refreshes(self):
+        submission = ApplicationSubmissionFactory()
+        with patch('django.db.models.Model.delete', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                submission.delete()
+        self.assertEqual(deleting_submissions.ids, set())
+
+        ReviewFactory(submission=submission)
+        self.assertEqual(SubmissionStats.objects.get(submission=submission).review_count, 1)
+
+
+class TestReviewerStats(TestCase):
+    def stats(self, reviewer):
+        return list(ReviewerStats.objects.filter(reviewer=reviewer).values(
+            'fund', 'round', 'month', 'review_count', 'score_count', 'score_total',
+        ))
+
+    def test_submitted_review_is_counted(self):
+        review = ReviewFactory(score=5)
+        ReviewFactory(author__reviewer=review.author.reviewer, is_draft=True)
+        submission = review.submission
+        self.assertEqual(self.stats(review.author.reviewer), [{
+            'fund': submission.page_id,
+            'round': submission.round_id,
+            'month': timezone.localdate(review.created_at).replace(day=1),
+            'review_count': 1,
+            'score_count': 1,
+            'score_total': 5,
+        }])
+
+    def test_reviews_grouped_by_month(self):
+        review = ReviewFactory(score=NA)
+        reviewer = review.author.reviewer
+        other = ReviewFactory(author__reviewer=reviewer, submission__round=review.submission.round)
+        Review.objects.filter(id=other.id).update(created_at=review.created_at - timedelta(days=62))
+        ReviewerStats.objects.refresh(reviewer.id)
+
+        stats = self.stats(reviewer)
+        self.assertEqual(len(stats), 2)
+        self.assertEqual([row['review_count'] for row in stats], [1, 1])
+        self.assertEqual(sorted(row['score_count'] for row in stats), [0, 1])
+
+    def test_removing_review_updates_stats(self):
+        review = ReviewFactory()
+        review.delete()
+        self.assertEqual(self.stats(review.author.reviewer), [])
+
+    def test_rebuild_restores_stats(self):
+        review = ReviewFactory()
+        expected = self.stats(review.author.reviewer)
+        ReviewerStats.objects.all().delete()
+
+        list(ReviewerStats.objects.rebuild())
+        self.assertEqual(self.stats(review.author.reviewer), expected)
+
+    def test_can_delete_reviewer_with_reviews(self):
+        review = ReviewFactory()
+        review.author.reviewer.delete()
+        self.assertFalse(ReviewerStats.objects.exists())
+
+    def test_moving_submission_updates_stats(self):
+        review = ReviewFactory()
+        submission = ApplicationSubmission.objects.get(id=review.submission_id)
+        submission.round = RoundFactory()
+        submission.save()
+        self.assertEqual(
+            [row['round'] for row in self.stats(review.author.reviewer)],
+            [submission.round_id],
+        )
+
+    def test_one_row_for_each_month_without_round(self):
+        stats = {'reviewer': StaffFactory(), 'fund': LabFactory(), 'month': date(2020, 1, 1)}
+        ReviewerStats.objects.create(**stats)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ReviewerStats.objects.create(**stats)
+
+
 class TestReminderModel(TestCase):
 
     def test_can_save_reminder(self):
@@ -1,11 +1,16 @@
+import io
 import re
+import zipfile
 from datetime import timedelta
+from unittest.mock import patch
 
 from bs4 import BeautifulSoup
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import PermissionDenied
+from django.db import connection
 from django.http import Http404
 from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.text import slugify
@@ -29,7 +34,8 @@ from hypha.apply.funds.workflow import INITIAL_STATE
 from hypha.apply.home.factories import ApplySiteFactory
 from hypha.apply.projects.models import Project
 from hypha.apply.projects.tests.factories import ProjectFactory
-from hypha.apply.review.tests.factories import ReviewFactory
+from hypha.apply.review.models import Review
+from hypha.apply.review.tests.factories import ReviewFactory, ReviewOpinionFactory
 from hypha.apply.users.tests.factories import (
     ApplicantFactory,
     CommunityReviewerFactory,
@@ -38,6 +44,8 @@ from hypha.apply.users.tests.factories import (
     StaffFactory,
     SuperUserFactory,
 )
+from hypha.apply.utils.models import PDFPageSettings
+from hypha.apply.utils.pdf_cache import missing_pdf_names
 from hypha.apply.utils.testing import make_request
 from hypha.apply.utils.testing.tests import BaseViewTestCase
 
@@ -45,9 +53,15 @@ from ..models import (
     ApplicationRevision,
     ApplicationSubmission,
     ReviewerSettings,
+    ReviewerStats,
     ScreeningStatus,
 )
-from ..views import SubmissionDetailSimplifiedView, SubmissionDetailView
+from ..pdfs import SubmissionPDF
+from ..views import (
+    SubmissionAdminListView,
+    SubmissionDetailSimplifiedView,
+    SubmissionDetailView,
+)
 from .factories import CustomFormFieldsFactory
 
 
@@ -85,6 +99,31 @@ class TestStaffSubmissionView(BaseSubmissionViewTestCase):
         response = self.get_page(self.submission)
         self.assertContains(response, self.submission.title)
 
+    def count_page_queries(self, submission):
+        # Once whatever the page caches has been cached
+        self.get_page(submission)
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(submission)
+        return len(queries)
+
+    def add_reviews(self, submission, count):
+        for _ in range(count):
+            review = ReviewFactory(submission=submission, author__staff=True)
+            ReviewOpinionFactory(review=review, opinion_agree=True)
+
+    def test_detail_page_query_budget(self):
+        # The number of queries doesn't grow with the reviews and statuses
+        submission = ApplicationSubmissionFactory()
+        submission.screening_statuses.add(ScreeningStatus.objects.filter(yes=True, default=True).first())
+        self.add_reviews(submission, 1)
+        before = self.count_page_queries(submission)
+        self.add_reviews(submission, 3)
+        submission.screening_statuses.add(ScreeningStatusFactory(yes=True))
+        after = self.count_page_queries(submission)
+        self.assertEqual(after, before)
+        # Includes reading the rendered answers from the database cache of the tests
+        self.assertEqual(after, 82)
+
     def test_can_view_a_lab_submission(self):
         submission = LabSubmissionFactory()
         response = self.get_page(submission)
@@ -1124,6 +1163,32 @@ class TestRevisionCompare(BaseSubmissionViewTestCase):
         response = self.get_page(submission)
         self.assertEqual(response.status_code, 200)
 
+    def test_diffs_cached(self):
+        submission = ApplicationSubmissionFactory()
+        submission.form_data = ApplicationSubmissionFactory(
+            round=submission.round, form_fields=submission.form_fields,
+        ).form_data
+        submission.create_revision()
+
+        response = self.get_page(submission)
+        with patch('hypha.apply.funds.views.compare') as compare:
+            cached_response = self.get_page(submission)
+        compare.assert_not_called()
+        self.assertEqual(cached_response.context['stream_fields'], response.context['stream_fields'])
+        self.assertEqual(cached_response.context['required_fields'], response.context['required_fields'])
+
+    def test_draft_not_cached(self):
+        submission = ApplicationSubmissionFactory()
+        draft = ApplicationRevisionFactory(submission=submission, form_data=submission.form_data)
+        submission.draft_revision = draft
+        submission.save()
+        kwargs = {'submission_pk': submission.pk, 'from': submission.live_revision.id, 'to': draft.id}
+
+        self.get_page(submission, url_kwargs=kwargs)
+        with patch('hypha.apply.funds.views.compare', return_value=('', '')) as compare:
+            self.get_page(submission, url_kwargs=kwargs)
+        compare.assert_called()
+
 
 class TestRevisionList(BaseSubmissionViewTestCase):
     base_view_name = 'revisions:list'
@@ -1314,6 +1379,155 @@ class TestSubmissionDetailSimplifiedView(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class TestSubmissionDetailPDFView(BaseSubmissionViewTestCase):
+    base_view_name = 'download'
+    user_factory = StaffFactory
+
+    def test_download_is_cached(self):
+        submission = ProjectFactory().submission
+        response = self.get_page(submission)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.filename, submission.title + '.pdf')
+
+        with patch('hypha.apply.utils.pdf_cache.make_pdf') as make_pdf:
+            response = self.get_page(submission)
+        make_pdf.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_revision_rebuilds_pdf(self):
+        submission = ProjectFactory().submission
+        self.get_page(submission)
+        submission.form_data = {**submission.form_data, 'title': 'A new title'}
+        submission.create_revision()
+
+        response = self.get_page(submission)
+        self.assertEqual(response.filename, 'A new title.pdf')
+
+    def test_new_revision_deletes_old_pdf(self):
+        submission = ProjectFactory().submission
+        old_pdf = SubmissionPDF(submission, 'A4')
+        old_pdf.save()
+        submission.form_data = {**submission.form_data, 'title': 'A new title'}
+        submission.create_revision()
+
+        new_pdf = SubmissionPDF(submission, 'A4')
+        new_pdf.save()
+        self.assertTrue(new_pdf.exists())
+        self.assertFalse(old_pdf.storage.exists(old_pdf.name))
+        self.assertEqual(missing_pdf_names([old_pdf.name, new_pdf.name]), [old_pdf.name])
+
+    def test_other_page_sizes_kept(self):
+        submission = ProjectFactory().submission
+        a4_pdf = SubmissionPDF(submission, PDFPageSettings.A4)
+        a4_pdf.save()
+        SubmissionPDF(submission, PDFPageSettings.LEGAL).save()
+        self.assertTrue(a4_pdf.exists())
+
+    def test_failing_pdf_stops_being_queued(self):
+        submission = ProjectFactory().submission
+        with patch('hypha.apply.utils.pdf_cache.make_pdf', side_effect=ValueError) as make_pdf:
+            for _ in range(SubmissionPDF.max_attempts - 1):
+                self.assertEqual(self.get_page(submission).status_code, 202)
+            response = self.get_page(submission)
+            self.assertEqual(response.status_code, 500)
+            self.assertFalse(response.has_header('Refresh'))
+            self.get_page(submission)
+        self.assertEqual(make_pdf.call_count, SubmissionPDF.max_attempts)
+
+    def test_being_prepared(self):
+        submission = ProjectFactory().submission
+        with patch('hypha.apply.utils.pdf_cache.render_pdf') as render_pdf:
+            response = self.get_page(submission)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response['Refresh'], '5')
+            self.get_page(submission)
+        render_pdf.delay.assert_called_once()
+
+
+@override_settings(ROOT_URLCONF='hypha.apply.urls')
+class TestRoundPDFsView(TestCase):
+    def setUp(self):
+        self.client.force_login(StaffFactory())
+
+    def test_zip_of_round(self):
+        submission = ApplicationSubmissionFactory()
+        other = ApplicationSubmissionFactory(round=submission.round)
+        ApplicationSubmissionFactory()
+
+        url = reverse('funds:rounds:download', kwargs={'pk': submission.round.pk})
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            [name.split('_')[0] for name in archive.namelist()],
+            [str(submission.id), str(other.id)],
+        )
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+    def test_being_prepared(self):
+        submission = ApplicationSubmissionFactory()
+        url = reverse('funds:rounds:download', kwargs={'pk': submission.round.pk})
+        with patch('hypha.apply.utils.pdf_cache.render_pdf') as render_pdf:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Refresh'], '5')
+        render_pdf.delay.assert_called_once()
+
+    def test_polls_only_check_the_missing_pdfs(self):
+        submission = ApplicationSubmissionFactory()
+        url = reverse('funds:rounds:download', kwargs={'pk': submission.round.pk})
+        with patch('hypha.apply.utils.pdf_cache.render_pdf'):
+            self.client.get(url, secure=True)
+        with patch('hypha.apply.funds.views.SubmissionPDF') as pdf_class:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 202)
+        pdf_class.assert_not_called()
+
+        SubmissionPDF(submission, PDFPageSettings.LEGAL).save()
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def test_ready_pdfs_are_not_looked_up_in_storage(self):
+        submission = ApplicationSubmissionFactory()
+        url = reverse('funds:rounds:download', kwargs={'pk': submission.round.pk})
+        self.client.get(url, secure=True)
+        with patch.object(SubmissionPDF.storage, 'exists') as exists:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        exists.assert_not_called()
+
+    def test_pdf_removed_after_it_was_ready(self):
+        submission = ApplicationSubmissionFactory()
+        url = reverse('funds:rounds:download', kwargs={'pk': submission.round.pk})
+        self.client.get(url, secure=True)
+        pdf = SubmissionPDF(submission, PDFPageSettings.LEGAL)
+        pdf.storage.delete(pdf.name)
+
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+    def test_failing_pdf_fails_the_round(self):
+        submission = ApplicationSubmissionFactory()
+        ApplicationSubmissionFactory(round=submission.round)
+        url = reverse('funds:rounds:download', kwargs={'pk': submission.round.pk})
+        with patch.object(SubmissionPDF, 'get_sections', side_effect=ValueError):
+            for _ in range(SubmissionPDF.max_attempts - 1):
+                self.assertEqual(self.client.get(url, secure=True).status_code, 202)
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.has_header('Refresh'))
+        self.assertEqual(response.context['failed'], 2)
+
+    def test_applicant_cannot_download(self):
+        submission = ApplicationSubmissionFactory()
+        self.client.force_login(ApplicantFactory())
+        url = reverse('funds:rounds:download', kwargs={'pk': submission.round.pk})
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 403)
+
+
 class BaseSubmissionFileViewTestCase(BaseViewTestCase):
     url_name = 'funds:submissions:{}'
     base_view_name = 'serve_private_media'
@@ -1426,6 +1640,77 @@ class TestReviewerLeaderboard(TestCase):
         response = self.client.get('/apply/submissions/reviews/', follow=True, secure=True)
         self.assertEqual(response.status_code, 200)
 
+    def get_counts(self, **params):
+        self.client.force_login(StaffFactory())
+        response = self.client.get('/apply/submissions/reviews/', params, secure=True)
+        return {
+            row.record.pk: (row.record.ninety_days, row.record.this_year, row.record.total)
+            for row in response.context['table'].rows
+        }
+
+    def test_counts_reviews(self):
+        reviewer = ReviewerFactory()
+        ReviewFactory(author__reviewer=reviewer)
+        old = ReviewFactory(author__reviewer=reviewer)
+        ReviewFactory(author__reviewer=reviewer, is_draft=True)
+        Review.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=800))
+        ReviewerStats.objects.refresh(reviewer.id)
+
+        self.assertEqual(self.get_counts()[reviewer.pk], (1, 1, 2))
+
+    def test_counts_reviews_from_the_last_ninety_days(self):
+        reviewer = ReviewerFactory()
+        ReviewFactory(author__reviewer=reviewer)
+        for days in [89, 91, 150]:
+            other = ReviewFactory(author__reviewer=reviewer)
+            Review.objects.filter(id=other.id).update(created_at=timezone.now() - timedelta(days=days))
+        ReviewerStats.objects.refresh(reviewer.id)
+
+        ninety_days, _, total = self.get_counts()[reviewer.pk]
+        self.assertEqual((ninety_days, total), (2, 4))
+
+    def test_filter_by_round_limits_counts(self):
+        reviewer = ReviewerFactory()
+        review = ReviewFactory(author__reviewer=reviewer)
+        ReviewFactory(author__reviewer=reviewer)
+
+        counts = self.get_counts(rounds=review.submission.round_id)
+        self.assertEqual(counts, {reviewer.pk: (1, 1, 1)})
+
+
+@override_settings(ROOT_URLCONF='hypha.apply.urls')
+@patch.object(SubmissionAdminListView, 'table_pagination', {'per_page': 2})
+class TestSubmissionListPagination(TestCase):
+    def setUp(self):
+        self.client.force_login(StaffFactory())
+
+    def get_table(self, **params):
+        response = self.client.get('/apply/submissions/all/', params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.context['table']
+
+    def ids(self, table):
+        return [row.record.id for row in table.page.object_list]
+
+    def test_keyset_pages_when_sorted_by_submit_time(self):
+        submissions = ApplicationSubmissionFactory.create_batch(3)
+        first = self.get_table(sort='submit_time')
+        self.assertTrue(first.paginator.keyset)
+        self.assertIsNone(first.page.previous_cursor)
+
+        second = self.get_table(sort='submit_time', cursor=first.page.next_cursor)
+        self.assertIsNone(second.page.next_cursor)
+        self.assertEqual(self.ids(first) + self.ids(second), [submission.id for submission in submissions])
+
+        previous = self.get_table(sort='submit_time', cursor=second.page.previous_cursor)
+        self.assertEqual(self.ids(previous), self.ids(first))
+
+    def test_page_numbers_for_other_orderings(self):
+        ApplicationSubmissionFactory.create_batch(3)
+        table = self.get_table(sort='title')
+        self.assertFalse(table.paginator.keyset)
+        self.assertTrue(table.page.has_next())
+
 
 class TestUpdateReviewersMixin(BaseSubmissionViewTestCase):
     user_factory = StaffFactory
@@ -83,3 +83,23 @@ class StaffTestCase(BaseBatchReviewerTestCase):
             reviewers = submission.assigned.values_list('reviewer', flat=True)
             self.assertIn(self.staff[0].pk, reviewers)
             self.assertIn(self.staff[1].pk, reviewers)
+
+    def test_can_swap_role_reviewers(self):
+        for submission in self.submissions[0:2]:
+            AssignedWithRoleReviewersFactory(reviewer=self.staff[0], submission=submission, role=self.roles[0])
+            AssignedWithRoleReviewersFactory(reviewer=self.staff[1], submission=submission, role=self.roles[1])
+        ReviewFactory(author__reviewer=self.staff[0], author__staff=True, submission=self.submissions[0], draft=False)
+        submissions = self.submissions[0:2]
+        reviewer_roles = [self.staff[1], self.staff[0]]
+        self.post_page(data=self.data(reviewer_roles, submissions))
+        for submission in submissions:
+            roles = dict(submission.assigned.values_list('reviewer', 'role'))
+            self.assertEqual(roles, {self.staff[1].pk: self.roles[0].pk, self.staff[0].pk: self.roles[1].pk})
+
+    def test_moves_to_internal_review_when_all_roles_assigned(self):
+        submissions = self.submissions[0:2]
+        reviewer_roles = [self.staff[0], self.staff[1]]
+        self.post_page(data=self.data(reviewer_roles, submissions))
+        for submission in submissions:
+            self.assertEqual(self.refresh(submission).status, 'internal_review')
+        self.assertEqual(self.refresh(self.submissions[2]).status, self.submissions[2].status)
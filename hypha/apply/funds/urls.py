@@ -9,6 +9,7 @@ from .views import (
     RevisionCompareView,
     RevisionListView,
     RoundListView,
+    RoundPDFsView,
     StaffAssignments,
     SubmissionDeleteView,
     SubmissionDetailPDFView,
@@ -78,6 +79,7 @@ submission_urls = ([
 rounds_urls = ([
     path('', RoundListView.as_view(), name="list"),
     path('<int:pk>/', SubmissionsByRound.as_view(), name="detail"),
+    path('<int:pk>/download/', RoundPDFsView.as_view(), name="download"),
 ], 'rounds')
 
 
@@ -1,6 +1,6 @@
 from hypha.apply.utils.image import generate_image_tag
 
-from .models.screening import ScreeningStatus
+from .models.screening import screening_status_cache
 
 
 def render_icon(image):
@@ -17,24 +17,23 @@ def get_default_screening_statues():
     If the default for yes and no doesn't exit. First yes and
     first no screening statuses created should be set as default
     """
-    yes_screening_statuses = ScreeningStatus.objects.filter(yes=True)
-    no_screening_statuses = ScreeningStatus.objects.filter(yes=False)
+    screening_statuses = screening_status_cache.get()
+    yes_screening_statuses = [status for status in screening_statuses if status.yes]
+    no_screening_statuses = [status for status in screening_statuses if not status.yes]
     default_yes = None
     default_no = None
-    if yes_screening_statuses.exists():
-        try:
-            default_yes = yes_screening_statuses.get(default=True)
-        except ScreeningStatus.DoesNotExist:
+    if yes_screening_statuses:
+        default_yes = next((status for status in yes_screening_statuses if status.default), None)
+        if default_yes is None:
             # Set first yes screening status as default
-            default_yes = yes_screening_statuses.first()
+            default_yes = yes_screening_statuses[0]
             default_yes.default = True
             default_yes.save()
-    if no_screening_statuses.exists():
-        try:
-            default_no = no_screening_statuses.get(default=True)
-        except ScreeningStatus.DoesNotExist:
+    if no_screening_statuses:
+        default_no = next((status for status in no_screening_statuses if status.default), None)
+        if default_no is None:
             # Set first no screening status as default
-            default_no = no_screening_statuses.first()
+            default_no = no_screening_statuses[0]
             default_no.default = True
             default_no.save()
     return [default_yes, default_no]
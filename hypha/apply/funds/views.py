@@ -2,19 +2,24 @@ from copy import copy
 from datetime import timedelta
 
 import django_tables2 as tables
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib.humanize.templatetags.humanize import intcomma
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count, F, Q
-from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.utils.safestring import mark_safe
+from django.utils.text import slugify
 from django.utils.translation import gettext as _
 from django.views import View
 from django.views.decorators.cache import cache_page
@@ -26,7 +31,6 @@ from django.views.generic import (
     ListView,
     UpdateView,
 )
-from django.views.generic.detail import SingleObjectMixin
 from django_file_form.models import PlaceholderUploadedFile
 from django_filters.views import FilterView
 from django_tables2.paginators import LazyPaginator
@@ -49,9 +53,15 @@ from hypha.apply.review.models import Review
 from hypha.apply.review.views import ReviewContextMixin
 from hypha.apply.users.decorators import staff_required
 from hypha.apply.utils.models import PDFPageSettings
-from hypha.apply.utils.pdfs import draw_submission_content, make_pdf
+from hypha.apply.utils.pagination import KeysetPaginator
+from hypha.apply.utils.pdf_cache import (
+    failed_pdf_names,
+    missing_pdf_names,
+    stream_pdf_zip,
+)
 from hypha.apply.utils.storage import PrivateMediaView
 from hypha.apply.utils.views import (
+    CachedPDFView,
     DelegateableListView,
     DelegateableView,
     ViewDispatcher,
@@ -78,11 +88,12 @@ from .models import (
     AssignedReviewers,
     LabBase,
     Reminder,
-    ReviewerRole,
     ReviewerSettings,
     RoundBase,
     RoundsAndLabs,
 )
+from .models.reviewer_role import reviewer_role_cache
+from .pdfs import SubmissionPDF
 from .permissions import is_user_has_access_to_view_submission
 from .tables import (
     AdminSubmissionsTable,
@@ -143,36 +154,51 @@ class SubmissionStatsMixin:
 
 
 class UpdateReviewersMixin:
+    # Statuses which move on to internal review once all the roles are assigned
+    statuses_before_review = [INITIAL_STATE, 'proposal_discussion']
+
     def set_status_after_reviewers_assigned(self, submission):
         # Check if all internal reviewers have been selected.
         if submission.has_all_reviewer_roles_assigned:
-            # Automatic workflow actions.
-            action = None
-            if submission.status == INITIAL_STATE:
-                # Automatically transition the application to "Internal review".
-                action = submission.workflow.stepped_phases[2][0].name
-            elif submission.status == 'proposal_discussion':
-                # Automatically transition the proposal to "Internal review".
-                action = 'proposal_internal_review'
-
-            # If action is set run perform_transition().
-            if action:
-                try:
-                    submission.perform_transition(
-                        action,
-                        self.request.user,
-                        request=self.request,
-                        notify=False,
-                    )
-                except (PermissionDenied, KeyError):
-                    pass
+            self.start_internal_review(submission)
+
+    def set_status_after_batch_reviewers_assigned(self, submissions):
+        # Only loads the submissions which are ready to move on
+        ready = ApplicationSubmission.objects.filter(
+            id__in=submissions,
+            status__in=self.statuses_before_review,
+        ).with_all_reviewer_roles_assigned()
+        for submission in ready:
+            self.start_internal_review(submission)
+
+    def start_internal_review(self, submission):
+        # Automatic workflow actions.
+        action = None
+        if submission.status == INITIAL_STATE:
+            # Automatically transition the application to "Internal review".
+            action = submission.workflow.stepped_phases[2][0].name
+        elif submission.status == 'proposal_discussion':
+            # Automatically transition the proposal to "Internal review".
+            action = 'proposal_internal_review'
+
+        # If action is set run perform_transition().
+        if action:
+            try:
+                submission.perform_transition(
+                    action,
+                    self.request.user,
+                    request=self.request,
+                    notify=False,
+                )
+            except (PermissionDenied, KeyError):
+                pass
 
 
 class BaseAdminSubmissionsTable(SingleTableMixin, FilterView):
     table_class = AdminSubmissionsTable
     filterset_class = SubmissionFilterAndSearch
     filter_action = ''
-    paginator_class = LazyPaginator
+    paginator_class = KeysetPaginator
     table_pagination = {'per_page': 25}
 
     excluded_fields = []
@@ -186,6 +212,12 @@ class BaseAdminSubmissionsTable(SingleTableMixin, FilterView):
     def get_table_kwargs(self, **kwargs):
         return {**self.excluded, **kwargs}
 
+    def get_table_pagination(self, table):
+        pagination = super().get_table_pagination(table)
+        if pagination:
+            pagination['cursor'] = self.request.GET.get('cursor')
+        return pagination
+
     def get_filterset_kwargs(self, filterset_class, **kwargs):
         new_kwargs = super().get_filterset_kwargs(filterset_class)
         new_kwargs.update(self.excluded)
@@ -250,9 +282,8 @@ class BatchUpdateReviewersView(UpdateReviewersMixin, DelegatedViewMixin, FormVie
             added=reviewers,
         )
 
-        for submission in submissions:
-            # Update submission status if needed.
-            self.set_status_after_reviewers_assigned(submission)
+        # Update submission status if needed.
+        self.set_status_after_batch_reviewers_assigned(submissions)
 
         return super().form_valid(form)
 
@@ -300,23 +331,11 @@ class BatchProgressSubmissionView(DelegatedViewMixin, FormView):
             if redirect:
                 return redirect
 
-        failed = []
-        phase_changes = {}
-        for submission in submissions:
-            valid_actions = {action for action, _ in submission.get_actions_for_user(self.request.user)}
-            old_phase = submission.phase
-            try:
-                transition = (valid_actions & set(transitions)).pop()
-                submission.perform_transition(
-                    transition,
-                    self.request.user,
-                    request=self.request,
-                    notify=False,
-                )
-            except (PermissionDenied, KeyError):
-                failed.append(submission)
-            else:
-                phase_changes[submission.id] = old_phase
+        phase_changes, failed = submissions.perform_transitions(
+            transitions,
+            self.request.user,
+            request=self.request,
+        )
 
         if failed:
             messages.warning(
@@ -741,13 +760,25 @@ class AdminSubmissionDetailView(ReviewContextMixin, ActivityContextMixin, Delega
         UpdateMetaTermsView,
     ]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            # The forms posted to this page change what for_detail loads
+            queryset = queryset.for_detail()
+        return queryset
+
     def dispatch(self, request, *args, **kwargs):
-        submission = self.get_object()
+        submission = self.object = self.get_object()
         if submission.status == DRAFT_STATE and not request.user == submission.user:
             raise Http404
         redirect = SubmissionSealedView.should_redirect(request, submission)
         return redirect or super().dispatch(request, *args, **kwargs)
 
+    def get(self, request, *args, **kwargs):
+        # The submission has already been loaded by dispatch
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
     def get_context_data(self, **kwargs):
         other_submissions = self.model.objects.filter(user=self.object.user).current().exclude(id=self.object.id)
         if self.object.next:
@@ -1094,26 +1125,57 @@ class RevisionCompareView(DetailView):
     pk_url_kwarg = 'submission_pk'
 
     def compare_revisions(self, from_data, to_data):
-        self.object.form_data = from_data.form_data
-        from_rendered_text_fields = self.object.render_text_blocks_answers()
-        from_required = self.render_required()
-
-        self.object.form_data = to_data.form_data
-        to_rendered_text_fields = self.object.render_text_blocks_answers()
-        to_required = self.render_required()
-
-        required_fields = [
-            compare(*fields)
-            for fields in zip(from_required, to_required)
-        ]
+        # Diffs are cached for each field, a revision no longer changes once it
+        # has been superseded so only the draft being edited is never cached
+        required_ids = list(self.object.named_blocks.values())
+        stream_ids = list(self.object.form_fields_index.text_blocks)
+        cacheable = not ({from_data.id, to_data.id} & self.mutable_revisions())
+        keys = {
+            field_id: f'revision-diff:{from_data.id}:{to_data.id}:{field_id}'
+            for field_id in required_ids + stream_ids
+        }
+        diffs = {}
+        if cacheable:
+            cached = cache.get_many(keys.values())
+            diffs = {field_id: cached[key] for field_id, key in keys.items() if key in cached}
+
+        if len(diffs) < len(keys):
+            self.object.form_data = from_data.form_data
+            from_rendered_text_fields = self.object.render_text_blocks_answers()
+            from_required = self.render_required()
+
+            self.object.form_data = to_data.form_data
+            to_rendered_text_fields = self.object.render_text_blocks_answers()
+            to_required = self.render_required()
+
+            answers = zip(
+                required_ids + stream_ids,
+                from_required + from_rendered_text_fields,
+                to_required + to_rendered_text_fields,
+            )
+            new_diffs = {
+                field_id: compare(from_answer, to_answer)
+                for field_id, from_answer, to_answer in answers
+                if field_id not in diffs
+            }
+            diffs.update(new_diffs)
+            if cacheable:
+                cache.set_many(
+                    {keys[field_id]: diff for field_id, diff in new_diffs.items()},
+                    settings.REVISION_DIFF_CACHE_TIMEOUT,
+                )
 
-        stream_fields = [
-            compare(*fields)
-            for fields in zip(from_rendered_text_fields, to_rendered_text_fields)
-        ]
+        required_fields = [diffs[field_id] for field_id in required_ids]
+        stream_fields = [diffs[field_id] for field_id in stream_ids]
 
         return (required_fields, stream_fields)
 
+    def mutable_revisions(self):
+        # The draft is updated in place until it is submitted
+        if self.object.draft_revision_id != self.object.live_revision_id:
+            return {self.object.draft_revision_id}
+        return set()
+
     def render_required(self):
         return [
             getattr(self.object, 'get_{}_display'.format(field))()
@@ -1194,8 +1256,9 @@ class SubmissionDetailSimplifiedView(DetailView):
 
 
 @method_decorator(staff_required, name='dispatch')
-class SubmissionDetailPDFView(SingleObjectMixin, View):
+class SubmissionDetailPDFView(CachedPDFView):
     model = ApplicationSubmission
+    pdf_class = SubmissionPDF
 
     def get_object(self, queryset=None):
         obj = super().get_object(queryset)
@@ -1205,33 +1268,80 @@ class SubmissionDetailPDFView(SingleObjectMixin, View):
 
         return obj
 
+
+@method_decorator(staff_required, name='dispatch')
+class RoundPDFsView(View):
+    """
+    Download the PDFs of all the submissions to a round or lab as a zip. The
+    missing PDFs are queued and the user is shown a page which refreshes until
+    they are all ready, or until any of them has failed to build too often.
+    """
+    preparing_template_name = 'funds/round_pdfs_preparing.html'
+    failed_template_name = 'funds/round_pdfs_failed.html'
+    refresh_interval = 5
+
     def get(self, request, *args, **kwargs):
-        self.object = self.get_object()
-        pdf_page_settings = PDFPageSettings.for_request(request)
-        content = draw_submission_content(
-            self.object.output_text_answers()
-        )
-        pdf = make_pdf(
-            title=self.object.title,
-            sections=[
-                {
-                    'content': content,
-                    'title': 'Submission',
-                    'meta': [
-                        self.object.stage,
-                        self.object.page,
-                        self.object.round,
-                        f"Lead: { self.object.lead }",
-                    ],
-                },
-            ],
-            pagesize=pdf_page_settings.download_page_size,
-        )
-        return FileResponse(
-            pdf,
-            as_attachment=True,
-            filename=self.object.title + '.pdf',
+        try:
+            obj = Page.objects.get(pk=kwargs.get('pk')).specific
+        except Page.DoesNotExist:
+            raise Http404(_("No Round or Lab found matching the query"))
+
+        if not isinstance(obj, (LabBase, RoundBase)):
+            raise Http404(_("No Round or Lab found matching the query"))
+
+        pagesize = PDFPageSettings.for_request(request).download_page_size
+        waiting_key = f'round-pdfs-waiting:{obj.pk}:{pagesize}'
+        waiting = cache.get(waiting_key)
+        if waiting:
+            # Until the PDFs missing on an earlier poll are built only those
+            # are looked for, without loading the submissions again. Those
+            # which failed are queued again below.
+            missing = missing_pdf_names(waiting['names'])
+            if missing and not failed_pdf_names(missing, attempts=1):
+                return self.preparing(request, obj, missing, waiting['total'])
+
+        submissions = ApplicationSubmission.objects.filter(
+            Q(round=obj) | Q(page=obj)
+        ).select_related('page', 'round', 'lead').order_by('id')
+        pdfs = [SubmissionPDF(submission, pagesize) for submission in submissions]
+        missing = set(missing_pdf_names([pdf.name for pdf in pdfs]))
+        for pdf in pdfs:
+            if pdf.name in missing:
+                pdf.schedule()
+        # Without a celery broker the PDFs are built straight away
+        missing = missing_pdf_names(list(missing))
+        if missing:
+            # Not refreshed by the polls above, so the PDFs which never
+            # appeared are queued again once it expires
+            cache.set(
+                waiting_key,
+                {'names': missing, 'total': len(pdfs)},
+                SubmissionPDF.pending_timeout,
+            )
+            return self.preparing(request, obj, missing, len(pdfs))
+
+        cache.delete(waiting_key)
+        response = StreamingHttpResponse(stream_pdf_zip(pdfs), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{slugify(obj.title)}.zip"'
+        return response
+
+    def preparing(self, request, obj, missing, total):
+        failed = failed_pdf_names(missing)
+        if failed:
+            return TemplateResponse(
+                request,
+                self.failed_template_name,
+                {'object': obj, 'failed': len(failed), 'total': total},
+                status=500,
+            )
+        response = TemplateResponse(
+            request,
+            self.preparing_template_name,
+            {'object': obj, 'ready': total - len(missing), 'total': total},
+            status=202,
         )
+        response['Refresh'] = self.refresh_interval
+        return response
 
 
 @method_decorator(cache_page(60), name='dispatch')
@@ -1297,14 +1407,40 @@ class ReviewerLeaderboard(SingleTableMixin, FilterView):
         return self.filterset_class._meta.model.objects.reviewers()
 
     def get_table_data(self):
-        ninety_days_ago = timezone.now() - timedelta(days=90)
-        this_year = timezone.now().year
-        last_year = timezone.now().year - 1
+        # The counts come from the monthly ReviewerStats. Only the month which
+        # started before the last ninety days is counted from the reviews.
+        today = timezone.localdate()
+        ninety_days_ago = today - timedelta(days=90)
+        first_month = ninety_days_ago.replace(day=1)
+        next_month = (first_month + timedelta(days=31)).replace(day=1)
+        recent_reviews = Review.objects.submitted().filter(
+            author__reviewer=OuterRef('pk'),
+            created_at__date__gte=ninety_days_ago,
+            created_at__date__lt=next_month,
+        )
+
+        stats = Q()
+        filters = getattr(self.filterset.form, 'cleaned_data', {})
+        if filters.get('funds'):
+            stats &= Q(review_stats__fund__in=filters['funds'])
+            recent_reviews = recent_reviews.filter(submission__page__in=filters['funds'])
+        if filters.get('rounds'):
+            stats &= Q(review_stats__round__in=filters['rounds'])
+            recent_reviews = recent_reviews.filter(submission__round__in=filters['rounds'])
+
+        def review_count(months=Q()):
+            return Coalesce(
+                Sum('review_stats__review_count', filter=stats & months),
+                0,
+                output_field=IntegerField(),
+            )
+
+        recent_count = recent_reviews.order_by().values('author__reviewer').annotate(count=Count('id')).values('count')
         return super().get_table_data().annotate(
-            total=Count('assignedreviewers__review'),
-            ninety_days=Count('assignedreviewers__review', filter=Q(assignedreviewers__review__created_at__date__gte=ninety_days_ago)),
-            this_year=Count('assignedreviewers__review', filter=Q(assignedreviewers__review__created_at__year=this_year)),
-            last_year=Count('assignedreviewers__review', filter=Q(assignedreviewers__review__created_at__year=last_year)),
+            total=review_count(),
+            ninety_days=review_count(Q(review_stats__month__gt=first_month)) + Coalesce(Subquery(recent_count), 0, output_field=IntegerField()),
+            this_year=review_count(Q(review_stats__month__year=today.year)),
+            last_year=review_count(Q(review_stats__month__year=today.year - 1)),
         )
 
 
@@ -1344,7 +1480,7 @@ class StaffAssignments(SingleTableMixin, ListView):
 
     def get_table_data(self):
         table_data = super().get_table_data()
-        reviewer_roles = ReviewerRole.objects.all().order_by('order')
+        reviewer_roles = reviewer_role_cache.get()
         for data in table_data:
             for i, role in enumerate(reviewer_roles):
                 # Only setting column name with dummy value 0.
@@ -1353,7 +1489,7 @@ class StaffAssignments(SingleTableMixin, ListView):
         return table_data
 
     def get_table_kwargs(self):
-        reviewer_roles = ReviewerRole.objects.all().order_by('order')
+        reviewer_roles = reviewer_role_cache.get()
         extra_columns = []
         for i, role in enumerate(reviewer_roles):
             extra_columns.append((f'role{i}', RoleColumn(verbose_name=role)))
@@ -1,5 +1,5 @@
 import itertools
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from enum import Enum
 
 from django.conf import settings
@@ -977,6 +977,31 @@ def get_stage_change_actions():
 STAGE_CHANGE_ACTIONS = get_stage_change_actions()
 
 
+Transition = namedtuple('Transition', ['target', 'display', 'permissions', 'conditions', 'method'])
+
+
+def compile_transitions():
+    # (workflow, status) -> {target: Transition} so the actions available from a
+    # status can be looked up without going through django_fsm
+    return {
+        (workflow_name, phase_name): {
+            target: Transition(
+                target=target,
+                display=action['display'],
+                permissions=frozenset(action['permissions']),
+                conditions=tuple(action.get('conditions', [])),
+                method=action.get('method'),
+            )
+            for target, action in phase.transitions.items()
+        }
+        for workflow_name, workflow in WORKFLOWS.items()
+        for phase_name, phase in workflow.items()
+    }
+
+
+TRANSITIONS = compile_transitions()
+
+
 STATUSES = defaultdict(set)
 
 for key, value in PHASES:
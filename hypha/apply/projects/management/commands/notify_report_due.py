@@ -1,3 +1,5 @@
+import time
+
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.messages.storage.fallback import FallbackStorage
@@ -8,7 +10,7 @@ from django.utils import timezone
 
 from hypha.apply.activity.messaging import MESSAGES, messenger
 from hypha.apply.home.models import ApplyHomePage
-from hypha.apply.projects.models import Project
+from hypha.apply.projects.models import Project, Report, ReportConfig
 
 
 class Command(BaseCommand):
@@ -16,8 +18,62 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('days_before', type=int)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the projects which would be notified without notifying them',
+        )
 
     def handle(self, *args, **options):
+        started = time.perf_counter()
+        today = timezone.now().date()
+        due_date = today + relativedelta(days=options['days_before'])
+
+        # Only the projects with a report due on the day are loaded
+        configs = list(ReportConfig.objects.filter(
+            project__in=Project.objects.in_progress(),
+        ).due_on(due_date, today).select_related('project'))
+        scheduled = time.perf_counter()
+
+        current_reports = {
+            report.project_id: report
+            for report in Report.objects.filter(
+                project__in=[config.project for config in configs],
+                current__isnull=True,
+                skipped=False,
+                end_date__gte=today,
+            )
+        }
+
+        projects = []
+        reports = {}
+        for config in configs:
+            project = config.project
+            report = current_reports.get(project.id)
+            if not options['dry_run'] and (not report or report.end_date != due_date):
+                # Creates the report or moves it to the due date
+                report = config.current_due_report()
+            if report and report.notified and report.notified.date() == today:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'Would notify project: {project.id}')
+            else:
+                projects.append(project)
+                reports[project.id] = report
+
+        if projects:
+            self.notify(projects, reports)
+            for project in projects:
+                self.stdout.write(self.style.SUCCESS(f'Notified project: {project.id}'))
+
+        if options['dry_run']:
+            finished = time.perf_counter()
+            self.stdout.write(
+                f'{len(configs)} projects with a report due on {due_date}, '
+                f'found in {scheduled - started:.3f}s and checked in {finished - scheduled:.3f}s'
+            )
+
+    def notify(self, projects, reports):
         site = ApplyHomePage.objects.first().get_site()
         set_urlconf('hypha.apply.urls')
 
@@ -30,26 +86,14 @@ class Command(BaseCommand):
         request.session = {}
         request._messages = FallbackStorage(request)
 
-        today = timezone.now().date()
-        due_date = today + relativedelta(days=options['days_before'])
-        for project in Project.objects.in_progress():
-            next_report = project.report_config.current_due_report()
-            due_soon = next_report.end_date == due_date
-            not_notified_today = (
-                not next_report.notified or
-                next_report.notified.date() != today
-            )
-            if due_soon and not_notified_today:
-                messenger(
-                    MESSAGES.REPORT_NOTIFY,
-                    request=request,
-                    user=None,
-                    source=project,
-                    related=next_report,
-                )
-                # Notify about the due report
-                next_report.notified = timezone.now()
-                next_report.save()
-                self.stdout.write(
-                    self.style.SUCCESS(f'Notified project: {project.id}')
-                )
+        messenger(
+            MESSAGES.BATCH_REPORT_NOTIFY,
+            request=request,
+            user=None,
+            sources=projects,
+            related=reports,
+        )
+        # Notify about the due report
+        Report.objects.filter(id__in=[report.id for report in reports.values()]).update(
+            notified=timezone.now(),
+        )
@@ -18,6 +18,7 @@ from django.db.models import (
     Count,
     ExpressionWrapper,
     F,
+    Func,
     Max,
     OuterRef,
     Q,
@@ -26,7 +27,7 @@ from django.db.models import (
     Value,
     When,
 )
-from django.db.models.functions import Cast, Coalesce
+from django.db.models.functions import Cast, Coalesce, Greatest
 from django.db.models.signals import post_delete
 from django.dispatch.dispatcher import receiver
 from django.urls import reverse
@@ -607,6 +608,60 @@ class ProjectApprovalForm(BaseStreamForm, models.Model):
         return self.name
 
 
+class ReportConfigQueryset(models.QuerySet):
+    def with_next_due_date(self, today=None):
+        """
+        Annotate next_due_date with the end date of the report which
+        current_due_report would give, worked out for every config in one
+        query and without creating the reports.
+        """
+        today = today or timezone.now().date()
+
+        def next_date(date):
+            # date + occurrence * frequency, like ReportConfig.next_date
+            period = Case(
+                When(frequency=ReportConfig.WEEK, then=Func(
+                    F('occurrence'), template='make_interval(weeks => %(expressions)s)',
+                )),
+                default=Func(F('occurrence'), template='make_interval(months => %(expressions)s)'),
+                output_field=models.DurationField(),
+            )
+            return Cast(ExpressionWrapper(date + period, output_field=models.DateTimeField()), models.DateField())
+
+        return self.annotate(
+            project_start=Cast(
+                Subquery(
+                    Contract.objects.filter(
+                        project=OuterRef('project'),
+                    ).approved().order_by('approved_at').values('approved_at')[:1]
+                ),
+                models.DateField(),
+            ),
+            last_report_date=Subquery(
+                Report.objects.filter(
+                    Q(end_date__lt=today) | Q(skipped=True) | Q(submitted__isnull=False),
+                    project=OuterRef('project'),
+                ).order_by('-end_date').values('end_date')[:1]
+            ),
+            schedule_date=Coalesce('schedule_start', 'project_start'),
+            next_due_date=Case(
+                # Project not started - no reporting required
+                When(project_start__isnull=True, then=None),
+                When(last_report_date__lt=F('schedule_date'), then=F('schedule_date')),
+                When(last_report_date__isnull=False, then=next_date(F('last_report_date'))),
+                When(schedule_start__gte=today, then=F('schedule_start')),
+                default=Greatest(
+                    next_date(ExpressionWrapper(F('schedule_date') - 1, output_field=models.DateField())),
+                    Value(today),
+                ),
+                output_field=models.DateField(),
+            ),
+        )
+
+    def due_on(self, date, today=None):
+        return self.with_next_due_date(today).filter(next_due_date=date)
+
+
 class ReportConfig(models.Model):
     """Persists configuration about the reporting schedule etc"""
 
@@ -622,6 +677,8 @@ class ReportConfig(models.Model):
     occurrence = models.PositiveSmallIntegerField(default=1)
     frequency = models.CharField(choices=FREQUENCY_CHOICES, default=MONTH, max_length=5)
 
+    objects = ReportConfigQueryset.as_manager()
+
     def get_frequency_display(self):
         next_report = self.current_due_report()
 
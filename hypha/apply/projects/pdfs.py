@@ -0,0 +1,43 @@
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
+
+from hypha.apply.funds.pdfs import SubmissionPDF
+from hypha.apply.utils.pdf_cache import CachedPDF
+from hypha.apply.utils.pdfs import draw_project_content
+
+from .models import Project
+
+
+class ProjectPDF(CachedPDF):
+    model = Project
+    template_name = 'application_projects/includes/simplified_detail.html'
+
+    @cached_property
+    def submission_pdf(self):
+        return SubmissionPDF(self.object.submission, self.pagesize)
+
+    @cached_property
+    def content(self):
+        return render_to_string(self.template_name, {'object': self.object, 'project': self.object})
+
+    def get_meta(self):
+        return [
+            str(self.object.submission.page),
+            str(self.object.submission.round),
+            f"Lead: { self.object.lead }",
+        ]
+
+    def get_fingerprint(self):
+        # The project pulls in approvals, reviews and documents so it is keyed
+        # on the rendered page, which is quick compared to building the PDF
+        return [self.content, self.get_meta(), self.submission_pdf.get_fingerprint()]
+
+    def get_sections(self):
+        return [
+            {
+                'content': draw_project_content(self.content),
+                'title': 'Project Approval Form',
+                'meta': self.get_meta(),
+            },
+            *self.submission_pdf.get_sections(),
+        ]
@@ -5,8 +5,10 @@ from django.core.management import call_command
 from django.test import TestCase, override_settings
 from django.utils import timezone
 
+from hypha.apply.activity.models import Event
 from hypha.apply.home.models import ApplyHomePage
 
+from ..models import Report
 from .factories import ProjectFactory, ReportConfigFactory, ReportFactory
 
 
@@ -57,3 +59,28 @@ class TestNotifyReportDue(TestCase):
         out = StringIO()
         call_command('notify_report_due', 7, stdout=out)
         self.assertNotIn('Notified project', out.getvalue())
+
+    def test_notify_reports_due_in_one_batch(self):
+        in_a_week = timezone.now() + relativedelta(days=7)
+        configs = ReportConfigFactory.create_batch(2, schedule_start=in_a_week, project__in_progress=True)
+        ReportConfigFactory(schedule_start=in_a_week + relativedelta(days=1), project__in_progress=True)
+        out = StringIO()
+
+        with self.settings(ALLOWED_HOSTS=[ApplyHomePage.objects.first().get_site().hostname]):
+            call_command('notify_report_due', 7, stdout=out)
+        self.assertEqual(out.getvalue().count('Notified project'), 2)
+        self.assertEqual(
+            set(Event.objects.filter(type='BATCH_REPORT_NOTIFY').values_list('object_id', flat=True)),
+            {config.project.id for config in configs},
+        )
+        self.assertEqual(Report.objects.filter(notified__isnull=False).count(), 2)
+
+    def test_dry_run_doesnt_notify(self):
+        in_a_week = timezone.now() + relativedelta(days=7)
+        config = ReportConfigFactory(schedule_start=in_a_week, project__in_progress=True)
+        out = StringIO()
+        call_command('notify_report_due', 7, dry_run=True, stdout=out)
+        self.assertIn(f'Would notify project: {config.project.id}', out.getvalue())
+        self.assertIn('1 projects with a report due', out.getvalue())
+        self.assertNotIn('Notified project', out.getvalue())
+        self.assertFalse(Report.objects.exists())
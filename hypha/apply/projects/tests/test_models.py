@@ -291,6 +291,33 @@ class TestReportConfig(TestCase):
         self.assertEqual(Report.objects.count(), 2)
         self.assertEqual(report.end_date, self.today + relativedelta(days=3))
 
+    def test_next_due_date_matches_current_due_report(self):
+        schedules = [
+            {},
+            {'schedule_start': self.today + relativedelta(days=2)},
+            {'schedule_start': self.today - relativedelta(months=3)},
+            {'schedule_start': self.today - relativedelta(days=2), 'frequency': ReportConfig.WEEK, 'occurrence': 2},
+        ]
+        reports = [
+            {},
+            {'end_date': self.today - relativedelta(days=1)},
+            {'end_date': self.today - relativedelta(months=4)},
+            {'end_date': self.today + relativedelta(days=1), 'is_submitted': True},
+            {'end_date': self.today + relativedelta(days=3), 'skipped': True},
+        ]
+        for schedule in schedules:
+            for report in reports:
+                with self.subTest(schedule=schedule, report=report):
+                    config = ReportConfigFactory(**schedule)
+                    if report:
+                        ReportFactory(project=config.project, **report)
+                    next_due_date = ReportConfig.objects.with_next_due_date().get(pk=config.pk).next_due_date
+                    self.assertEqual(next_due_date, config.current_due_report().end_date)
+
+    def test_no_next_due_date_before_project_starts(self):
+        config = ReportConfigFactory(project=ProjectFactory())
+        self.assertIsNone(ReportConfig.objects.with_next_due_date().get(pk=config.pk).next_due_date)
+
     def test_submitted_report_unaffected(self):
         config = ReportConfigFactory()
         report = ReportFactory(is_submitted=True, project=config.project, end_date=self.today + relativedelta(days=1))
@@ -0,0 +1,134 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.cache import cache
+from django.db.models import CharField, Count, Max, Prefetch, Value
+from django.db.models.functions import Cast, Concat
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.html import format_html
+from django_bleach.templatetags.bleach_tags import bleach_value
+from wagtail.core.blocks import RichTextBlock
+
+from hypha.apply.funds.models import AssignedReviewers
+from hypha.apply.utils.image import generate_image_tag
+
+from .blocks import RecommendationBlock, RecommendationCommentsBlock
+from .models import Review, ReviewOpinion
+
+
+class ReviewMatrix:
+    """
+    The answers of all the submitted reviews of a submission side by side, one
+    column per reviewer and one row per question.
+
+    The reviews, their authors and opinions are loaded in two queries and the
+    rendered rows are cached until a review or opinion changes.
+    """
+    opinions_template = 'review/includes/review_opinions_list.html'
+
+    def __init__(self, submission):
+        self.submission = submission
+
+    def should_display(self, field):
+        return not isinstance(field.block, (RecommendationBlock, RecommendationCommentsBlock, RichTextBlock))
+
+    def get_reviewers(self):
+        opinions = ReviewOpinion.objects.select_related('author__reviewer')
+        return AssignedReviewers.objects.filter(
+            submission=self.submission,
+            review__is_draft=False,
+        ).reviewed().review_order().select_related(
+            'review',
+            'role__icon',
+        ).prefetch_related(
+            Prefetch('review__opinions', queryset=opinions),
+        )
+
+    def get_cache_key(self):
+        # Reviews are timestamped when edited, opinions aren't so every opinion
+        # is part of the key
+        state = Review.objects.filter(
+            submission=self.submission,
+            is_draft=False,
+        ).aggregate(
+            latest=Max('updated_at'),
+            review_count=Count('id', distinct=True),
+            opinions=StringAgg(
+                Concat(
+                    Cast('opinions__id', CharField()),
+                    Value(':'),
+                    Cast('opinions__opinion', CharField()),
+                ),
+                ',',
+                ordering='opinions__id',
+            ),
+        )
+        latest = state['latest'].timestamp() if state['latest'] else 0
+        opinions = hashlib.sha1((state['opinions'] or '').encode()).hexdigest()
+        return (
+            f'review-matrix:{self.submission.id}:{self.submission.live_revision_id}:'
+            f'{latest}:{state["review_count"]}:{opinions}'
+        )
+
+    def author_cell(self, review, reviewer):
+        author = format_html('<a href="{}"><span>{}</span></a>', review.get_absolute_url(), reviewer)
+        if reviewer.role and reviewer.role.icon:
+            author += generate_image_tag(reviewer.role.icon, '12x12')
+        return format_html('<div>{}</div>', author)
+
+    def revision_cell(self, review):
+        if review.revision_id == self.submission.live_revision_id:
+            return 'Current'
+        url = reverse('funds:submissions:revisions:compare', kwargs={
+            'submission_pk': self.submission.id,
+            'to': self.submission.live_revision_id,
+            'from': review.revision_id,
+        })
+        return format_html('<a href="{}">Compare</a>', url)
+
+    def build(self):
+        rows = {
+            'title': {'question': '', 'answers': []},
+            'opinions': {'question': 'Opinions', 'answers': []},
+            'score': {'question': 'Overall Score', 'answers': []},
+            'recommendation': {'question': 'Recommendation', 'answers': []},
+            'revision': {'question': 'Revision', 'answers': []},
+            'comments': {'question': 'Comments', 'answers': []},
+        }
+        opinions_template = get_template(self.opinions_template)
+
+        reviewers = list(self.get_reviewers())
+        for i, reviewer in enumerate(reviewers):
+            review = reviewer.review
+            review.submission = self.submission
+            review.author = reviewer
+
+            rows['title']['answers'].append(self.author_cell(review, reviewer))
+            rows['opinions']['answers'].append(opinions_template.render({'opinions': review.opinions.all()}))
+            rows['score']['answers'].append(review.get_score_display)
+            rows['recommendation']['answers'].append(review.get_recommendation_display())
+            rows['comments']['answers'].append(review.get_comments_display(include_question=False))
+            rows['revision']['answers'].append(self.revision_cell(review))
+
+            for field_id, field in review.form_fields_index.fields.items():
+                if self.should_display(field):
+                    row = rows.setdefault(field.id, {
+                        'question': field.value['field_label'],
+                        'answers': [''] * len(reviewers),
+                    })
+                    row['answers'][i] = field.block.render(None, {'data': review.data(field_id)})
+
+        for key, row in rows.items():
+            if key not in {'title', 'opinions'}:
+                row['answers'] = [bleach_value(str(answer)) for answer in row['answers']]
+        return rows
+
+    def get_rows(self):
+        key = self.get_cache_key()
+        rows = cache.get(key)
+        if rows is None:
+            rows = self.build()
+            cache.set(key, rows, settings.REVIEW_MATRIX_CACHE_TIMEOUT)
+        return rows
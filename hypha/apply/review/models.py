@@ -125,22 +125,53 @@ class ReviewQuerySet(models.QuerySet):
         return self.exclude(score=NA).aggregate(models.Avg('score'))['score__avg']
 
     def recommendation(self):
-        opinions = self.values_list('opinions__opinion', flat=True)
+        summary = self.aggregate(
+            disagree=models.Count('opinions', filter=models.Q(opinions__opinion=DISAGREE)),
+            lowest=models.Min('recommendation'),
+            highest=models.Max('recommendation'),
+        )
 
-        if any(opinion == DISAGREE for opinion in opinions):
+        if summary['disagree']:
             return MAYBE
 
-        recommendations = self.values_list('recommendation', flat=True)
-        try:
-            recommendation = sum(recommendations) / len(recommendations)
-        except ZeroDivisionError:
+        if summary['lowest'] is None:
             return -1
 
-        if recommendation == YES or recommendation == NO:
-            # If everyone in agreement return Yes/No
-            return recommendation
-        else:
-            return MAYBE
+        # If everyone in agreement return Yes/No
+        if summary['highest'] == NO:
+            return NO
+        if summary['lowest'] == YES:
+            return YES
+        return MAYBE
+
+    def submission_score(self):
+        # The score of these reviews for each submission in an annotation
+        score = self.filter(
+            submission=models.OuterRef('pk'),
+        ).exclude(score=NA).values('submission').annotate(
+            calc_score=models.Avg('score'),
+        ).values('calc_score')
+        return models.Subquery(score, output_field=models.DecimalField())
+
+    def submission_recommendation(self):
+        # The same as recommendation for each submission in an annotation, None
+        # when there are no reviews
+        recommendation = self.filter(
+            submission=models.OuterRef('pk'),
+        ).values('submission').annotate(
+            disagree=models.Count('opinions', filter=models.Q(opinions__opinion=DISAGREE)),
+            lowest=models.Min('recommendation'),
+            highest=models.Max('recommendation'),
+        ).annotate(
+            calc_recommendation=models.Case(
+                models.When(disagree__gt=0, then=models.Value(MAYBE)),
+                models.When(highest=NO, then=models.Value(NO)),
+                models.When(lowest=YES, then=models.Value(YES)),
+                default=models.Value(MAYBE),
+                output_field=models.IntegerField(),
+            ),
+        ).values('calc_recommendation')
+        return models.Subquery(recommendation, output_field=models.IntegerField())
 
     def opinions(self):
         return ReviewOpinion.objects.filter(review__id__in=self.values_list('id'))
@@ -1,5 +1,6 @@
 from django.test import TestCase
 
+from hypha.apply.funds.models import ApplicationSubmission
 from hypha.apply.funds.tests.factories import ApplicationSubmissionFactory
 
 from ..options import MAYBE, NO, YES
@@ -35,6 +36,13 @@ class TestReviewQueryset(TestCase):
         recommendation = submission.reviews.recommendation()
         self.assertEqual(recommendation, MAYBE)
 
+    def test_reviews_no_and_maybe(self):
+        submission = ApplicationSubmissionFactory()
+        ReviewFactory(submission=submission)
+        ReviewFactory(recommendation_maybe=True, submission=submission)
+        recommendation = submission.reviews.recommendation()
+        self.assertEqual(recommendation, MAYBE)
+
     def test_review_yes_opinion_agree(self):
         submission = ApplicationSubmissionFactory()
         review = ReviewFactory(recommendation_yes=True, submission=submission)
@@ -78,3 +86,59 @@ class TestReviewQueryset(TestCase):
         ReviewOpinionFactory(review=review, opinion_disagree=True)
         recommendation = submission.reviews.recommendation()
         self.assertEqual(recommendation, MAYBE)
+
+
+class TestReviewSummaryAnnotation(TestCase):
+    def get_summary(self, submission):
+        return ApplicationSubmission.objects.with_review_summary().get(id=submission.id)
+
+    def assertMatchesRecommendation(self, submission):
+        summary = self.get_summary(submission)
+        self.assertEqual(summary.review_recommendation, submission.reviews.submitted().recommendation())
+        self.assertEqual(summary.review_score, submission.reviews.submitted().score())
+
+    def test_no_reviews(self):
+        submission = ApplicationSubmissionFactory()
+        summary = self.get_summary(submission)
+        self.assertIsNone(summary.review_recommendation)
+        self.assertIsNone(summary.review_score)
+
+    def test_reviews_yes(self):
+        submission = ApplicationSubmissionFactory()
+        ReviewFactory(recommendation_yes=True, submission=submission, score=4)
+        ReviewFactory(recommendation_yes=True, submission=submission, score=2)
+        self.assertMatchesRecommendation(submission)
+        self.assertEqual(self.get_summary(submission).review_recommendation, YES)
+
+    def test_reviews_no(self):
+        submission = ApplicationSubmissionFactory()
+        ReviewFactory(submission=submission)
+        ReviewFactory(submission=submission)
+        self.assertMatchesRecommendation(submission)
+
+    def test_reviews_mixed(self):
+        submission = ApplicationSubmissionFactory()
+        ReviewFactory(recommendation_yes=True, submission=submission)
+        ReviewFactory(submission=submission)
+        self.assertMatchesRecommendation(submission)
+        self.assertEqual(self.get_summary(submission).review_recommendation, MAYBE)
+
+    def test_review_opinion_disagree(self):
+        submission = ApplicationSubmissionFactory()
+        review = ReviewFactory(recommendation_yes=True, submission=submission)
+        ReviewOpinionFactory(review=review, opinion_disagree=True)
+        self.assertMatchesRecommendation(submission)
+        self.assertEqual(self.get_summary(submission).review_recommendation, MAYBE)
+
+    def test_ignores_drafts(self):
+        submission = ApplicationSubmissionFactory()
+        ReviewFactory(recommendation_yes=True, submission=submission)
+        ReviewFactory(submission=submission, is_draft=True)
+        self.assertEqual(self.get_summary(submission).review_recommendation, YES)
+
+    def test_annotates_in_one_query(self):
+        for _ in range(3):
+            submission = ApplicationSubmissionFactory()
+            ReviewFactory(recommendation_yes=True, submission=submission)
+        with self.assertNumQueries(1):
+            list(ApplicationSubmission.objects.with_review_summary())
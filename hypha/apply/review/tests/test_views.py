@@ -1,3 +1,7 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from hypha.apply.activity.models import Activity
@@ -10,6 +14,7 @@ from hypha.apply.funds.workflow import INITIAL_STATE
 from hypha.apply.users.tests.factories import ReviewerFactory, StaffFactory, UserFactory
 from hypha.apply.utils.testing.tests import BaseViewTestCase
 
+from ..matrix import ReviewMatrix
 from ..models import Review, ReviewOpinion
 from ..options import AGREE, DISAGREE, NA
 from ..views import get_fields_for_stage
@@ -261,6 +266,50 @@ class ReviewListTestCase(BaseViewTestCase):
         self.assertIn("Disagrees", response_opinion)
         self.assertIn(str(staff), response_opinion)
 
+    def test_review_list_queries_independent_of_reviewers(self):
+        submission = ApplicationSubmissionFactory(status='draft_proposal', workflow_stages=2)
+        review = ReviewFactory(submission=submission, author__reviewer=self.user, author__staff=True)
+        ReviewOpinionFactory(review=review, author__reviewer=StaffFactory(), opinion_agree=True)
+        matrix = ReviewMatrix(submission)
+        with CaptureQueriesContext(connection) as one_review:
+            matrix.build()
+
+        for _ in range(3):
+            review = ReviewFactory(submission=submission, author__staff=True)
+            ReviewOpinionFactory(review=review, author__reviewer=StaffFactory(), opinion_disagree=True)
+        with CaptureQueriesContext(connection) as many_reviews:
+            rows = matrix.build()
+        self.assertEqual(len(rows['title']['answers']), 4)
+        self.assertEqual(len(many_reviews), len(one_review))
+
+    def test_review_list_cached_until_opinion_changes(self):
+        submission = ApplicationSubmissionFactory(status='draft_proposal', workflow_stages=2)
+        review = ReviewFactory(submission=submission, author__reviewer=self.user, recommendation_yes=True)
+        opinion = ReviewOpinionFactory(review=review, author__reviewer=StaffFactory(), opinion_agree=True)
+        self.get_page(review)
+
+        with patch.object(ReviewMatrix, 'build') as build:
+            self.get_page(review)
+        build.assert_not_called()
+
+        opinion.opinion = DISAGREE
+        opinion.save()
+        response = self.get_page(review)
+        self.assertIn('Disagrees', response.context['review_data']['opinions']['answers'][0])
+
+    def test_review_list_changes_when_opinions_swap(self):
+        submission = ApplicationSubmissionFactory(status='draft_proposal', workflow_stages=2)
+        review = ReviewFactory(submission=submission, author__reviewer=self.user, recommendation_yes=True)
+        agree = ReviewOpinionFactory(review=review, author__reviewer=StaffFactory(), opinion_agree=True)
+        disagree = ReviewOpinionFactory(review=review, author__reviewer=StaffFactory(), opinion_disagree=True)
+        matrix = ReviewMatrix(submission)
+        key = matrix.get_cache_key()
+
+        agree.opinion, disagree.opinion = DISAGREE, AGREE
+        agree.save()
+        disagree.save()
+        self.assertNotEqual(matrix.get_cache_key(), key)
+
 
 class StaffReviewOpinionCase(BaseViewTestCase):
     user_factory = StaffFactory
@@ -1,9 +1,9 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.core.exceptions import PermissionDenied
+from django.db.models import Prefetch
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404
-from django.template.loader import get_template
 from django.urls import reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views.generic import (
@@ -13,26 +13,31 @@ from django.views.generic import (
     ListView,
     UpdateView,
 )
-from wagtail.core.blocks import RichTextBlock
 
 from hypha.apply.activity.messaging import MESSAGES, messenger
 from hypha.apply.funds.models import ApplicationSubmission, AssignedReviewers
 from hypha.apply.funds.workflow import INITIAL_STATE
-from hypha.apply.review.blocks import RecommendationBlock, RecommendationCommentsBlock
 from hypha.apply.review.forms import ReviewModelForm, ReviewOpinionForm
 from hypha.apply.stream_forms.models import BaseStreamForm
 from hypha.apply.users.decorators import staff_required
 from hypha.apply.users.groups import REVIEWER_GROUP_NAME
-from hypha.apply.utils.image import generate_image_tag
 from hypha.apply.utils.views import CreateOrUpdateView
 
-from .models import Review
+from .matrix import ReviewMatrix
+from .models import Review, ReviewOpinion
 from .options import DISAGREE
 
 
 class ReviewContextMixin:
     def get_context_data(self, **kwargs):
-        assigned_reviewers = self.object.assigned.review_order()
+        assigned_reviewers = self.object.assigned.review_order().select_related(
+            'review',
+        ).prefetch_related(
+            Prefetch(
+                'review__opinions',
+                queryset=ReviewOpinion.objects.select_related('author__reviewer', 'author__role'),
+            ),
+        )
 
         if not self.object.stage.has_external_review:
             assigned_reviewers = assigned_reviewers.staff()
@@ -344,55 +349,10 @@ class ReviewListView(ListView):
         self.queryset = self.model.objects.filter(submission=self.submission, is_draft=False)
         return super().get_queryset()
 
-    def should_display(self, field):
-        return not isinstance(field.block, (RecommendationBlock, RecommendationCommentsBlock, RichTextBlock))
-
     def get_context_data(self, **kwargs):
-        review_data = {}
-
-        # Add the header rows
-        review_data['title'] = {'question': '', 'answers': list()}
-        review_data['opinions'] = {'question': 'Opinions', 'answers': list()}
-        review_data['score'] = {'question': 'Overall Score', 'answers': list()}
-        review_data['recommendation'] = {'question': 'Recommendation', 'answers': list()}
-        review_data['revision'] = {'question': 'Revision', 'answers': list()}
-        review_data['comments'] = {'question': 'Comments', 'answers': list()}
-
-        responses = self.object_list.count()
-        ordered_reviewers = AssignedReviewers.objects.filter(submission=self.submission).reviewed().review_order()
-
-        reviews = {review.author: review for review in self.object_list}
-        for i, reviewer in enumerate(ordered_reviewers):
-            review = reviews[reviewer]
-            author = '<a href="{}"><span>{}</span></a>'.format(review.get_absolute_url(), review.author)
-            if review.author.role:
-                author += generate_image_tag(review.author.role.icon, '12x12')
-            author = f'<div>{author}</div>'
-
-            review_data['title']['answers'].append(author)
-            opinions_template = get_template('review/includes/review_opinions_list.html')
-            opinions_html = opinions_template.render({'opinions': review.opinions.select_related('author').all()})
-            review_data['opinions']['answers'].append(opinions_html)
-            review_data['score']['answers'].append(review.get_score_display)
-            review_data['recommendation']['answers'].append(review.get_recommendation_display())
-            review_data['comments']['answers'].append(review.get_comments_display(include_question=False))
-            if review.for_latest:
-                revision = 'Current'
-            else:
-                revision = '<a href="{}">Compare</a>'.format(review.get_compare_url())
-            review_data['revision']['answers'].append(revision)
-
-            for field_id in review.fields:
-                field = review.field(field_id)
-                data = review.data(field_id)
-                if self.should_display(field):
-                    question = field.value['field_label']
-                    review_data.setdefault(field.id, {'question': question, 'answers': [''] * responses})
-                    review_data[field.id]['answers'][i] = field.block.render(None, {'data': data})
-
         return super().get_context_data(
             submission=self.submission,
-            review_data=review_data,
+            review_data=ReviewMatrix(self.submission).get_rows(),
             **kwargs
         )
 
@@ -1,13 +1,20 @@
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Group
+from django.core.cache import cache
 from django.db import models
-from django.db.models import Q
+from django.db.models import Case, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from wagtail.admin.edit_handlers import FieldPanel, MultiFieldPanel
 from wagtail.contrib.settings.models import BaseSetting, register_setting
 from wagtail.core.fields import RichTextField
 
+from hypha.apply.utils.cache import CacheVersion, ReferenceCache
+from hypha.apply.utils.models import DeletionMarks
+
 from .groups import (
     APPLICANT_GROUP_NAME,
     APPROVER_GROUP_NAME,
@@ -18,8 +25,74 @@ from .groups import (
 )
 from .utils import send_activation_email
 
+# Bit for each of the groups which give a user a role, see User.role_flags
+ROLE_FLAGS = {
+    STAFF_GROUP_NAME: 1 << 0,
+    REVIEWER_GROUP_NAME: 1 << 1,
+    PARTNER_GROUP_NAME: 1 << 2,
+    COMMUNITY_REVIEWER_GROUP_NAME: 1 << 3,
+    APPLICANT_GROUP_NAME: 1 << 4,
+    APPROVER_GROUP_NAME: 1 << 5,
+}
+
+
+def role_flags_for(group_names):
+    flags = 0
+    for name in group_names:
+        flags |= ROLE_FLAGS.get(name, 0)
+    return flags
+
+
+# Replaced whenever any group membership changes, see load_role_flags
+roles_version = CacheVersion('user-roles', Group, timeout_setting='USER_ROLES_CACHE_TIMEOUT')
+
+
+def load_role_flags(user_id):
+    # The role bitmap of a user, cached between requests against the roles version
+    query = User.groups.through.objects.filter(user_id=user_id).values_list('group__name', flat=True)
+    timeout = roles_version.timeout
+    if not timeout:
+        return role_flags_for(query)
+
+    key = f'user-roles:{user_id}'
+    cached = cache.get_many([roles_version.key, key])
+    version = cached.get(roles_version.key)
+    if version is None:
+        version = roles_version.get()
+    try:
+        cached_version, flags = cached[key]
+    except KeyError:
+        pass
+    else:
+        if cached_version == version:
+            return flags
+
+    flags = role_flags_for(query)
+    cache.set(key, (version, flags), timeout)
+    return flags
+
+
+group_cache = ReferenceCache('groups', lambda: {group.name: group for group in Group.objects.all()}, Group)
+
+
+def get_group(name):
+    # The same as Group.objects.get(name=name) from the cached groups
+    try:
+        return group_cache.get()[name]
+    except KeyError:
+        raise Group.DoesNotExist(f'Group matching name "{name}" does not exist.')
+
+
+# The users being deleted, the signals of the cascade mustn't recreate their
+# review stats, see ReviewerStats
+deleting_users = DeletionMarks()
+
 
 class UserQuerySet(models.QuerySet):
+    def delete(self):
+        with deleting_users.deleting(self.values_list('id', flat=True)):
+            return super().delete()
+
     def staff(self):
         return self.filter(
             Q(groups__name=STAFF_GROUP_NAME) | Q(is_superuser=True)
@@ -40,6 +113,22 @@ class UserQuerySet(models.QuerySet):
     def approvers(self):
         return self.filter(groups__name=APPROVER_GROUP_NAME)
 
+    def with_roles(self):
+        # Annotates the role bitmap so checking the roles of each user doesn't
+        # need a query per user
+        memberships = self.model.groups.through.objects.filter(
+            user=OuterRef('pk'),
+        ).values('user').annotate(
+            flags=Sum(Case(
+                *[When(group__name=name, then=Value(flag)) for name, flag in ROLE_FLAGS.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )),
+        ).values('flags')
+        return self.annotate(
+            role_flags=Coalesce(Subquery(memberships, output_field=IntegerField()), Value(0)),
+        )
+
 
 class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     use_in_migrations = True
@@ -80,7 +169,7 @@ class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
         user, created = self.get_or_create(defaults=defaults, **kwargs)
         if created:
             send_activation_email(user, site)
-            applicant_group = Group.objects.get(name=APPLICANT_GROUP_NAME)
+            applicant_group = get_group(APPLICANT_GROUP_NAME)
             user.groups.add(applicant_group)
             user.save()
         return user, created
@@ -109,6 +198,10 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    def delete(self, *args, **kwargs):
+        with deleting_users.deleting([self.id]):
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.get_full_name() if self.get_full_name() else self.get_short_name()
 
@@ -129,28 +222,41 @@ class User(AbstractUser):
         return list(self.groups.values_list('name', flat=True))
 
     @cached_property
+    def role_flags(self):
+        # Replaced by the annotation from UserQuerySet.with_roles when used
+        if self.pk is None:
+            return 0
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'groups' in prefetched:
+            return role_flags_for(group.name for group in prefetched['groups'])
+        return load_role_flags(self.pk)
+
+    def has_role(self, group_name):
+        return bool(self.role_flags & ROLE_FLAGS[group_name])
+
+    @property
     def is_apply_staff(self):
-        return self.groups.filter(name=STAFF_GROUP_NAME).exists() or self.is_superuser
+        return self.has_role(STAFF_GROUP_NAME) or self.is_superuser
 
-    @cached_property
+    @property
     def is_reviewer(self):
-        return self.groups.filter(name=REVIEWER_GROUP_NAME).exists()
+        return self.has_role(REVIEWER_GROUP_NAME)
 
-    @cached_property
+    @property
     def is_partner(self):
-        return self.groups.filter(name=PARTNER_GROUP_NAME).exists()
+        return self.has_role(PARTNER_GROUP_NAME)
 
-    @cached_property
+    @property
     def is_community_reviewer(self):
-        return self.groups.filter(name=COMMUNITY_REVIEWER_GROUP_NAME).exists()
+        return self.has_role(COMMUNITY_REVIEWER_GROUP_NAME)
 
-    @cached_property
+    @property
     def is_applicant(self):
-        return self.groups.filter(name=APPLICANT_GROUP_NAME).exists()
+        return self.has_role(APPLICANT_GROUP_NAME)
 
-    @cached_property
+    @property
     def is_approver(self):
-        return self.groups.filter(name=APPROVER_GROUP_NAME).exists()
+        return self.has_role(APPROVER_GROUP_NAME)
 
     class Meta:
         ordering = ('full_name', 'email')
@@ -159,6 +265,15 @@ class User(AbstractUser):
         return f'<{self.__class__.__name__}: {self.full_name} ({self.email})>'
 
 
+@receiver(m2m_changed, sender=User.groups.through)
+def update_roles_for_groups(sender, instance, action, reverse, **kwargs):
+    if action not in {'post_add', 'post_remove', 'post_clear'}:
+        return
+    if not reverse:
+        instance.__dict__.pop('role_flags', None)
+    roles_version.invalidate()
+
+
 @register_setting
 class UserSettings(BaseSetting):
     class Meta:
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..groups import STAFF_GROUP_NAME
+from ..models import roles_version
+from .factories import (
+    ApproverFactory,
+    GroupFactory,
+    ReviewerFactory,
+    StaffFactory,
+    SuperUserFactory,
+    UserFactory,
+)
+
+User = get_user_model()
+
+
+class TestUserRoles(TestCase):
+    def test_roles_from_groups(self):
+        approver = User.objects.get(id=ApproverFactory().id)
+        with self.assertNumQueries(1):
+            self.assertTrue(approver.is_apply_staff)
+            self.assertTrue(approver.is_approver)
+            self.assertFalse(approver.is_reviewer)
+            self.assertFalse(approver.is_applicant)
+
+    def test_superuser_is_staff(self):
+        superuser = SuperUserFactory()
+        superuser.groups.clear()
+        self.assertTrue(superuser.is_apply_staff)
+
+    def test_roles_updated_when_groups_change(self):
+        user = UserFactory()
+        self.assertFalse(user.is_apply_staff)
+        user.groups.add(GroupFactory(name=STAFF_GROUP_NAME))
+        self.assertTrue(user.is_apply_staff)
+
+    def test_with_roles(self):
+        StaffFactory()
+        ReviewerFactory()
+        UserFactory()
+        with self.assertNumQueries(1):
+            users = list(User.objects.with_roles().order_by('id'))
+            self.assertEqual(
+                [(user.is_apply_staff, user.is_reviewer) for user in users],
+                [(True, False), (False, True), (False, False)],
+            )
+
+    def test_prefetched_groups(self):
+        ReviewerFactory()
+        with self.assertNumQueries(2):
+            user = User.objects.prefetch_related('groups').get()
+            self.assertTrue(user.is_reviewer)
+
+
+@override_settings(
+    USER_ROLES_CACHE_TIMEOUT=60,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class TestCachedUserRoles(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_roles_cached_between_instances(self):
+        reviewer = ReviewerFactory()
+        self.assertTrue(User.objects.get(id=reviewer.id).is_reviewer)
+        user = User.objects.get(id=reviewer.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.is_reviewer)
+
+    def test_cache_invalidated_by_group_change(self):
+        reviewer = ReviewerFactory()
+        self.assertFalse(User.objects.get(id=reviewer.id).is_apply_staff)
+        group = GroupFactory(name=STAFF_GROUP_NAME)
+        group.user_set.add(reviewer)
+        self.assertTrue(User.objects.get(id=reviewer.id).is_apply_staff)
+
+    def test_cache_invalidated_after_version_evicted(self):
+        reviewer = ReviewerFactory()
+        self.assertTrue(User.objects.get(id=reviewer.id).is_reviewer)
+        cache.delete(roles_version.key)
+        self.assertTrue(User.objects.get(id=reviewer.id).is_reviewer)
+        reviewer.groups.clear()
+        self.assertFalse(User.objects.get(id=reviewer.id).is_reviewer)
@@ -0,0 +1,138 @@
+import copy
+import threading
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+def get_redis_client(alias='default'):
+    """
+    The redis connection behind a cache, or None when the cache is not kept in
+    redis and so has no atomic list or set operations.
+    """
+    try:
+        from django_redis.cache import RedisCache
+    except ImportError:
+        return None
+    backend = caches[alias]
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend.client.get_client(write=True)
+
+
+class CacheVersion:
+    """
+    A version which entries in the shared cache are stored against, replaced
+    whenever one of the models is saved or deleted so the entries stored
+    against the old version are never used again.
+    """
+
+    def __init__(self, name, *models, timeout_setting):
+        self.name = name
+        self.timeout_setting = timeout_setting
+        # Invalidations held back by deferred, per thread as for the stats
+        self.deferred_invalidations = threading.local()
+        for model in models:
+            post_save.connect(self.invalidate, sender=model, weak=False)
+            post_delete.connect(self.invalidate, sender=model, weak=False)
+
+    @property
+    def key(self):
+        return f'version:{self.name}'
+
+    @property
+    def timeout(self):
+        return getattr(settings, self.timeout_setting)
+
+    def get(self):
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, self.new_version(), None)
+            version = cache.get(self.key)
+        return version
+
+    def new_version(self):
+        # Never a version which was used before, even if the version was evicted
+        # or a database cache rolled back with the transaction which changed it
+        return uuid.uuid4().hex
+
+    def invalidate(self, **kwargs):
+        if not self.timeout:
+            return
+        deferred = getattr(self.deferred_invalidations, 'stack', None)
+        if deferred:
+            deferred[-1].append(True)
+            return
+        # A new version is made when it is next asked for. It is replaced again
+        # after the commit, as until then other processes can still load the
+        # old rows and store them against the new version
+        cache.delete(self.key)
+        transaction.on_commit(lambda: cache.delete(self.key))
+
+    @contextmanager
+    def deferred(self):
+        # Holds back the invalidations made while changing many rows and
+        # invalidates once at the end
+        if not hasattr(self.deferred_invalidations, 'stack'):
+            self.deferred_invalidations.stack = []
+        invalidations = []
+        self.deferred_invalidations.stack.append(invalidations)
+        try:
+            yield
+        finally:
+            self.deferred_invalidations.stack.pop()
+        if invalidations:
+            self.invalidate()
+
+
+class ReferenceCache:
+    """
+    The rows of a small table which rarely changes, kept in the memory of each
+    process and in the shared cache.
+
+    Both copies are stored against a CacheVersion, so a stale copy is never
+    used. Each caller gets its own copy of the rows, which it is free to
+    change. Without a timeout the rows are loaded every time.
+    """
+
+    def __init__(self, name, load, *models, timeout_setting='REFERENCE_CACHE_TIMEOUT'):
+        self.name = name
+        self.load = load
+        self.version = CacheVersion(f'reference:{name}', timeout_setting=timeout_setting)
+        self.local = None
+        for model in models:
+            post_save.connect(self.invalidate, sender=model, weak=False)
+            post_delete.connect(self.invalidate, sender=model, weak=False)
+
+    @property
+    def key(self):
+        return f'reference:{self.name}'
+
+    def get(self):
+        timeout = self.version.timeout
+        if not timeout:
+            return self.load()
+
+        version = self.version.get()
+        if self.local and self.local[0] == version:
+            return copy.deepcopy(self.local[1])
+
+        cached = cache.get(self.key)
+        if cached and cached[0] == version:
+            value = cached[1]
+        else:
+            value = self.load()
+            cache.set(self.key, (version, value), timeout)
+        self.local = (version, value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, **kwargs):
+        self.local = None
+        self.version.invalidate()
+
+    def deferred(self):
+        return self.version.deferred()
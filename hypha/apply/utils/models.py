@@ -1,3 +1,6 @@
+import threading
+from contextlib import contextmanager
+
 from django.db import models
 from wagtail.admin.edit_handlers import FieldPanel
 from wagtail.contrib.settings.models import BaseSetting, register_setting
@@ -27,3 +30,32 @@ class PDFPageSettings(BaseSetting):
     panels = [
         FieldPanel('download_page_size'),
     ]
+
+
+class DeletionMarks(threading.local):
+    """
+    The ids of the instances of a model which this thread is deleting, so the
+    signals sent by the cascade can leave them out rather than recreate rows
+    which point at them.
+
+    The instances are marked from pre_delete to post_delete. A delete run in
+    deleting() also drops the marks when it fails, including those of the
+    instances it cascaded to.
+    """
+    def __init__(self):
+        self.ids = set()
+
+    def mark(self, sender, instance, **kwargs):
+        self.ids.add(instance.pk)
+
+    def unmark(self, sender, instance, **kwargs):
+        self.ids.discard(instance.pk)
+
+    @contextmanager
+    def deleting(self, ids):
+        marked = set(self.ids)
+        self.ids.update(ids)
+        try:
+            yield
+        finally:
+            self.ids = marked
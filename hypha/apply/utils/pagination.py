@@ -0,0 +1,169 @@
+import base64
+import json
+from datetime import date
+
+from django.core.paginator import Page
+from django.db import connection
+from django.db.models import Q
+from django_tables2.paginators import LazyPaginator
+from django_tables2.rows import BoundRows
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def flip(order):
+    return order[1:] if order.startswith('-') else f'-{order}'
+
+
+def encode_cursor(ordering, values, reverse=False):
+    data = {
+        'o': list(ordering),
+        'v': [value.isoformat() if isinstance(value, date) else value for value in values],
+        'r': reverse,
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering):
+    # Returns the position and direction stored in the cursor, which is only
+    # valid for the ordering it was created with
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, reverse = data['v'], data['r']
+        valid = data['o'] == list(ordering) and len(values) == len(ordering)
+    except (TypeError, ValueError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+    if not valid:
+        raise InvalidCursor('Cursor does not match the ordering')
+    return values, bool(reverse)
+
+
+def keyset_filter(ordering, values, reverse=False):
+    # Everything after the position in the ordering, or before it when reversed:
+    # (a > x) OR (a = x AND b > y) ...
+    condition = Q()
+    equal = {}
+    for order, value in zip(ordering, values):
+        field = order.lstrip('-')
+        descending = order.startswith('-') != reverse
+        condition |= Q(**equal, **{f'{field}__{"lt" if descending else "gt"}': value})
+        equal[field] = value
+    return condition
+
+
+class KeysetResult:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def paginate_keyset(queryset, ordering, per_page, cursor=None):
+    """Fetch a page of the queryset after (or before) the cursor
+
+    The ordering must end with a unique field so every row has a distinct
+    position, the database can then seek straight to the page using an index
+    rather than counting and skipping all the rows before it.
+    """
+    reverse = False
+    if cursor:
+        values, reverse = decode_cursor(cursor, ordering)
+        queryset = queryset.filter(keyset_filter(ordering, values, reverse))
+
+    order_by = [flip(order) if reverse else order for order in ordering]
+    objects = list(queryset.order_by(*order_by)[:per_page + 1])
+    has_more = len(objects) > per_page
+    objects = objects[:per_page]
+    if reverse:
+        objects.reverse()
+
+    has_next = has_more if not reverse else True
+    has_previous = bool(cursor) if not reverse else has_more
+
+    def position(obj):
+        return [getattr(obj, order.lstrip('-')) for order in ordering]
+
+    next_cursor = previous_cursor = None
+    if objects and has_next:
+        next_cursor = encode_cursor(ordering, position(objects[-1]))
+    if objects and has_previous:
+        previous_cursor = encode_cursor(ordering, position(objects[0]), reverse=True)
+    return KeysetResult(objects, next_cursor, previous_cursor)
+
+
+def approximate_count(model):
+    # The planner's estimate of the rows in the table, avoids a COUNT(*) when
+    # an exact figure isn't needed
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if not row or row[0] < 0:
+        # The table has never been analysed
+        return None
+    return row[0]
+
+
+class KeysetPage(Page):
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, 1, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return bool(self.next_cursor)
+
+    def has_previous(self):
+        return bool(self.previous_cursor)
+
+
+class KeysetPaginator(LazyPaginator):
+    """Table paginator which uses keyset pagination when ordered by a keyset field
+
+    The pages are then linked using opaque cursors rather than page numbers.
+    Any other ordering falls back to the LazyPaginator.
+    """
+    keyset_fields = ['submit_time']
+
+    def __init__(self, object_list, per_page, cursor=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cursor = cursor
+        self.ordering = self.get_keyset_ordering()
+
+    @property
+    def keyset(self):
+        return self.ordering is not None
+
+    def get_queryset(self):
+        # BoundRows -> TableQuerysetData -> QuerySet
+        return self.object_list.data.data
+
+    def get_keyset_ordering(self):
+        try:
+            order_by = self.get_queryset().query.order_by
+        except AttributeError:
+            return None
+        if len(order_by) != 1 or not isinstance(order_by[0], str):
+            return None
+        order = order_by[0]
+        if order.lstrip('-') not in self.keyset_fields:
+            return None
+        return (order, '-id' if order.startswith('-') else 'id')
+
+    def page(self, number):
+        if not self.keyset:
+            return super().page(number)
+
+        try:
+            result = paginate_keyset(self.get_queryset(), self.ordering, self.per_page, self.cursor)
+        except InvalidCursor:
+            # The ordering has changed since the cursor was created
+            result = paginate_keyset(self.get_queryset(), self.ordering, self.per_page)
+        self._num_pages = 2 if result.next_cursor or result.previous_cursor else 1
+        rows = BoundRows(result.object_list, table=self.object_list.table, pinned_data=self.object_list.pinned_data)
+        return KeysetPage(rows, self, result.next_cursor, result.previous_cursor)
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import zipfile
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.utils.functional import cached_property
+from django.utils.text import get_valid_filename
+
+from hypha.apply.stream_forms.files import StreamFieldDataEncoder
+
+from .pdfs import make_pdf
+from .storage import PrivateStorage
+from .tasks import render_pdf
+
+
+class CachedPDF:
+    """
+    A PDF of an object which is built by a celery worker and kept in private
+    storage.
+
+    The file is named after a hash of everything that goes into the PDF, so it
+    never needs to be invalidated: any change gives a new name and the PDFs it
+    replaces at the same page size are deleted once it is saved. Subclasses
+    provide the model, the fingerprint and the sections. Bump
+    template_version when the layout of the PDF changes.
+
+    A PDF which fails to build max_attempts times isn't queued again until
+    failure_timeout has passed, and the views show an error instead.
+    """
+    model = None
+    template_version = 1
+    storage = PrivateStorage()
+    # Seconds before a PDF which hasn't appeared is queued again
+    pending_timeout = 600
+    # Seconds the cache remembers that a PDF has been built
+    ready_timeout = 60 * 60 * 24 * 7
+    # Builds which may fail, and the seconds before they can be tried again
+    max_attempts = 3
+    failure_timeout = 600
+
+    def __init__(self, obj, pagesize):
+        self.object = obj
+        self.pagesize = pagesize
+
+    def get_fingerprint(self):
+        raise NotImplementedError()
+
+    def get_sections(self):
+        raise NotImplementedError()
+
+    def get_title(self):
+        return self.object.title
+
+    @property
+    def filename(self):
+        return self.get_title() + '.pdf'
+
+    @property
+    def archive_name(self):
+        return get_valid_filename(f'{self.object.pk} {self.filename}')
+
+    @cached_property
+    def name(self):
+        data = json.dumps(
+            [self.template_version, self.pagesize, self.get_fingerprint()],
+            cls=StreamFieldDataEncoder,
+        )
+        digest = hashlib.sha256(data.encode()).hexdigest()
+        return f'{self.directory}/{digest}.pdf'
+
+    @property
+    def directory(self):
+        return f'pdfs/{self.model._meta.model_name}/{self.object.pk}/{self.pagesize}'
+
+    @staticmethod
+    def pending_key(name):
+        return f'pdf-pending:{name}'
+
+    @staticmethod
+    def ready_key(name):
+        return f'pdf-ready:{name}'
+
+    @staticmethod
+    def failed_key(name):
+        return f'pdf-failed:{name}'
+
+    @classmethod
+    def record_failure(cls, name):
+        # Counts the failed builds of the PDF since the first of them
+        cache.add(cls.failed_key(name), 0, cls.failure_timeout)
+        cache.incr(cls.failed_key(name))
+
+    def has_failed(self):
+        return cache.get(self.failed_key(self.name), 0) >= self.max_attempts
+
+    def exists(self):
+        return self.storage.exists(self.name)
+
+    def open(self):
+        return self.storage.open(self.name)
+
+    def render(self):
+        return make_pdf(
+            title=self.get_title(),
+            sections=self.get_sections(),
+            pagesize=self.pagesize,
+        )
+
+    def save(self):
+        if not self.exists():
+            self.storage.save(self.name, ContentFile(self.render().getvalue()))
+            self.delete_superseded()
+        cache.set(self.ready_key(self.name), True, self.ready_timeout)
+
+    def delete_superseded(self):
+        # The PDFs of other versions of the object, which are built again if
+        # the object changes back to one of them
+        _, files = self.storage.listdir(self.directory)
+        names = [f'{self.directory}/{filename}' for filename in files]
+        superseded = [name for name in names if name != self.name]
+        for name in superseded:
+            self.storage.delete(name)
+        cache.delete_many([self.ready_key(name) for name in superseded])
+
+    def schedule(self):
+        # Queue the PDF to be built, unless it already has been or keeps failing
+        if self.has_failed():
+            return
+        if cache.add(self.pending_key(self.name), True, self.pending_timeout):
+            pdf_class = f'{self.__class__.__module__}.{self.__class__.__qualname__}'
+            render_pdf.delay(pdf_class, self.object.pk, self.pagesize, self.name)
+
+
+def missing_pdf_names(names):
+    """
+    The names of the PDFs which the cache doesn't know to have been built, in
+    a single lookup rather than asking the storage about each of them. A PDF
+    which the cache has forgotten is rebuilt by render_pdf, or just marked as
+    ready again when the file is still there.
+    """
+    ready = cache.get_many([CachedPDF.ready_key(name) for name in names])
+    return [name for name in names if CachedPDF.ready_key(name) not in ready]
+
+
+def failed_pdf_names(names, attempts=CachedPDF.max_attempts):
+    # The names of the PDFs which have failed to build at least attempts times,
+    # by default too often to be queued again
+    failed = cache.get_many([CachedPDF.failed_key(name) for name in names])
+    return [
+        name for name in names
+        if failed.get(CachedPDF.failed_key(name), 0) >= attempts
+    ]
+
+
+class ZipBuffer:
+    # A file for zipfile to write to, which hands over what has been written
+    # so far each time it is read from
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_pdf_zip(pdfs):
+    """
+    Yield a zip archive of the PDFs, which should all have been built, adding
+    them one at a time.
+    """
+    buffer = ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for pdf in pdfs:
+            if pdf.exists():
+                with pdf.open() as pdf_file:
+                    content = pdf_file.read()
+            else:
+                # Replaced by another version since it was found to be ready,
+                # so this one is rendered without keeping it
+                content = pdf.render().getvalue()
+            archive.writestr(pdf.archive_name, content)
+            yield buffer.read()
+    yield buffer.read()
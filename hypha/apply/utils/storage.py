@@ -1,12 +1,29 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.storage import get_storage_class
-from django.http import FileResponse
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.utils.cache import add_never_cache_headers, get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from django.views.generic import View
 
 private_file_storage = getattr(settings, 'PRIVATE_FILE_STORAGE', None)
 PrivateStorage = get_storage_class(private_file_storage)
 
+# Only a single range is served, anything else gets the whole file
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class PrivateMediaView(LoginRequiredMixin, View):
     """
@@ -16,8 +33,13 @@ class PrivateMediaView(LoginRequiredMixin, View):
     Classes inheriting from this should implement their own access requirements
     based on the file being served, this class will only ensure that the file
     is not made public to unauthenticated users.
+
+    Once access has been granted the file is handed over as configured by
+    PRIVATE_MEDIA_SERVING, so large files don't need to pass through Django.
     """
     storage = PrivateStorage()
+    # One of 'stream', 'redirect', 'accel' or 'sendfile', see the settings
+    serving = None
 
     def get_media(self, *args, **kwargs):
         """
@@ -31,4 +53,163 @@ class PrivateMediaView(LoginRequiredMixin, View):
 
     def get(self, *args, **kwargs):
         file_to_serve = self.get_media(*args, **kwargs)
-        return FileResponse(file_to_serve)
+        # Files from a model field know their storage, opened files are ours
+        storage = getattr(file_to_serve, 'storage', self.storage)
+
+        serving = self.serving or settings.PRIVATE_MEDIA_SERVING
+        serve = getattr(self, f'serve_{serving}', None)
+        if serve is None:
+            raise ImproperlyConfigured(f'Unknown private media serving "{serving}"')
+
+        response = serve(file_to_serve, storage)
+        if response is None:
+            if not settings.PRIVATE_MEDIA_STREAM_FALLBACK:
+                raise ImproperlyConfigured(
+                    f'{storage.__class__.__name__} can not be served with "{serving}"'
+                )
+            response = self.serve_stream(file_to_serve, storage)
+        return response
+
+    def get_filename(self, file_to_serve):
+        return os.path.basename(file_to_serve.name)
+
+    def get_content_type(self, file_to_serve):
+        content_type, _ = mimetypes.guess_type(self.get_filename(file_to_serve))
+        return content_type or 'application/octet-stream'
+
+    def get_content_disposition(self, file_to_serve):
+        filename = self.get_filename(file_to_serve)
+        try:
+            filename.encode('ascii')
+            return f'inline; filename="{filename}"'
+        except UnicodeEncodeError:
+            return f"inline; filename*=utf-8''{quote(filename)}"
+
+    def get_local_path(self, file_to_serve, storage):
+        try:
+            return storage.path(file_to_serve.name)
+        except NotImplementedError:
+            return None
+
+    def serve_redirect(self, file_to_serve, storage):
+        # Only storages which sign their URLs keep the file private
+        if not getattr(storage, 'querystring_auth', False):
+            return None
+        file_to_serve.close()
+        response = HttpResponseRedirect(
+            storage.url(file_to_serve.name, expire=settings.PRIVATE_MEDIA_REDIRECT_EXPIRY)
+        )
+        # The signed URL expires so the redirect mustn't outlive it
+        add_never_cache_headers(response)
+        return response
+
+    def serve_local(self, file_to_serve, header, value):
+        file_to_serve.close()
+        response = HttpResponse(content_type=self.get_content_type(file_to_serve))
+        response['Content-Disposition'] = self.get_content_disposition(file_to_serve)
+        response[header] = value
+        return response
+
+    def serve_accel(self, file_to_serve, storage):
+        path = self.get_local_path(file_to_serve, storage)
+        if path is None:
+            return None
+        location = os.path.relpath(path, storage.location).replace(os.sep, '/')
+        prefix = settings.PRIVATE_MEDIA_ACCEL_PREFIX.rstrip('/')
+        return self.serve_local(file_to_serve, 'X-Accel-Redirect', quote(f'{prefix}/{location}'))
+
+    def serve_sendfile(self, file_to_serve, storage):
+        path = self.get_local_path(file_to_serve, storage)
+        if path is None:
+            return None
+        return self.serve_local(file_to_serve, 'X-Sendfile', path)
+
+    def get_modified_time(self, file_to_serve, storage):
+        try:
+            return int(storage.get_modified_time(file_to_serve.name).timestamp())
+        except (NotImplementedError, OSError):
+            return None
+
+    def get_range(self, size, etag, last_modified):
+        """
+        The (start, end) of the bytes asked for, None for the whole file or
+        False when the range can't be satisfied.
+        """
+        match = RANGE_RE.match(self.request.META.get('HTTP_RANGE', '').strip())
+        if not match:
+            return None
+
+        if_range = self.request.META.get('HTTP_IF_RANGE')
+        if if_range:
+            # The range is only for the version of the file the client has
+            if if_range.startswith(('"', 'W/')):
+                if if_range != etag:
+                    return None
+            elif last_modified is None or parse_http_date_safe(if_range) != last_modified:
+                return None
+
+        start, end = match.groups()
+        if not start:
+            if not end:
+                return None
+            # The last bytes of the file
+            suffix = int(end)
+            if not suffix or not size:
+                return False
+            return max(size - suffix, 0), size - 1
+
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+        if start >= size:
+            return False
+        if start > end:
+            return None
+        return start, end
+
+    def read_range(self, file_to_serve, start, length):
+        try:
+            file_to_serve.seek(start)
+            while length > 0:
+                data = file_to_serve.read(min(STREAM_CHUNK_SIZE, length))
+                if not data:
+                    break
+                length -= len(data)
+                yield data
+        finally:
+            file_to_serve.close()
+
+    def serve_stream(self, file_to_serve, storage):
+        size = file_to_serve.size
+        last_modified = self.get_modified_time(file_to_serve, storage)
+        etag = quote_etag(f'{size:x}-{last_modified:x}') if last_modified is not None else None
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            file_to_serve.close()
+            return response
+
+        byte_range = self.get_range(size, etag, last_modified)
+        if byte_range is False:
+            file_to_serve.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                self.read_range(file_to_serve, start, length),
+                status=206,
+                content_type=self.get_content_type(file_to_serve),
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = length
+            response['Content-Disposition'] = self.get_content_disposition(file_to_serve)
+        else:
+            response = FileResponse(file_to_serve)
+
+        response['Accept-Ranges'] = 'bytes'
+        if etag:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
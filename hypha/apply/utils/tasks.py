@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.module_loading import import_string
+
+from hypha.apply.activity.tasks import app
+
+
+@app.task
+def render_pdf(pdf_class, pk, pagesize, name):
+    # Builds the PDF and puts it into private storage, see CachedPDF
+    pdf_class = import_string(pdf_class)
+    try:
+        obj = pdf_class.model._default_manager.get(pk=pk)
+        pdf_class(obj, pagesize).save()
+    except ObjectDoesNotExist:
+        pass
+    except Exception:
+        # So the views stop waiting for it after a few attempts
+        pdf_class.record_failure(name)
+        raise
+    finally:
+        cache.delete(pdf_class.pending_key(name))
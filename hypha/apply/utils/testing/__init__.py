@@ -1 +1 @@
-from .tests import BaseViewTestCase, make_request  # NOQA
+from .tests import BaseViewTestCase, FakeRedis, make_request  # NOQA
@@ -16,6 +16,40 @@ def make_request(user=AnonymousUser(), data={}, method='get', site=None):
     return request
 
 
+class FakeRedis:
+    """The list commands of redis used by the queues in the cache, kept in memory."""
+
+    def __init__(self):
+        self.lists = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        lists = self.redis.lists
+        results = []
+        for name, args in self.commands:
+            if name == 'rpush':
+                lists.setdefault(args[0], []).append(args[1])
+                results.append(len(lists[args[0]]))
+            elif name == 'lrange':
+                results.append(list(lists.get(args[0], [])))
+            elif name == 'delete':
+                results.append(int(lists.pop(args[0], None) is not None))
+            else:
+                results.append(True)
+        return results
+
+
 @override_settings(ROOT_URLCONF='hypha.apply.urls')
 class BaseViewTestCase(TestCase):
     """
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, TestCase, override_settings
+
+from hypha.apply.users.tests.factories import UserFactory
+
+from ..storage import PrivateMediaView
+
+CONTENT = b'0123456789' * 10
+
+
+class SignedStorage(FileSystemStorage):
+    querystring_auth = True
+
+    def _open(self, name, mode='rb'):
+        # Like S3 the opened file keeps the name it is stored under
+        file = super()._open(name, mode)
+        file.name = name
+        return file
+
+    def url(self, name, expire=None):
+        return f'https://bucket.example.com/{name}?expires={expire}'
+
+
+class MediaView(PrivateMediaView):
+    def get_media(self, *args, **kwargs):
+        return self.storage.open(kwargs['name'])
+
+
+@override_settings(PRIVATE_MEDIA_SERVING='stream', PRIVATE_MEDIA_STREAM_FALLBACK=True)
+class TestPrivateMediaView(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = FileSystemStorage(location=self.location)
+        self.name = self.storage.save('folder/document.pdf', ContentFile(CONTENT))
+        self.user = UserFactory()
+
+    def get(self, storage=None, serving=None, **headers):
+        request = RequestFactory().get('/', **headers)
+        request.user = self.user
+        view = MediaView.as_view(storage=storage or self.storage, serving=serving)
+        return view(request, name=self.name)
+
+    def test_streams_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'])
+
+    def test_streams_range(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+    def test_streams_suffix_range(self):
+        response = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-5:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_gets_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_matching_if_range_gets_range(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_redirects_to_signed_url(self):
+        response = self.get(storage=SignedStorage(location=self.location), serving='redirect')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, f'https://bucket.example.com/{self.name}?expires=60')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_redirect_falls_back_to_stream(self):
+        response = self.get(serving='redirect')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    @override_settings(PRIVATE_MEDIA_ACCEL_PREFIX='/protected/')
+    def test_accel_redirect(self):
+        response = self.get(serving='accel')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/folder/document.pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content, b'')
+
+    def test_sendfile(self):
+        response = self.get(serving='sendfile')
+        self.assertEqual(response['X-Sendfile'], self.storage.path(self.name))
@@ -1,20 +1,26 @@
 from django.contrib.auth.decorators import login_required
 from django.db.models import ProtectedError
 from django.forms.models import ModelForm
-from django.http import HttpResponseForbidden
+from django.http import FileResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
 from django.views import defaults
 from django.views.generic import View
 from django.views.generic.base import ContextMixin
-from django.views.generic.detail import SingleObjectTemplateResponseMixin
+from django.views.generic.detail import (
+    SingleObjectMixin,
+    SingleObjectTemplateResponseMixin,
+)
 from django.views.generic.edit import ModelFormMixin, ProcessFormView
 from wagtail.admin import messages
 from wagtail.admin.auth import require_admin_access
 from wagtail.admin.views.pages import delete
 from wagtail.core.models import Page
 
+from .models import PDFPageSettings
+
 
 def page_not_found(request, exception=None, template_name='apply/404.html'):
     if not request.user.is_authenticated:
@@ -249,3 +255,45 @@ def custom_wagtail_page_delete(request, page_id):
             page.get_admin_display_title(), protected_details
         ))
         return redirect('wagtailadmin_explore', parent_id)
+
+
+class CachedPDFView(SingleObjectMixin, View):
+    """
+    Download the PDF of the object from the cache in private storage. When it
+    hasn't been built yet it is queued and the user is shown a page which
+    refreshes until it is ready, or until it has failed to build too often.
+    """
+    pdf_class = None
+    preparing_template_name = 'apply/pdf_preparing.html'
+    failed_template_name = 'apply/pdf_failed.html'
+    refresh_interval = 5
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        pdf_page_settings = PDFPageSettings.for_request(request)
+        pdf = self.pdf_class(self.object, pdf_page_settings.download_page_size)
+        if not pdf.exists():
+            pdf.schedule()
+            # Without a celery broker the PDF is built straight away
+            if not pdf.exists():
+                if pdf.has_failed():
+                    return TemplateResponse(
+                        request,
+                        self.failed_template_name,
+                        {'object': self.object},
+                        status=500,
+                    )
+                response = TemplateResponse(
+                    request,
+                    self.preparing_template_name,
+                    {'object': self.object},
+                    status=202,
+                )
+                response['Refresh'] = self.refresh_interval
+                return response
+
+        return FileResponse(
+            pdf.open(),
+            as_attachment=True,
+            filename=pdf.filename,
+        )
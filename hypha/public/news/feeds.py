@@ -6,6 +6,7 @@ from django.http import Http404
 from wagtail.core.models import Site
 
 from hypha.public.news.models import NewsFeedSettings, NewsIndex, NewsPage, NewsType
+from hypha.public.utils.cache import listing_tag, tag_cache_entry
 
 
 class NewsFeed(Feed):
@@ -22,6 +23,11 @@ class NewsFeed(Feed):
         if response is None:
             response = super().__call__(request, *args, **kwargs)
             cache.set(cache_key, response, settings.FEED_CACHE_TIMEOUT)
+            # Purged whenever a news page is published or unpublished
+            tag_cache_entry(
+                [listing_tag(NewsPage)], 'default', [cache_key], request.build_absolute_uri(),
+                timeout=settings.FEED_CACHE_TIMEOUT,
+            )
 
         return response
 
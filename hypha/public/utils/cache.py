@@ -1,11 +1,322 @@
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from urllib.parse import urlsplit
+
+from django.apps import apps
 from django.conf import settings
-from wagtail.contrib.frontend_cache.utils import purge_url_from_cache
-from wagtail.core.models import Site
+from django.core.cache import caches
+from django.core.handlers.base import BaseHandler
+from django.db import models, transaction
+from django.dispatch import receiver
+from django.test import RequestFactory
+from django.utils.cache import get_cache_key
+from modelcluster.fields import ParentalKey
+from wagtail.contrib.frontend_cache.backends import BaseBackend
+from wagtail.core.models import Page, Site
+from wagtail.core.signals import page_published, page_unpublished
+from wagtailcache.cache import cache_page as wagtailcache_page
+from wagtailcache.cache import clear_cache
+from wagtailcache.settings import wagtailcache_settings
+
+from hypha.apply.utils.cache import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# The URLs collected by batched_purges, per thread as each request has its own
+_purge_queues = threading.local()
 
 
-def purge_cache_on_all_sites(path):
-    if settings.DEBUG:
+def purge_cache_on_all_sites(*paths):
+    """
+    Purge the paths on every site from the frontend cache. The URLs are sent
+    in one batch after the commit, or at the end of batched_purges.
+    """
+    if settings.DEBUG or not getattr(settings, 'WAGTAILFRONTENDCACHE', None):
         return
 
-    for site in Site.objects.all():
-        purge_url_from_cache('%s%s' % (site.root_url.rstrip('/'), path))
+    urls = {
+        '%s%s' % (root_url.rstrip('/'), path)
+        for _, _, root_url, *_ in Site.get_site_root_paths()
+        for path in paths
+    }
+    queues = getattr(_purge_queues, 'stack', None)
+    if queues:
+        queues[-1].update(urls)
+    elif urls:
+        queue_purge(urls)
+
+
+def queue_purge(urls):
+    # After the commit, so the frontend cache isn't filled again from the old content
+    from .tasks import purge_frontend_cache
+    urls = sorted(urls)
+    transaction.on_commit(lambda: purge_frontend_cache.delay(urls))
+
+
+@contextmanager
+def batched_purges():
+    """
+    Collect the URLs purged in the block, without duplicates, and purge them
+    together when it ends.
+    """
+    if not hasattr(_purge_queues, 'stack'):
+        _purge_queues.stack = []
+    urls = set()
+    _purge_queues.stack.append(urls)
+    try:
+        yield
+    finally:
+        _purge_queues.stack.pop()
+    if urls:
+        queue_purge(urls)
+
+
+def frontend_cache_purge_middleware(get_response):
+    # Everything purged while handling a request is sent in one batch
+    def middleware(request):
+        with batched_purges():
+            return get_response(request)
+
+    return middleware
+
+
+class LocalFrontendCacheBackend(BaseBackend):
+    """
+    Stand-in for the Cloudflare backend which keeps the purged URLs, for tests
+    and local development.
+    """
+    batches = []
+
+    def __init__(self, params):
+        pass
+
+    def purge(self, url):
+        self.purge_batch([url])
+
+    def purge_batch(self, urls):
+        self.batches.append(list(urls))
+
+
+def page_tag(page_id):
+    return f'page:{page_id}'
+
+
+def listing_tag(model):
+    return f'listing:{model._meta.label_lower}'
+
+
+def tag_key(tag):
+    return f'cache-tag:{tag}'
+
+
+# A tag rendered this many times without being purged mostly points at entries
+# which have expired, so it is purged and starts again
+MAX_TAG_SLOTS = 500
+
+
+def get_tag_client():
+    return get_redis_client(wagtailcache_settings.WAGTAIL_CACHE_BACKEND)
+
+
+def tag_cache_entry(tags, alias, keys, url, timeout=None):
+    """
+    Record that the cached entries under the keys of the alias cache depend on
+    the tags, so they are removed when any of the tags is purged.
+
+    Each tag is a redis list, like the slack queue, so concurrent renders
+    never lose each other's entries. Other caches can't append atomically so
+    nothing is recorded, and publishing clears the whole cache instead. The
+    list lives as long as the last entry in it, and is purged once it holds
+    more than MAX_TAG_SLOTS.
+    """
+    client = get_tag_client()
+    if client is None:
+        return
+    registry = caches[wagtailcache_settings.WAGTAIL_CACHE_BACKEND]
+    entry = json.dumps([alias, keys, url])
+    timeout = timeout or caches[alias].default_timeout
+    for tag in tags:
+        key = registry.make_key(tag_key(tag))
+        if push_tag_entry(client, key, entry, timeout) > MAX_TAG_SLOTS:
+            purge_tags([tag])
+            push_tag_entry(client, key, entry, timeout)
+
+
+def push_tag_entry(client, key, entry, timeout):
+    # Returns the number of entries in the tag
+    pipe = client.pipeline()
+    pipe.rpush(key, entry)
+    if timeout:
+        pipe.expire(key, timeout)
+    return pipe.execute()[0]
+
+
+def purge_tags(tags):
+    """
+    Remove the cached entries which depend on any of the tags and return the
+    URLs they were rendered for.
+    """
+    client = get_tag_client()
+    if client is None:
+        return set()
+    registry = caches[wagtailcache_settings.WAGTAIL_CACHE_BACKEND]
+    # Read and clear the tags in one transaction
+    pipe = client.pipeline(transaction=True)
+    for tag in tags:
+        key = registry.make_key(tag_key(tag))
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+    results = pipe.execute()
+
+    cached = {}
+    urls = set()
+    for queued in results[::2]:
+        for entry in queued:
+            alias, entry_keys, url = json.loads(entry)
+            cached.setdefault(alias, set()).update(entry_keys)
+            urls.add(url)
+    for alias, entry_keys in cached.items():
+        caches[alias].delete_many(list(entry_keys))
+    return urls
+
+
+def cache_page(view_func):
+    """
+    The wagtail-cache decorator which also tags the cached response with
+    the request's cache_tags, see BasePage.serve.
+    """
+    cached_view = wagtailcache_page(view_func)
+
+    @wraps(view_func)
+    def _wrapped_view_func(request, *args, **kwargs):
+        response = cached_view(request, *args, **kwargs)
+        tags = getattr(request, 'cache_tags', None)
+        if tags and getattr(request, '_wagtailcache_update', False):
+            alias = wagtailcache_settings.WAGTAIL_CACHE_BACKEND
+            keys = [
+                key for key in (
+                    get_cache_key(request, None, method, cache=caches[alias])
+                    for method in ('GET', 'HEAD')
+                ) if key
+            ]
+            if keys:
+                tag_cache_entry(tags, alias, keys, request.build_absolute_uri())
+        return response
+
+    return _wrapped_view_func
+
+
+@lru_cache()
+def page_references():
+    """
+    Every foreign key to a page from a page, or from the inline models of a
+    page, as (model, field, source) where source holds the page showing it.
+    """
+    references = []
+    for model in apps.get_models():
+        if issubclass(model, Page):
+            source = 'pk'
+        else:
+            source = next((
+                field.name for field in model._meta.fields
+                if isinstance(field, ParentalKey) and issubclass(field.related_model, Page)
+            ), None)
+            if source is None:
+                continue
+
+        for field in model._meta.fields:
+            if not isinstance(field, models.ForeignKey) or isinstance(field, ParentalKey):
+                continue
+            # Inherited fields are checked on the model they come from
+            if field.remote_field.parent_link or field.model is not model:
+                continue
+            if issubclass(field.related_model, Page):
+                references.append((model, field.name, source))
+    return references
+
+
+def get_dependent_page_ids(page):
+    """
+    The pages whose content changes with the page: itself, the index pages
+    above it and the pages which link to it.
+    """
+    page_ids = {page.pk}
+    page_ids.update(page.get_ancestors().filter(depth__gt=1).values_list('pk', flat=True))
+    for model, field, source in page_references():
+        if isinstance(page, model._meta.get_field(field).related_model):
+            page_ids.update(
+                model._default_manager.filter(**{field: page.pk}).values_list(source, flat=True)
+            )
+    page_ids.discard(None)
+    return page_ids
+
+
+def purge_page_dependents(page, page_ids=None):
+    """
+    Remove the cached responses which show the page, instead of the whole
+    cache when it is kept in redis, purge them from the frontend cache and
+    render them again.
+    """
+    if page_ids is None:
+        page_ids = get_dependent_page_ids(page)
+    if get_tag_client() is None:
+        # The entries aren't tagged without redis, see tag_cache_entry
+        clear_cache()
+        urls = set()
+    else:
+        tags = [page_tag(page_id) for page_id in page_ids]
+        tags.append(listing_tag(page.specific_class or type(page)))
+        urls = purge_tags(tags)
+
+    urls.update(
+        dependent.full_url for dependent in Page.objects.filter(id__in=page_ids).live()
+    )
+    urls.add(page.full_url)
+    urls.discard(None)
+
+    purge_cache_on_all_sites(*{urlsplit(url)._replace(scheme='', netloc='').geturl() for url in urls})
+
+    if settings.WAGTAIL_CACHE_WARM and wagtailcache_settings.WAGTAIL_CACHE:
+        from .tasks import warm_cache
+        warm_cache.delay(sorted(urls))
+
+
+@lru_cache()
+def get_request_handler():
+    # Loads the middleware once per process, like the WSGI handler
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def warm_urls(urls):
+    """
+    Render each URL as an anonymous visitor so it is cached again before the
+    next visitor asks for it. Returns how many were rendered.
+    """
+    handler = get_request_handler()
+    factory = RequestFactory()
+    rendered = 0
+    for url in urls:
+        parts = urlsplit(url)
+        path = parts._replace(scheme='', netloc='').geturl() or '/'
+        try:
+            # Through the middleware, without cookies like a new visitor
+            handler.get_response(factory.get(path, HTTP_HOST=parts.netloc, secure=parts.scheme == 'https'))
+        except Exception:
+            logger.exception('Could not warm the cache for %s', url)
+        else:
+            rendered += 1
+    return rendered
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def purge_dependents_on_publish(sender, instance, **kwargs):
+    # The links to a deleted page are gone by the commit, so find them now but
+    # purge after the commit so the pages aren't cached again from the old content
+    page_ids = get_dependent_page_ids(instance)
+    transaction.on_commit(lambda: purge_page_dependents(instance, page_ids))
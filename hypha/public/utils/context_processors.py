@@ -6,9 +6,18 @@ from hypha.public.mailchimp.forms import NewsletterForm
 
 
 def global_vars(request):
+    # Templates rendered many times for one request, e.g. a batch of emails,
+    # only need to look the sites up once
+    try:
+        sites = request._global_sites
+    except AttributeError:
+        sites = request._global_sites = {
+            'APPLY_SITE': ApplyHomePage.objects.first().get_site(),
+            'PUBLIC_SITE': HomePage.objects.first().get_site(),
+        }
+
     return {
-        'APPLY_SITE': ApplyHomePage.objects.first().get_site(),
-        'PUBLIC_SITE': HomePage.objects.first().get_site(),
+        **sites,
         'newsletter_form': NewsletterForm(),
         'newsletter_enabled': settings.MAILCHIMP_API_KEY and settings.MAILCHIMP_LIST_ID,
         'ORG_LONG_NAME': settings.ORG_LONG_NAME,
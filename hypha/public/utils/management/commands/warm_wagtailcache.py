@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from wagtail.core.models import Page
+
+from hypha.public.utils.cache import warm_urls
+from hypha.public.utils.tasks import warm_cache
+
+
+class Command(BaseCommand):
+    help = "Render pages as an anonymous visitor so they are in the page cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls',
+            nargs='*',
+            help='Only warm these URLs, otherwise every live public page.',
+        )
+        parser.add_argument(
+            '--background',
+            action='store_true',
+            help='Queue the pages to be rendered by the workers.',
+        )
+
+    def handle(self, *args, **options):
+        urls = options['urls']
+        if not urls:
+            pages = Page.objects.live().public().filter(depth__gt=1)
+            urls = [url for url in (page.full_url for page in pages) if url]
+
+        if options['background']:
+            warm_cache.delay(urls)
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(urls)} pages'))
+            return
+
+        rendered = warm_urls(urls)
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} of {len(urls)} pages'))
@@ -16,7 +16,9 @@ from wagtail.core.fields import RichTextField, StreamField
 from wagtail.core.models import Orderable, Page
 from wagtail.images.edit_handlers import ImageChooserPanel
 from wagtail.snippets.models import register_snippet
-from wagtailcache.cache import WagtailCacheMixin, cache_page
+from wagtailcache.cache import WagtailCacheMixin
+
+from .cache import cache_page, page_tag
 
 
 class LinkFields(models.Model):
@@ -308,6 +310,11 @@ class BasePage(WagtailCacheMixin, SocialFields, ListingFields, Page):
     def cache_control(self):
         return f'public, s-maxage={settings.CACHE_CONTROL_S_MAXAGE}'
 
+    def serve(self, request, *args, **kwargs):
+        # The cached response is purged with this page, see purge_page_dependents
+        request.cache_tags = [page_tag(self.pk)]
+        return super().serve(request, *args, **kwargs)
+
 
 class BaseFunding(Orderable):
     value = models.PositiveIntegerField()
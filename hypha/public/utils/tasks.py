@@ -0,0 +1,17 @@
+from wagtail.contrib.frontend_cache.utils import purge_urls_from_cache
+
+from hypha.apply.activity.tasks import app
+
+from .cache import warm_urls
+
+
+@app.task
+def warm_cache(urls):
+    # Renders the pages purged by purge_page_dependents
+    return warm_urls(urls)
+
+
+@app.task
+def purge_frontend_cache(urls):
+    # The backends split the URLs into as many calls as their API needs
+    purge_urls_from_cache(urls)
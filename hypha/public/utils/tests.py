@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from wagtail.core.models import Page, Site
+
+from hypha.apply.utils.testing import FakeRedis
+from hypha.public.standardpages.models import (
+    IndexPage,
+    InformationPage,
+    InformationPageRelatedPage,
+)
+
+from .cache import (
+    LocalFrontendCacheBackend,
+    batched_purges,
+    get_dependent_page_ids,
+    page_tag,
+    purge_cache_on_all_sites,
+    purge_page_dependents,
+    purge_tags,
+    tag_cache_entry,
+    warm_urls,
+)
+
+
+class TestPageCacheDependencies(TestCase):
+    def setUp(self):
+        root = Page.get_first_root_node()
+        self.index = root.add_child(instance=IndexPage(title='Index', slug='index'))
+        self.page = self.index.add_child(instance=InformationPage(title='Page', slug='page', body=[]))
+        self.other = root.add_child(instance=InformationPage(title='Other', slug='other', body=[]))
+        InformationPageRelatedPage.objects.create(source_page=self.other, page=self.page)
+        patcher = mock.patch('hypha.public.utils.cache.get_tag_client', return_value=FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_index_and_linking_pages_depend_on_page(self):
+        self.assertEqual(get_dependent_page_ids(self.page), {self.page.pk, self.index.pk, self.other.pk})
+
+    def test_unrelated_pages_dont_depend_on_page(self):
+        self.assertEqual(get_dependent_page_ids(self.other), {self.other.pk})
+
+    def test_purge_only_removes_tagged_entries(self):
+        cache = caches['wagtailcache']
+        cache.set('page', 'rendered')
+        cache.set('other', 'rendered')
+        tag_cache_entry([page_tag(self.page.pk)], 'wagtailcache', ['page'], 'https://example.com/page/')
+        tag_cache_entry([page_tag(self.other.pk)], 'wagtailcache', ['other'], 'https://example.com/other/')
+
+        self.assertEqual(purge_tags([page_tag(self.page.pk)]), {'https://example.com/page/'})
+        self.assertIsNone(cache.get('page'))
+        self.assertEqual(cache.get('other'), 'rendered')
+        self.assertEqual(purge_tags([page_tag(self.page.pk)]), set())
+
+    @mock.patch('hypha.public.utils.cache.MAX_TAG_SLOTS', 3)
+    def test_tag_purged_after_max_slots(self):
+        cache = caches['wagtailcache']
+        cache.set('page', 'rendered')
+        tag = page_tag(self.page.pk)
+        for _ in range(3):
+            tag_cache_entry([tag], 'wagtailcache', ['page'], 'https://example.com/page/')
+        self.assertEqual(cache.get('page'), 'rendered')
+
+        tag_cache_entry([tag], 'wagtailcache', ['other'], 'https://example.com/other/')
+        self.assertIsNone(cache.get('page'))
+        self.assertEqual(purge_tags([tag]), {'https://example.com/other/'})
+
+    def test_whole_cache_cleared_without_redis(self):
+        cache = caches['wagtailcache']
+        cache.set('other', 'rendered')
+        with mock.patch('hypha.public.utils.cache.get_tag_client', return_value=None):
+            tag_cache_entry([page_tag(self.page.pk)], 'wagtailcache', ['page'], 'https://example.com/page/')
+            self.assertEqual(purge_tags([page_tag(self.page.pk)]), set())
+            purge_page_dependents(self.page)
+        self.assertIsNone(cache.get('other'))
+
+    def test_cached_response_tagged_with_page(self):
+        Site.objects.create(hostname='testserver', root_page=self.page)
+        response = self.client.get('/', secure=True)
+        self.assertEqual(response['X-Wagtail-Cache'], 'miss')
+        self.assertEqual(self.client.get('/', secure=True)['X-Wagtail-Cache'], 'hit')
+
+        self.assertEqual(purge_tags([page_tag(self.page.pk)]), {'https://testserver/'})
+        self.assertEqual(self.client.get('/', secure=True)['X-Wagtail-Cache'], 'miss')
+
+    def test_warm_caches_page(self):
+        Site.objects.create(hostname='testserver', root_page=self.page)
+        self.assertEqual(warm_urls(['https://testserver/']), 1)
+        self.assertEqual(self.client.get('/', secure=True)['X-Wagtail-Cache'], 'hit')
+
+
+@override_settings(
+    DEBUG=False,
+    WAGTAILFRONTENDCACHE={'local': {'BACKEND': 'hypha.public.utils.cache.LocalFrontendCacheBackend'}},
+)
+# The test transaction is never committed
+@mock.patch('hypha.public.utils.cache.transaction.on_commit', lambda func: func())
+class TestFrontendCachePurge(TestCase):
+    def setUp(self):
+        Site.objects.all().delete()
+        root = Page.get_first_root_node()
+        for hostname in ['one.example.com', 'two.example.com']:
+            Site.objects.create(hostname=hostname, root_page=root)
+        LocalFrontendCacheBackend.batches.clear()
+
+    def test_purges_every_site(self):
+        purge_cache_on_all_sites('/page/')
+        self.assertEqual(LocalFrontendCacheBackend.batches, [
+            ['http://one.example.com/page/', 'http://two.example.com/page/'],
+        ])
+
+    def test_batch_is_purged_once_without_duplicates(self):
+        with batched_purges():
+            purge_cache_on_all_sites('/page/')
+            purge_cache_on_all_sites('/page/', '/other/')
+            self.assertEqual(LocalFrontendCacheBackend.batches, [])
+
+        self.assertEqual(LocalFrontendCacheBackend.batches, [[
+            'http://one.example.com/other/',
+            'http://one.example.com/page/',
+            'http://two.example.com/other/',
+            'http://two.example.com/page/',
+        ]])
+
+    def test_nothing_purged_for_empty_batch(self):
+        with batched_purges():
+            pass
+        self.assertEqual(LocalFrontendCacheBackend.batches, [])
+
+    @override_settings(DEBUG=True)
+    def test_nothing_purged_when_debugging(self):
+        purge_cache_on_all_sites('/page/')
+        self.assertEqual(LocalFrontendCacheBackend.batches, [])
@@ -37,8 +37,8 @@ def editor_css():
     return link.format(path)
 
 
-@hooks.register('after_create_page')
-@hooks.register('after_edit_page')
+@hooks.register('after_move_page')
 def clear_wagtailcache(request, page):
-    if page.live:
-        clear_cache()
+    # Moving changes the URL of every page below, publishing and unpublishing
+    # only purges the pages which depend on the page, see purge_page_dependents
+    clear_cache()
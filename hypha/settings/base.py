@@ -170,6 +170,8 @@ MIDDLEWARE = [
     'wagtail.contrib.redirects.middleware.RedirectMiddleware',
 
     'hypha.apply.middleware.apply_url_conf_middleware',
+
+    'hypha.public.utils.cache.frontend_cache_purge_middleware',
 ]
 
 ROOT_URLCONF = 'hypha.urls'
@@ -275,10 +277,41 @@ CACHES['django_file_form'] = {
 
 WAGTAIL_CACHE_BACKEND = 'wagtailcache'
 
+# Render the pages purged from the cache when a page is published again in the
+# background, so the next visitors don't all wait for them to be rendered. Off
+# without redis, as the tasks would run inside the request publishing the page.
+WAGTAIL_CACHE_WARM = env.get('WAGTAIL_CACHE_WARM', 'true' if 'REDIS_URL' in env else 'false').lower().strip() == 'true'
+
+# Seconds to cache the roles of each user for, only worthwhile when the cache
+# is faster than the database so disabled without redis
+USER_ROLES_CACHE_TIMEOUT = int(env.get('USER_ROLES_CACHE_TIMEOUT', 3600 if 'REDIS_URL' in env else 0))
+
+# Seconds to cache small tables which rarely change, such as the screening
+# statuses, reviewer roles and groups. Disabled without redis, as for the roles.
+REFERENCE_CACHE_TIMEOUT = int(env.get('REFERENCE_CACHE_TIMEOUT', 3600 if 'REDIS_URL' in env else 0))
+
+# Seconds to cache the options of the submission filters and how many
+# submissions each has, they are reloaded sooner whenever a submission changes.
+# Even the database cache is much faster than counting the submissions.
+FACET_CACHE_TIMEOUT = int(env.get('FACET_CACHE_TIMEOUT', 3600))
+
+# Seconds to cache the diff of each field when comparing two revisions.
+REVISION_DIFF_CACHE_TIMEOUT = int(env.get('REVISION_DIFF_CACHE_TIMEOUT', 60 * 60 * 24 * 7))
+
+# Seconds to cache the table of all the reviews of a submission, it is rebuilt
+# sooner whenever a review or opinion changes
+REVIEW_MATRIX_CACHE_TIMEOUT = int(env.get('REVIEW_MATRIX_CACHE_TIMEOUT', 60 * 60))
+
+# Seconds to cache the rendered answers of a submission, a new live revision
+# has a new key. Answers longer than the max size, in characters, aren't cached
+RENDERED_ANSWERS_CACHE_TIMEOUT = int(env.get('RENDERED_ANSWERS_CACHE_TIMEOUT', 60 * 60 * 24))
+RENDERED_ANSWERS_CACHE_MAX_SIZE = int(env.get('RENDERED_ANSWERS_CACHE_MAX_SIZE', 500 * 1024))
+
 # Cloudflare cache invalidation.
 # See https://docs.wagtail.io/en/v2.8/reference/contrib/frontendcache.html
+# The app isn't installed, its purge on publish is replaced by the batched
+# purge_page_dependents in hypha.public.utils.cache
 if 'CLOUDFLARE_BEARER_TOKEN' in env and 'CLOUDFLARE_API_ZONEID' in env:
-    INSTALLED_APPS += ('wagtail.contrib.frontend_cache', )  # noqa
     WAGTAILFRONTENDCACHE = {
         'cloudflare': {
             'BACKEND': 'wagtail.contrib.frontend_cache.backends.CloudflareBackend',
@@ -550,6 +583,8 @@ if 'SLACK_TYPE_COMMENTS' in env:
     SLACK_TYPE_COMMENTS = env['SLACK_TYPE_COMMENTS'].split(',')
 else:
     SLACK_TYPE_COMMENTS = []
+# Messages to the same rooms within this many seconds are sent as one post
+SLACK_MESSAGE_WINDOW = int(env.get('SLACK_MESSAGE_WINDOW', 5))
 
 
 # Celery config
@@ -558,6 +593,9 @@ if 'REDIS_URL' in env:
 else:
     CELERY_TASK_ALWAYS_EAGER = True
 
+# Tasks outside of the module the celery app is defined in
+CELERY_IMPORTS = ['hypha.apply.utils.tasks', 'hypha.public.utils.tasks']
+
 
 # S3 configuration
 
@@ -594,6 +632,19 @@ if 'AWS_STORAGE_BUCKET_NAME' in env:
     )
 
 
+# How private media is handed to the browser once the view has checked access:
+# 'stream' sends the file through Django, 'redirect' sends a short lived signed
+# URL to the storage (S3), 'accel' and 'sendfile' pass the path of a local file
+# to nginx (X-Accel-Redirect) or Apache (X-Sendfile). When the storage can't be
+# served that way the file is streamed, unless the fallback is switched off.
+PRIVATE_MEDIA_SERVING = env.get('PRIVATE_MEDIA_SERVING', 'redirect' if 'AWS_STORAGE_BUCKET_NAME' in env else 'stream')
+PRIVATE_MEDIA_STREAM_FALLBACK = env.get('PRIVATE_MEDIA_STREAM_FALLBACK', 'true').lower().strip() == 'true'
+# Seconds a signed URL stays valid for
+PRIVATE_MEDIA_REDIRECT_EXPIRY = int(env.get('PRIVATE_MEDIA_REDIRECT_EXPIRY', 60))
+# The internal nginx location which maps onto the private storage location
+PRIVATE_MEDIA_ACCEL_PREFIX = env.get('PRIVATE_MEDIA_ACCEL_PREFIX', '/private-media/')
+
+
 # Settings to connect to the Bucket from which we are migrating data
 AWS_MIGRATION_BUCKET_NAME = env.get('AWS_MIGRATION_BUCKET_NAME', '')
 AWS_MIGRATION_ACCESS_KEY_ID = env.get('AWS_MIGRATION_ACCESS_KEY_ID', '')